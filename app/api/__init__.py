@@ -1,6 +1,15 @@
 from fastapi import APIRouter
 from app.api.routes import app as user_router
 from app.api.session_routes import router as session_router
+from app.api.event_routes import router as event_router
+from app.api.job_routes import router as job_router
+from app.api.announcement_routes import router as announcement_router
+from app.api.metrics_routes import router as metrics_router
+from app.api.car_routes import router as car_router
+from app.api.route_routes import router as route_router
+from app.api.sync_routes import router as sync_router
+from app.api.task_routes import router as task_router
+from app.api.dashboard_routes import router as dashboard_router
 
 router = APIRouter()
 
@@ -8,4 +17,31 @@ router = APIRouter()
 router.include_router(user_router)
 
 # 注册会话相关路由
-router.include_router(session_router)
\ No newline at end of file
+router.include_router(session_router)
+
+# 注册事件推送相关路由
+router.include_router(event_router)
+
+# 注册后台任务相关路由
+router.include_router(job_router)
+
+# 注册公告相关路由
+router.include_router(announcement_router)
+
+# 注册小车相关路由
+router.include_router(car_router)
+
+# 注册路线相关路由
+router.include_router(route_router)
+
+# 注册任务队列路由
+router.include_router(task_router)
+
+# 注册运营看板路由
+router.include_router(dashboard_router)
+
+# 注册增量同步路由
+router.include_router(sync_router)
+
+# 注册监控指标路由
+router.include_router(metrics_router)
\ No newline at end of file
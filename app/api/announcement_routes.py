@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.security import get_current_admin_user
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.announcement import AnnouncementCreate, AnnouncementUpdate, AnnouncementResponse
+from app.services.announcement_service import AnnouncementService
+from app.utils.responses import conditional_json_response
+
+router = APIRouter(prefix="/announcements", tags=["announcements"])
+
+def get_announcement_service(db: Session = Depends(get_db)) -> AnnouncementService:
+    """
+    获取公告服务实例
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        AnnouncementService: 公告服务实例
+    """
+    return AnnouncementService(db)
+
+@router.get("", response_model=List[AnnouncementResponse])
+async def list_announcements(
+    if_none_match: Optional[str] = Header(None),
+    announcement_service: AnnouncementService = Depends(get_announcement_service)
+):
+    """
+    获取有效公告列表（支持If-None-Match条件请求）
+
+    Args:
+        if_none_match: 客户端缓存的ETag
+        announcement_service: 公告服务
+
+    Returns:
+        Response: 公告列表，内容未变化时返回304
+    """
+    snapshot = announcement_service.get_snapshot()
+    return conditional_json_response(
+        if_none_match, snapshot.content, snapshot.etag,
+        {"X-Announcements-Version": str(snapshot.version)}
+    )
+
+@router.get("/{announcement_id}", response_model=AnnouncementResponse)
+async def get_announcement(
+    announcement_id: int,
+    if_none_match: Optional[str] = Header(None),
+    announcement_service: AnnouncementService = Depends(get_announcement_service)
+):
+    """
+    获取单条有效公告（支持If-None-Match条件请求）
+
+    Args:
+        announcement_id: 公告ID
+        if_none_match: 客户端缓存的ETag
+        announcement_service: 公告服务
+
+    Returns:
+        Response: 公告内容，内容未变化时返回304
+    """
+    snapshot = announcement_service.get_snapshot()
+    item = snapshot.items.get(announcement_id)
+    if item is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="公告不存在"
+        )
+    content, etag = item
+    return conditional_json_response(
+        if_none_match, content, etag,
+        {"X-Announcements-Version": str(snapshot.version)}
+    )
+
+@router.post("", response_model=AnnouncementResponse, status_code=status.HTTP_201_CREATED)
+async def create_announcement(
+    request: AnnouncementCreate,
+    current_user: User = Depends(get_current_admin_user),
+    announcement_service: AnnouncementService = Depends(get_announcement_service)
+):
+    """
+    创建公告（管理员）
+
+    Args:
+        request: 公告内容
+        current_user: 当前管理员
+        announcement_service: 公告服务
+
+    Returns:
+        AnnouncementResponse: 新建的公告
+    """
+    return announcement_service.create_announcement(request)
+
+@router.put("/{announcement_id}", response_model=AnnouncementResponse)
+async def update_announcement(
+    announcement_id: int,
+    request: AnnouncementUpdate,
+    current_user: User = Depends(get_current_admin_user),
+    announcement_service: AnnouncementService = Depends(get_announcement_service)
+):
+    """
+    更新公告（管理员）
+
+    Args:
+        announcement_id: 公告ID
+        request: 需要更新的字段
+        current_user: 当前管理员
+        announcement_service: 公告服务
+
+    Returns:
+        AnnouncementResponse: 更新后的公告
+    """
+    try:
+        return announcement_service.update_announcement(announcement_id, request)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+@router.delete("/{announcement_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_announcement(
+    announcement_id: int,
+    current_user: User = Depends(get_current_admin_user),
+    announcement_service: AnnouncementService = Depends(get_announcement_service)
+):
+    """
+    删除公告（管理员）
+
+    Args:
+        announcement_id: 公告ID
+        current_user: 当前管理员
+        announcement_service: 公告服务
+    """
+    try:
+        announcement_service.delete_announcement(announcement_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
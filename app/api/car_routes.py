@@ -0,0 +1,126 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional, Union
+from app.core.admission import TELEMETRY_GROUP, admission_control, path_param_key
+from app.core.security import Token, car_path_guard, get_current_admin_user, get_current_read_user
+from app.db.database import get_db
+from app.db.replicas import get_read_db
+from app.models.enums import UserRole
+from app.models.user import User
+from app.schemas.car import CarLocationUpdate, CarResponse, CarTelemetry
+from app.schemas.car_log import CarTrackResponse, CarTrackEncodedResponse
+from app.services.car_log_service import CarLogService, MAX_TRACK_POINTS
+from app.services.car_position_service import get_position_coalescer
+from app.services.car_service import CarService
+from app.utils.responses import GEOMETRY_POLYLINE, get_geometry_format, trusted_response
+
+router = APIRouter(prefix="/cars", tags=["cars"])
+
+@router.post("/{car_id}/token", response_model=Token)
+async def issue_car_token(
+    car_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    为小车签发令牌（仅管理员），小车上报时以Bearer令牌认证
+
+    Args:
+        car_id: 小车ID
+        db: 数据库会话
+        current_user: 当前用户
+
+    Returns:
+        Token: 小车令牌
+    """
+    try:
+        return Token(access_token=CarService(db).issue_token(car_id), token_type="bearer")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.post(
+    "/{car_id}/telemetry", response_model=CarResponse,
+    dependencies=[
+        Depends(car_path_guard("car_id")),
+        Depends(admission_control(TELEMETRY_GROUP, path_param_key("car_id"))),
+    ]
+)
+async def report_car_telemetry(
+    car_id: int,
+    telemetry: CarTelemetry,
+    db: Session = Depends(get_db)
+):
+    """
+    小车上报遥测数据（位置、速度、电量、状态），需使用该小车的令牌
+
+    Args:
+        car_id: 小车ID
+        telemetry: 遥测数据
+        db: 数据库会话
+
+    Returns:
+        CarResponse: 更新后的小车信息
+    """
+    try:
+        return CarService(db).record_telemetry(car_id, telemetry)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.put(
+    "/{car_number}/location", status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[
+        Depends(car_path_guard("car_number")),
+        Depends(admission_control(TELEMETRY_GROUP, path_param_key("car_number"))),
+    ]
+)
+async def report_car_location(car_number: str, location: CarLocationUpdate):
+    """
+    小车上报位置（高频），需使用该小车的令牌
+
+    只写入内存中的合并器，由后台线程批量写回数据库，不访问数据库（令牌校验同样不访问数据库）；未知小车编号在写回时忽略
+
+    Args:
+        car_number: 小车编号
+        location: 位置数据
+
+    Returns:
+        dict: 已接受
+    """
+    get_position_coalescer().submit(car_number, location)
+    return {"accepted": True}
+
+@router.get("/{car_id}/track", response_model=Union[CarTrackResponse, CarTrackEncodedResponse])
+async def get_car_track(
+    car_id: int,
+    start_time: Optional[datetime] = Query(None, description="开始时间"),
+    end_time: Optional[datetime] = Query(None, description="结束时间"),
+    limit: int = Query(MAX_TRACK_POINTS, ge=1, le=MAX_TRACK_POINTS, description="最多返回的点数"),
+    geometry: str = Depends(get_geometry_format),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_read_user)
+):
+    """
+    获取小车历史轨迹（geometry=polyline或Accept: application/vnd.polyline+json时以折线编码返回）
+
+    管理员可查看所有小车；其他用户只能查看正在配送其快递的小车
+
+    Args:
+        car_id: 小车ID
+        start_time: 开始时间
+        end_time: 结束时间
+        limit: 最多返回的点数
+        geometry: 坐标格式
+        db: 数据库会话（只读副本）
+        current_user: 当前用户
+
+    Returns:
+        CarTrackResponse | CarTrackEncodedResponse: 小车轨迹
+    """
+    service = CarLogService(db)
+    if current_user.role != UserRole.admin and not service.is_delivering_to(car_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只能查看正在配送本人快递的小车")
+    points = service.get_track(car_id, start_time, end_time, limit)
+    if geometry == GEOMETRY_POLYLINE:
+        return trusted_response(service.build_encoded_track_response(car_id, points))
+    return trusted_response(service.build_track_response(car_id, points))
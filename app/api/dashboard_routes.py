@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.db.database import get_db
+from app.schemas.dashboard import DashboardCountersResponse
+from app.services.dashboard_service import dashboard_cache
+from app.utils.responses import conditional_json_response
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+@router.get("/counters", response_model=DashboardCountersResponse)
+async def get_dashboard_counters(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    获取运营看板计数（支持If-None-Match条件请求）
+
+    计数由写操作增量维护，接口返回进程内缓存的快照，计数未变化时不查询数据库
+
+    Args:
+        if_none_match: 客户端缓存的ETag
+        db: 数据库会话
+
+    Returns:
+        Response: 各状态的任务/快递/小车数量及活跃会话数，内容未变化时返回304
+    """
+    snapshot = dashboard_cache.get(db)
+    return conditional_json_response(if_none_match, snapshot.content, snapshot.etag)
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from app.core.security import get_current_user
+from app.models.enums import UserRole
+from app.models.user import User
+from app.services.event_service import EventBus, Subscription, get_event_bus
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# SSE保活注释的发送间隔（秒）
+KEEPALIVE_INTERVAL_SECONDS = 15
+
+FLEET_EVENT_TYPES = {"task.status", "car.status"}
+
+async def _event_stream(request: Request, bus: EventBus, subscription: Subscription):
+    """
+    将订阅队列中的事件编码为SSE消息流
+
+    Args:
+        request: 当前请求，用于检测客户端断开
+        bus: 事件总线
+        subscription: 事件订阅
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            data = json.dumps(item, ensure_ascii=False, default=str)
+            yield f"id: {item['id']}\nevent: {item['type']}\ndata: {data}\n\n"
+    finally:
+        bus.unsubscribe(subscription)
+
+def _sse_response(request: Request, bus: EventBus, subscription: Subscription) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(request, bus, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/express")
+async def stream_user_express_events(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    bus: EventBus = Depends(get_event_bus)
+):
+    """
+    推送当前用户快递的状态变更事件（SSE）
+
+    Args:
+        request: 当前请求
+        current_user: 当前用户
+        bus: 事件总线
+
+    Returns:
+        StreamingResponse: text/event-stream事件流
+    """
+    user_id = current_user.id
+    subscription = bus.subscribe(
+        lambda item: item["type"] == "express.status" and item.get("user_id") == user_id
+    )
+    return _sse_response(request, bus, subscription)
+
+@router.get("/fleet")
+async def stream_fleet_events(
+    request: Request,
+    car_numbers: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    bus: EventBus = Depends(get_event_bus)
+):
+    """
+    推送小车位置/状态和任务状态变更事件（SSE），供调度台使用
+
+    Args:
+        request: 当前请求
+        car_numbers: 逗号分隔的小车编号，为空时推送全部小车
+        current_user: 当前用户
+        bus: 事件总线
+
+    Returns:
+        StreamingResponse: text/event-stream事件流
+    """
+    if current_user.role == UserRole.customer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权订阅车队事件"
+        )
+    fleet = {number.strip() for number in car_numbers.split(",") if number.strip()} if car_numbers else None
+    subscription = bus.subscribe(
+        lambda item: item["type"] in FLEET_EVENT_TYPES and (fleet is None or item.get("car_number") in fleet)
+    )
+    return _sse_response(request, bus, subscription)
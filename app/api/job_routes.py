@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, status
+from typing import List
+from celery.result import AsyncResult
+from app.core.security import encrypt_job_payload, get_current_admin_user
+from app.models.user import User
+from app.schemas.express import ExpressImportItem
+from app.schemas.job import JobSubmitResponse, JobStatusResponse, JobProgress, CarLogRollupRequest
+from app.schemas.user import UserCreate
+from app.worker import celery_app
+from app.worker.tasks import optimize_route, rollup_car_logs, bulk_import_express, bulk_provision_users
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def _submitted(result: AsyncResult) -> JobSubmitResponse:
+    return JobSubmitResponse(job_id=result.id, status=result.state)
+
+@router.post("/routes/{route_id}/optimize", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_route_optimization(
+    route_id: int,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    提交路线优化任务（仅管理员）
+
+    Args:
+        route_id: 路线ID
+        current_user: 当前用户
+
+    Returns:
+        JobSubmitResponse: 任务ID
+    """
+    return _submitted(optimize_route.delay(route_id))
+
+@router.post("/car-logs/rollup", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_car_log_rollup(
+    request: CarLogRollupRequest,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    提交小车日志汇总任务（仅管理员）
+
+    Args:
+        request: 汇总请求
+        current_user: 当前用户
+
+    Returns:
+        JobSubmitResponse: 任务ID
+    """
+    return _submitted(rollup_car_logs.delay(
+        request.car_id,
+        request.start_time.isoformat() if request.start_time else None,
+        request.end_time.isoformat() if request.end_time else None,
+    ))
+
+@router.post("/express/import", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_express_import(
+    items: List[ExpressImportItem],
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    提交快递批量导入任务（仅管理员）
+
+    Args:
+        items: 待导入的快递列表
+        current_user: 当前用户
+
+    Returns:
+        JobSubmitResponse: 任务ID
+    """
+    return _submitted(bulk_import_express.delay([item.model_dump(mode="json") for item in items]))
+
+@router.post("/users/provision", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_user_provisioning(
+    users: List[UserCreate],
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    提交批量创建用户任务（仅管理员），任务结果为逐行报告
+
+    用户数据加密后放入任务消息，消息代理和结果后端中不出现明文密码；密码哈希在worker中计算，提交不随批量大小变慢
+
+    Args:
+        users: 待创建的用户列表
+        current_user: 当前用户
+
+    Returns:
+        JobSubmitResponse: 任务ID
+    """
+    return _submitted(bulk_provision_users.delay(encrypt_job_payload([user.model_dump(mode="json") for user in users])))
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    查询后台任务状态、进度和结果（仅管理员：任务只能由管理员提交，结果中包含用户ID等数据）
+
+    Args:
+        job_id: 任务ID
+        current_user: 当前用户
+
+    Returns:
+        JobStatusResponse: 任务状态
+    """
+    result = AsyncResult(job_id, app=celery_app)
+    response = JobStatusResponse(job_id=job_id, status=result.state)
+    if result.state == "PROGRESS" and isinstance(result.info, dict):
+        response.progress = JobProgress(**result.info)
+    elif result.successful():
+        response.result = result.result
+    elif result.failed():
+        response.error = str(result.result)
+    return response
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+from app.core.instrumentation import REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    导出运行指标（Prometheus文本格式）
+
+    Returns:
+        Response: 指标文本
+    """
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
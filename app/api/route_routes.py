@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional, Union
+from app.core.security import CarPrincipal, get_current_car_or_user
+from app.models.enums import UserRole
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.route import RouteDetailResponse
+from app.services.route_service import RouteService
+from app.utils.responses import conditional_json_response, get_geometry_format
+
+router = APIRouter(prefix="/routes", tags=["routes"])
+
+@router.get("/{route_id}", response_model=RouteDetailResponse)
+async def get_route(
+    route_id: int,
+    if_none_match: Optional[str] = Header(None),
+    geometry: str = Depends(get_geometry_format),
+    db: Session = Depends(get_db),
+    principal: Union[CarPrincipal, User] = Depends(get_current_car_or_user)
+):
+    """
+    获取路线及其步骤、步骤对应的快递和预约（支持If-None-Match条件请求）
+
+    响应包含收件人姓名、电话和地址：小车令牌只能获取分配给本车且未结束的任务的路线，用户令牌仅限管理员
+
+    响应体按路线缓存，仅在路线内容变化时重新查询和序列化；
+    geometry=polyline或Accept: application/vnd.polyline+json时步骤坐标以折线编码返回
+
+    Args:
+        route_id: 路线ID
+        if_none_match: 客户端缓存的ETag
+        geometry: 坐标格式
+        db: 数据库会话
+        principal: 当前小车或用户
+
+    Returns:
+        Response: 路线详情，内容未变化时返回304
+    """
+    service = RouteService(db)
+    if isinstance(principal, CarPrincipal):
+        if not service.is_assigned_to_car(route_id, principal.car_number):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只能获取分配给本车的路线")
+    elif principal.role != UserRole.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
+    try:
+        payload = service.get_route_payload(route_id, geometry)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return conditional_json_response(if_none_match, payload.content, payload.etag, {"Vary": "Accept"})
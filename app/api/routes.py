@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request
 from app.schemas.user import UserCreate, UserResponse, UserLogin
 from datetime import datetime
-from app.core.security import create_access_token, get_password_hash, verify_password, get_user, get_email, authenticate_user, get_current_user
+from app.core.security import create_access_token, get_password_hash, verify_password, get_user, get_email, authenticate_user, get_current_user, get_current_read_user
 
 
 from fastapi import status, Depends
@@ -11,11 +11,8 @@ from fastapi.exceptions import HTTPException
 from app.models.user import User
 from app.core.security import Token
 from fastapi.security import OAuth2PasswordRequestForm
-import os
 from datetime import timedelta
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.core.config import Settings, get_settings
 
 app = APIRouter()
 
@@ -47,16 +44,16 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 @app.post('api/users/login', response_model = Token)
-async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db), settings: Settings = Depends(get_settings)):
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code = status.HTTP_401_UNAUTHORIZED, detail = "用户名或密码错误")
-    access_token_expires = timedelta(minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")))
+    access_token_expires = timedelta(minutes = settings.access_token_expire_minutes)
     access_token = create_access_token(data = {"sub": user.username}, expires_delta = access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get('/api/users/me', response_model = UserResponse)
-async def get_current_user(current_user: User = Depends(get_current_user)):
+async def get_current_user(current_user: User = Depends(get_current_read_user)):
     return current_user
 
 
@@ -2,6 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
+from app.core.admission import (
+    SESSION_GROUP, SESSION_INIT_GROUP, admission_control, body_field_key, path_param_key
+)
+from app.core.config import Settings, get_settings
 from app.services.session_service import SessionService
 from app.schemas.session import (
     SessionInitializeRequest, SessionResponse, SessionTerminateRequest,
@@ -9,24 +13,32 @@ from app.schemas.session import (
     HeartbeatResponse, SessionValidationResponse, ActivityUpdateRequest,
     ActivityUpdateResponse, SessionConfigResponse
 )
+from app.schemas.adapters import SessionListAdapter
 from app.core.security import get_current_user
 from app.models.user import User
+from app.utils.responses import trusted_response
 
 router = APIRouter(prefix="/user-sessions", tags=["user-sessions"])
 
-def get_session_service(db: Session = Depends(get_db)) -> SessionService:
+# 按设备/用户限流的会话初始化和强制下线，按会话限流的心跳等高频请求
+init_admission = Depends(admission_control(SESSION_INIT_GROUP, body_field_key("deviceId", "userId")))
+session_admission = Depends(admission_control(SESSION_GROUP, path_param_key("session_id")))
+user_admission = Depends(admission_control(SESSION_GROUP, path_param_key("user_id")))
+
+def get_session_service(db: Session = Depends(get_db), settings: Settings = Depends(get_settings)) -> SessionService:
     """
     获取会话服务实例
     
     Args:
         db: 数据库会话
+        settings: 应用配置
         
     Returns:
         SessionService: 会话服务实例
     """
-    return SessionService(db)
+    return SessionService(db, settings)
 
-@router.post("/initialize", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/initialize", response_model=SessionResponse, status_code=status.HTTP_201_CREATED, dependencies=[init_admission])
 async def initialize_user_session(
     request: SessionInitializeRequest,
     session_service: SessionService = Depends(get_session_service)
@@ -42,9 +54,12 @@ async def initialize_user_session(
         SessionResponse: 会话信息
     """
     try:
-        return session_service.initialize_user_session(
-            user_id=request.userId,
-            device_id=request.deviceId
+        return trusted_response(
+            session_service.initialize_user_session(
+                user_id=request.userId,
+                device_id=request.deviceId
+            ),
+            status_code=status.HTTP_201_CREATED
         )
     except ValueError as e:
         raise HTTPException(
@@ -57,7 +72,7 @@ async def initialize_user_session(
             detail="初始化会话失败"
         )
 
-@router.post("/{session_id}/terminate", response_model=SessionTerminationResponse)
+@router.post("/{session_id}/terminate", response_model=SessionTerminationResponse, dependencies=[session_admission])
 async def terminate_user_session(
     session_id: str,
     request: SessionTerminateRequest,
@@ -75,14 +90,14 @@ async def terminate_user_session(
         SessionTerminationResponse: 终止结果
     """
     try:
-        return session_service.terminate_user_session(session_id)
+        return trusted_response(session_service.terminate_user_session(session_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="终止会话失败"
         )
 
-@router.post("/force-terminate", response_model=SessionTerminationResponse)
+@router.post("/force-terminate", response_model=SessionTerminationResponse, dependencies=[init_admission])
 async def force_terminate_user_sessions(
     request: ForceTerminateRequest,
     session_service: SessionService = Depends(get_session_service)
@@ -98,17 +113,17 @@ async def force_terminate_user_sessions(
         SessionTerminationResponse: 终止结果
     """
     try:
-        return session_service.force_terminate_user_sessions(
+        return trusted_response(session_service.force_terminate_user_sessions(
             user_id=request.userId,
             exclude_device_id=request.excludeDeviceId
-        )
+        ))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="强制终止会话失败"
         )
 
-@router.post("/{session_id}/heartbeat", response_model=HeartbeatResponse)
+@router.post("/{session_id}/heartbeat", response_model=HeartbeatResponse, dependencies=[session_admission])
 async def send_user_heartbeat(
     session_id: str,
     request: HeartbeatRequest,
@@ -126,14 +141,14 @@ async def send_user_heartbeat(
         HeartbeatResponse: 心跳响应
     """
     try:
-        return session_service.send_user_heartbeat(session_id)
+        return trusted_response(session_service.send_user_heartbeat(session_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="心跳检测失败"
         )
 
-@router.get("/active/{user_id}", response_model=List[SessionResponse])
+@router.get("/active/{user_id}", response_model=List[SessionResponse], dependencies=[user_admission])
 async def get_user_active_sessions(
     user_id: int,
     session_service: SessionService = Depends(get_session_service)
@@ -149,14 +164,14 @@ async def get_user_active_sessions(
         List[SessionResponse]: 会话信息列表
     """
     try:
-        return session_service.get_user_active_sessions(user_id)
+        return trusted_response(session_service.get_user_active_sessions(user_id), SessionListAdapter)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="获取活跃会话失败"
         )
 
-@router.get("/{session_id}/validate", response_model=SessionValidationResponse)
+@router.get("/{session_id}/validate", response_model=SessionValidationResponse, dependencies=[session_admission])
 async def validate_user_session(
     session_id: str,
     session_service: SessionService = Depends(get_session_service)
@@ -172,14 +187,14 @@ async def validate_user_session(
         SessionValidationResponse: 验证结果
     """
     try:
-        return session_service.validate_user_session(session_id)
+        return trusted_response(session_service.validate_user_session(session_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="验证会话失败"
         )
 
-@router.put("/{session_id}/activity", response_model=ActivityUpdateResponse)
+@router.put("/{session_id}/activity", response_model=ActivityUpdateResponse, dependencies=[session_admission])
 async def update_session_activity(
     session_id: str,
     request: ActivityUpdateRequest,
@@ -197,7 +212,7 @@ async def update_session_activity(
         ActivityUpdateResponse: 更新结果
     """
     try:
-        return session_service.update_session_activity(session_id)
+        return trusted_response(session_service.update_session_activity(session_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -218,7 +233,7 @@ async def get_session_config(
         SessionConfigResponse: 超时配置信息
     """
     try:
-        return session_service.get_session_config()
+        return trusted_response(session_service.get_session_config())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
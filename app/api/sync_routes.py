@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.security import get_current_user
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.sync import SyncChangesResponse
+from app.services.sync_service import SyncCursorExpired, SyncService
+from app.utils.responses import trusted_response
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("/changes", response_model=SyncChangesResponse)
+async def get_changes(
+    cursor: Optional[str] = Query(None, description="上次同步返回的游标，首次同步不传"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="每类记录的最大返回条数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    增量同步：返回游标之后变更的任务、快递、路线、路线步骤、预约以及已删除的记录
+
+    has_more为true时应立即用返回的游标继续请求；返回410时清空本地数据并不带游标重新同步
+
+    Args:
+        cursor: 同步游标
+        limit: 每类记录的最大返回条数
+        db: 数据库会话
+        current_user: 当前用户
+
+    Returns:
+        SyncChangesResponse: 变更记录和新游标
+    """
+    try:
+        return trusted_response(SyncService(db).get_changes(current_user, cursor, limit))
+    except SyncCursorExpired as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from typing import Optional, Union
+from app.core.security import CarPrincipal, get_current_car, get_current_car_or_user
+from app.db.database import get_db
+from app.models.enums import UserRole
+from app.models.user import User
+from app.schemas.task import TaskClaimRequest, TaskResponse
+from app.services.task_queue_service import TaskQueueService
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+def _lease_lost(task_id: int) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"任务{task_id}不在该小车的进行中任务里（租约可能已到期被重新领取）")
+
+def _claiming_car(principal: Union[CarPrincipal, User], request: Optional[TaskClaimRequest]) -> str:
+    """领取任务的小车编号：小车令牌取自令牌，调度员（非客户用户）取自请求体"""
+    car_number = request.car_number if request else None
+    if isinstance(principal, CarPrincipal):
+        if car_number is not None and car_number != principal.car_number:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只能为本车领取任务")
+        return principal.car_number
+    if principal.role == UserRole.customer:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权领取任务")
+    if car_number is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="调度员领取任务需指定car_number")
+    return car_number
+
+@router.post(
+    "/claim", response_model=TaskResponse,
+    responses={status.HTTP_204_NO_CONTENT: {"description": "没有可领取的任务"}}
+)
+async def claim_task(
+    request: Optional[TaskClaimRequest] = None,
+    principal: Union[CarPrincipal, User] = Depends(get_current_car_or_user),
+    db: Session = Depends(get_db)
+):
+    """
+    领取下一个待处理任务（并发领取者不会拿到同一个任务）
+
+    小车以小车令牌为本车领取；调度员以用户令牌代指定小车领取，之后由该小车续约、完成或放弃
+
+    Args:
+        request: 领取请求，调度员需指定小车编号
+        principal: 当前小车或调度员
+        db: 数据库会话
+
+    Returns:
+        TaskResponse: 领取到的任务，没有可领取的任务时返回204
+    """
+    car_number = _claiming_car(principal, request)
+    try:
+        task = TaskQueueService(db).claim(car_number)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    if task is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return task
+
+@router.post("/{task_id}/lease", response_model=TaskResponse)
+async def renew_task_lease(task_id: int, car: CarPrincipal = Depends(get_current_car), db: Session = Depends(get_db)):
+    """
+    续约已领取的任务
+
+    Args:
+        task_id: 任务ID
+        car: 当前小车
+        db: 数据库会话
+
+    Returns:
+        TaskResponse: 续约后的任务
+    """
+    task = TaskQueueService(db).renew_lease(task_id, car.car_number)
+    if task is None:
+        raise _lease_lost(task_id)
+    return task
+
+@router.post("/{task_id}/complete", response_model=TaskResponse)
+async def complete_task(task_id: int, car: CarPrincipal = Depends(get_current_car), db: Session = Depends(get_db)):
+    """
+    完成已领取的任务
+
+    Args:
+        task_id: 任务ID
+        car: 当前小车
+        db: 数据库会话
+
+    Returns:
+        TaskResponse: 完成的任务
+    """
+    task = TaskQueueService(db).complete(task_id, car.car_number)
+    if task is None:
+        raise _lease_lost(task_id)
+    return task
+
+@router.post("/{task_id}/release", response_model=TaskResponse)
+async def release_task(task_id: int, car: CarPrincipal = Depends(get_current_car), db: Session = Depends(get_db)):
+    """
+    放弃已领取的任务，退回待处理
+
+    Args:
+        task_id: 任务ID
+        car: 当前小车
+        db: 数据库会话
+
+    Returns:
+        TaskResponse: 退回的任务
+    """
+    task = TaskQueueService(db).release(task_id, car.car_number)
+    if task is None:
+        raise _lease_lost(task_id)
+    return task
@@ -0,0 +1,112 @@
+# 准入控制
+# 在请求进入业务逻辑和数据库之前做两道检查：
+#   1. 按键限流：每个会话/设备/用户/小车一个令牌桶，超出速率返回429并带Retry-After
+#   2. 路由组并发上限：同一路由组正在处理的请求数达到上限时直接返回503，避免请求堆积占满连接池
+# 作为路由级依赖使用（路由级依赖先于参数依赖执行，被拒绝的请求不会创建数据库会话）
+import json
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException, Request, status
+from app.core.config import get_settings
+from app.core.instrumentation import REGISTRY
+from app.utils.rate_limit import ConcurrencyLimiter, get_rate_limit_store, retry_after_header
+
+# 限流键提取函数：返回None表示该请求不参与限流
+KeyFunc = Callable[[Request], Awaitable[Optional[str]]]
+
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "http_admission_rejections_total", "准入控制拒绝的请求数", ("group", "reason")
+)
+
+# 路由组名，对应配置项rate_limit_<group>_per_minute、rate_limit_<group>_burst、max_concurrent_<group>_requests
+SESSION_GROUP = "session"
+SESSION_INIT_GROUP = "session_init"
+TELEMETRY_GROUP = "telemetry"
+
+_concurrency_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+def get_concurrency_limiter(group: str) -> ConcurrencyLimiter:
+    """
+    获取路由组的并发上限（进程内共享，按组懒创建）
+
+    Args:
+        group: 路由组名
+
+    Returns:
+        ConcurrencyLimiter: 并发上限
+    """
+    limiter = _concurrency_limiters.get(group)
+    if limiter is None:
+        limit = getattr(get_settings(), f"max_concurrent_{group}_requests")
+        limiter = _concurrency_limiters.setdefault(group, ConcurrencyLimiter(limit))
+    return limiter
+
+def path_param_key(name: str) -> KeyFunc:
+    """按路径参数限流，例如session_id、car_id"""
+    async def key(request: Request) -> Optional[str]:
+        value = request.path_params.get(name)
+        return f"{name}={value}" if value is not None else None
+    return key
+
+def body_field_key(*names: str) -> KeyFunc:
+    """
+    按JSON请求体中的字段限流，取第一个存在的字段，例如deviceId、userId
+
+    请求体由Starlette缓存，之后的参数解析不会重复读取
+    """
+    async def key(request: Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(body, dict):
+            return None
+        for name in names:
+            if body.get(name) is not None:
+                return f"{name}={body[name]}"
+        return None
+    return key
+
+def admission_control(group: str, key_func: KeyFunc):
+    """
+    创建准入控制依赖
+
+    用法:
+        @router.post("/{session_id}/heartbeat", dependencies=[Depends(admission_control(SESSION_GROUP, path_param_key("session_id")))])
+
+    Args:
+        group: 路由组名
+        key_func: 限流键提取函数
+
+    Returns:
+        依赖函数：超出速率时抛出429，超出并发上限时抛出503
+    """
+    async def dependency(request: Request):
+        settings = get_settings()
+        if settings.rate_limit_enabled:
+            key = await key_func(request)
+            if key is not None:
+                per_minute = getattr(settings, f"rate_limit_{group}_per_minute")
+                burst = getattr(settings, f"rate_limit_{group}_burst")
+                allowed, wait_seconds = get_rate_limit_store().consume(f"{group}:{key}", per_minute / 60, burst)
+                if not allowed:
+                    ADMISSION_REJECTIONS.inc((group, "rate_limited"))
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="请求过于频繁，请稍后重试",
+                        headers={"Retry-After": retry_after_header(wait_seconds)}
+                    )
+
+        limiter = get_concurrency_limiter(group)
+        if not limiter.try_acquire():
+            ADMISSION_REJECTIONS.inc((group, "overloaded"))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="服务繁忙，请稍后重试",
+                headers={"Retry-After": retry_after_header(settings.admission_retry_after_seconds)}
+            )
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
@@ -1,2 +1,144 @@
 # 应用配置文件
-# 包括数据库连接、Redis配置、API密钥等配置项
\ No newline at end of file
+# 包括数据库连接、Redis配置、API密钥等配置项
+# 所有配置项均可通过同名（大写）环境变量或.env文件覆盖
+from functools import lru_cache
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """应用配置"""
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+    # 数据库
+    database_url: Optional[str] = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_create_tables_on_startup: bool = False
+    # 只读副本：逗号分隔的副本URL，未配置时只读接口也使用主库
+    database_replica_urls: Optional[str] = None
+    # 副本延迟超过该值（秒）时只读接口回退到主库；延迟检测结果在每个工作进程内缓存的时间
+    replica_max_lag_seconds: float = 5
+    replica_lag_check_interval_seconds: float = 1
+    # 同一客户端写请求后该时间内的读请求仍走主库（读己之写），应大于副本的正常延迟
+    read_your_writes_seconds: float = 5
+    # local为进程内记录最近的写请求，redis为所有工作进程共享（多工作进程部署时需要）
+    read_your_writes_backend: str = "local"
+
+    # JWT认证
+    secret_key: str
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+    # 小车令牌（管理员为每辆小车签发，小车上报和领取任务时使用）的有效期
+    car_token_expire_days: int = 30
+
+    # 批量创建用户：并行计算密码哈希的进程数，0表示使用CPU核数
+    password_hash_workers: int = 0
+    # 含明文密码的后台任务参数的加密密钥（Fernet密钥，API和worker需一致），未设置时由SECRET_KEY派生
+    job_payload_key: Optional[str] = None
+
+    # 用户会话
+    session_timeout_minutes: int = 30
+    heartbeat_interval_minutes: int = 5
+    max_concurrent_sessions: int = 1
+    # 开启后会话ID为签名令牌，校验会话不访问数据库（令牌在心跳时续期）
+    session_token_mode: bool = False
+
+    # 准入控制：按键限流（令牌桶）和路由组并发上限
+    rate_limit_enabled: bool = True
+    # local为进程内限流（每个工作进程独立计数），redis为所有工作进程共享限额
+    rate_limit_backend: str = "local"
+    # 单个会话的心跳/校验/活动更新/终止请求
+    rate_limit_session_per_minute: float = 30
+    rate_limit_session_burst: int = 10
+    # 单个设备/用户的会话初始化和强制下线请求
+    rate_limit_session_init_per_minute: float = 10
+    rate_limit_session_init_burst: int = 5
+    # 单辆小车的遥测上报
+    rate_limit_telemetry_per_minute: float = 120
+    rate_limit_telemetry_burst: int = 20
+    # 每个工作进程内各路由组同时处理的最大请求数，0表示不限制
+    max_concurrent_session_requests: int = 64
+    max_concurrent_session_init_requests: int = 16
+    max_concurrent_telemetry_requests: int = 64
+    admission_retry_after_seconds: int = 1
+
+    # 写请求幂等键（Idempotency-Key请求头）
+    # local为进程内存储（重试落到其他工作进程时不命中），redis为所有工作进程共享
+    idempotency_backend: str = "local"
+    idempotency_cache_size: int = 10000
+    # 保存的响应的有效期，应覆盖客户端的重试窗口
+    idempotency_ttl_seconds: int = 86400
+    # 处理中占位的有效期，处理进程异常退出后占位自动失效
+    idempotency_lock_seconds: int = 30
+
+    # 地理编码
+    geocoder_backend: str = "gazetteer"
+    gazetteer_path: str = "data/gazetteer.csv"
+    geocode_cache_size: int = 4096
+
+    # 小车位置上报写回合并
+    car_position_flush_interval_ms: int = 500
+    # 每N次上报采样一条小车日志；移动距离（米）或速度变化（km/h）超过阈值时也立即采样
+    car_position_log_every: int = 10
+    car_position_log_min_distance_m: float = 50
+    car_position_log_min_speed_change: float = 10
+
+    # 遥测异常检测
+    anomaly_detection_enabled: bool = True
+    # 速度和电量变化率指数滑动平均的平滑系数
+    anomaly_speed_alpha: float = 0.3
+    anomaly_stall_seconds: int = 300
+    anomaly_stall_radius_m: float = 20
+    anomaly_battery_drop_percent: float = 10
+    anomaly_battery_drain_per_minute: float = 2.0
+    anomaly_off_route_m: float = 300
+    anomaly_step_arrival_m: float = 30
+
+    # 任务队列：领取任务后需在租约到期前续约，否则任务可被其他小车重新领取
+    task_lease_seconds: int = 300
+
+    # 路线
+    route_payload_cache_size: int = 1024
+
+    # 增量同步
+    sync_page_size: int = 500
+    # 只返回更新时间早于当前时间减去该值的记录，避免遗漏提交较晚但更新时间较早的事务
+    sync_settle_seconds: float = 2.0
+    sync_tombstone_retention_days: int = 30
+
+    # Redis / 消息广播
+    redis_url: str = "redis://localhost:6379/0"
+    pubsub_backend: str = "local"
+
+    # Celery后台任务
+    celery_task_always_eager: bool = False
+    celery_broker_url: Optional[str] = None
+    celery_result_backend: Optional[str] = None
+    celery_result_expires: int = 86400
+    celery_worker_concurrency: int = 4
+
+    # 响应序列化
+    # 开启后trusted_response跳过response_model校验，由TypeAdapter直接输出JSON字节（默认关闭）；
+    # 仅当使用trusted_response的接口都返回服务层用schema构建的实例（而不是ORM对象或字典），
+    # 且测试在开启和关闭两种配置下都通过时开启
+    skip_trusted_response_validation: bool = False
+
+    # 监控
+    metrics_enabled: bool = True
+    # 查询诊断：慢查询日志和N+1检测
+    query_diagnostics_enabled: bool = False
+    slow_query_threshold_ms: float = 200
+    n_plus_one_threshold: int = 10
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    获取配置（进程内只加载一次，可作为FastAPI依赖注入）
+
+    Returns:
+        Settings: 应用配置
+    """
+    return Settings()
@@ -0,0 +1,150 @@
+# 幂等键
+# 客户端在弱网下重试写请求时携带同一个Idempotency-Key请求头：
+#   首次请求正常处理并保存响应，重试请求直接返回保存的响应（带Idempotent-Replayed头），不再访问数据库或产生副作用
+#   同一幂等键的请求仍在处理中时返回409，请求内容与首次不同时返回422
+#   处理失败（5xx）或被限流/准入拒绝的请求不保存响应，客户端可用同一幂等键重试
+# 幂等键按请求方法、路径和客户端隔离，不同客户端使用相同的键（如自增计数）互不影响：
+#   带Authorization头的请求按该头区分；未认证的请求（如会话初始化）按请求体中的deviceId/userId区分，都没有时按来源IP
+# 作为ASGI中间件实现（位于准入控制之前），只处理携带幂等键的POST/PUT/PATCH/DELETE请求
+import hashlib
+import json
+from typing import List, Optional, Tuple
+from fastapi.responses import ORJSONResponse
+from app.core.config import get_settings
+from app.core.instrumentation import REGISTRY
+from app.utils.idempotency import IdempotencyRecord, get_idempotency_store
+from app.utils.rate_limit import retry_after_header
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# 暂时性的拒绝，重试时应重新处理
+_TRANSIENT_STATUSES = {408, 425, 429}
+# 重放时不沿用的响应头
+_VOLATILE_HEADERS = {b"date", b"server", b"content-length"}
+# 未认证请求中标识客户端的请求体字段
+_CLIENT_FIELDS = ("deviceId", "userId")
+
+IDEMPOTENCY_REQUESTS = REGISTRY.counter(
+    "http_idempotency_requests_total", "携带幂等键的请求数", ("outcome",)
+)
+
+def _digest(*parts: bytes) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(hashlib.sha256(part).digest())
+    return hasher.hexdigest()
+
+def _client_scope(authorization: Optional[bytes], body: bytes, client: Optional[tuple]) -> bytes:
+    """幂等键所属的客户端：Authorization头，其次请求体中的客户端字段，最后来源IP"""
+    if authorization:
+        return b"auth:" + authorization
+    try:
+        payload = json.loads(body) if body else None
+    except (ValueError, UnicodeDecodeError):
+        payload = None
+    if isinstance(payload, dict):
+        fields = [f"{name}={payload[name]}" for name in _CLIENT_FIELDS if payload.get(name) is not None]
+        if fields:
+            return ("body:" + "&".join(fields)).encode("utf-8")
+    return ("ip:" + client[0]).encode("utf-8") if client else b""
+
+def _replay_headers(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[str, str]]:
+    return [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers if name.lower() not in _VOLATILE_HEADERS]
+
+class IdempotencyMiddleware:
+    """按幂等键保存和重放写请求响应的ASGI中间件"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            response = ORJSONResponse({"detail": f"Idempotency-Key长度应为1到{MAX_KEY_LENGTH}个字符"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        # 读取完整请求体用于计算指纹，再原样交给下游
+        body, more_body = b"", True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        key = _digest(
+            scope["method"].encode(), scope["path"].encode(),
+            _client_scope(headers.get(b"authorization"), body, scope.get("client")), idempotency_key
+        )
+        fingerprint = _digest(scope.get("query_string", b""), body)
+        settings = get_settings()
+        store = get_idempotency_store()
+        existing = store.begin(key, fingerprint, settings.idempotency_lock_seconds)
+        if existing is not None:
+            await self._respond_existing(existing, fingerprint, scope, receive, send)
+            return
+
+        status_code, response_headers, chunks = 500, [], []
+
+        async def replay_receive():
+            nonlocal body
+            if body is None:
+                return await receive()
+            message, body = {"type": "http.request", "body": body, "more_body": False}, None
+            return message
+
+        async def capture_send(message):
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code, response_headers = message["status"], message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            store.release(key)
+            raise
+        if status_code >= 500 or status_code in _TRANSIENT_STATUSES:
+            store.release(key)
+            IDEMPOTENCY_REQUESTS.inc(("released",))
+            return
+        record = IdempotencyRecord(fingerprint, status_code, _replay_headers(response_headers), b"".join(chunks))
+        store.complete(key, record, settings.idempotency_ttl_seconds)
+        IDEMPOTENCY_REQUESTS.inc(("stored",))
+
+    async def _respond_existing(self, record: IdempotencyRecord, fingerprint: str, scope, receive, send):
+        """已有记录：重放保存的响应，或返回处理中/内容不一致的错误"""
+        if record.fingerprint != fingerprint:
+            IDEMPOTENCY_REQUESTS.inc(("mismatch",))
+            response = ORJSONResponse({"detail": "Idempotency-Key已用于内容不同的请求"}, status_code=422)
+        elif not record.completed:
+            IDEMPOTENCY_REQUESTS.inc(("in_progress",))
+            response = ORJSONResponse(
+                {"detail": "相同Idempotency-Key的请求正在处理中"},
+                status_code=409,
+                headers={"Retry-After": retry_after_header(get_settings().admission_retry_after_seconds)},
+            )
+        else:
+            IDEMPOTENCY_REQUESTS.inc(("replayed",))
+            await send({
+                "type": "http.response.start",
+                "status": record.status,
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record.headers]
+                + [(b"content-length", str(len(record.body)).encode()), (REPLAYED_HEADER.lower().encode(), b"true")],
+            })
+            await send({"type": "http.response.body", "body": record.body})
+            return
+        await response(scope, receive, send)
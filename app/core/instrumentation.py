@@ -0,0 +1,123 @@
+# 运行时监控
+# 记录每个路由的请求耗时、状态码、并发请求数，以及每个请求的数据库查询次数和耗时
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.metrics import MetricsRegistry
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP请求总数", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP请求耗时(秒)", ("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "正在处理的HTTP请求数"
+)
+DB_QUERIES = REGISTRY.counter(
+    "db_queries_total", "数据库查询总数", ("route",)
+)
+DB_QUERY_DURATION = REGISTRY.counter(
+    "db_query_duration_seconds_total", "数据库查询总耗时(秒)", ("route",)
+)
+HTTP_REQUEST_DB_QUERIES = REGISTRY.histogram(
+    "http_request_db_queries", "单个请求的数据库查询次数", ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+
+# 不在HTTP请求内执行的查询（后台任务、脚本等）使用的路由标签
+BACKGROUND_ROUTE = "background"
+# 未匹配到路由的请求使用的路由标签，避免按原始路径产生过多标签
+UNMATCHED_ROUTE = "unmatched"
+
+class RequestStats:
+    """单个请求的统计信息"""
+
+    __slots__ = ("scope", "query_count", "query_time")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.query_count = 0
+        self.query_time = 0.0
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def route(self) -> str:
+        """匹配到的路由模板（路由匹配前为unmatched）"""
+        route = self.scope.get("route")
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    """
+    获取当前请求的统计信息
+
+    Returns:
+        Optional[RequestStats]: 统计信息，不在HTTP请求内时返回None
+    """
+    return _current_request.get()
+
+class MetricsMiddleware:
+    """记录请求指标的ASGI中间件"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = stats.route
+            labels = (route,)
+            HTTP_REQUESTS.inc((stats.method, route, str(status_code)))
+            HTTP_REQUEST_DURATION.observe((stats.method, route), elapsed)
+            HTTP_REQUEST_DB_QUERIES.observe(labels, stats.query_count)
+            if stats.query_count:
+                DB_QUERIES.inc(labels, stats.query_count)
+                DB_QUERY_DURATION.inc(labels, stats.query_time)
+            _current_request.reset(token)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start_time", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats = _current_request.get()
+    if stats is None:
+        DB_QUERIES.inc((BACKGROUND_ROUTE,))
+        DB_QUERY_DURATION.inc((BACKGROUND_ROUTE,), elapsed)
+    else:
+        stats.query_count += 1
+        stats.query_time += elapsed
@@ -0,0 +1,131 @@
+# 查询诊断
+# 慢查询日志：记录耗时超过阈值的语句（规范化形态）及所在路由
+# N+1检测：同一请求内相同形态的语句执行次数超过阈值时告警（例如在循环中访问懒加载关系）
+# 通过QUERY_DIAGNOSTICS_ENABLED开关，开发和生产环境均可按需开启
+# 请求上下文由QueryDiagnosticsMiddleware设置，不依赖监控中间件（METRICS_ENABLED=false时同样可用）
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import get_settings
+from app.core.instrumentation import BACKGROUND_ROUTE, REGISTRY, UNMATCHED_ROUTE
+from app.utils.sql import normalize_statement
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries_total", "慢查询次数", ("route",)
+)
+REPEATED_STATEMENTS = REGISTRY.counter(
+    "db_repeated_statements_total", "单个请求内执行次数超过阈值的语句形态数（疑似N+1）", ("route",)
+)
+
+class RequestDiagnostics:
+    """单个请求的查询诊断状态"""
+
+    __slots__ = ("scope", "statement_counts")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        # 规范化语句 -> 执行次数
+        self.statement_counts: dict = {}
+
+    @property
+    def route(self) -> str:
+        """匹配到的路由模板（路由匹配前为unmatched）"""
+        route = self.scope.get("route")
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+_current_request: ContextVar[Optional[RequestDiagnostics]] = ContextVar("query_diagnostics_request", default=None)
+
+class QueryDiagnosticsMiddleware:
+    """为每个HTTP请求设置查询诊断上下文的ASGI中间件"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_request.set(RequestDiagnostics(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _diagnose_query(conn, cursor, statement, parameters, context, executemany):
+    settings = get_settings()
+    if not settings.query_diagnostics_enabled:
+        return
+    start = getattr(context, "_query_start_time", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    request = _current_request.get()
+    route = request.route if request is not None else BACKGROUND_ROUTE
+
+    if elapsed_ms >= settings.slow_query_threshold_ms:
+        SLOW_QUERIES.inc((route,))
+        logger.warning(
+            "慢查询 %.1fms route=%s statement=%s",
+            elapsed_ms, route, normalize_statement(statement)
+        )
+
+    if request is None:
+        return
+    shape = normalize_statement(statement)
+    count = request.statement_counts.get(shape, 0) + 1
+    request.statement_counts[shape] = count
+    # 每个请求中每种语句形态只在刚超过阈值时告警一次
+    if count == settings.n_plus_one_threshold + 1:
+        REPEATED_STATEMENTS.inc((route,))
+        logger.warning(
+            "疑似N+1查询: route=%s 同一语句已执行超过%d次 statement=%s",
+            route, settings.n_plus_one_threshold, shape
+        )
+
+class QueryCounter:
+    """
+    统计代码块内执行的SQL语句
+
+    用法:
+        with QueryCounter(engine) as counter:
+            ...
+        assert counter.count <= 3
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine if engine is not None else Engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> dict:
+        """
+        按规范化形态汇总执行次数
+
+        Returns:
+            dict: 语句形态 -> 执行次数
+        """
+        counts = {}
+        for statement in self.statements:
+            shape = normalize_statement(statement)
+            counts[shape] = counts.get(shape, 0) + 1
+        return counts
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "after_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        event.remove(self.engine, "after_cursor_execute", self._record)
+        return None
@@ -1,24 +1,23 @@
 # 安全相关配置
 # 包括JWT认证、密码加密、权限验证等安全功能
+import base64
+import hashlib
+import json
 from datetime import datetime, timedelta
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, Optional, Union
+from cryptography.fernet import Fernet
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.models.user import User
-import os
-from dotenv import load_dotenv
+from app.models.enums import UserRole
+from app.core.config import Settings, get_settings
 from pydantic import BaseModel
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
-
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
@@ -30,6 +29,11 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
+class CarPrincipal(BaseModel):
+    """小车令牌中的小车身份"""
+    car_id: int
+    car_number: str
+
 class UserInDB(BaseModel):
     id: int
     username: str
@@ -42,6 +46,36 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _job_payload_cipher(settings: Settings) -> Fernet:
+    key = settings.job_payload_key or base64.urlsafe_b64encode(
+        hashlib.sha256(("job-payload:" + settings.secret_key).encode("utf-8")).digest()
+    ).decode("ascii")
+    return Fernet(key)
+
+def encrypt_job_payload(data: Any) -> str:
+    """
+    加密后台任务参数（如含明文密码的批量创建用户数据），消息代理和结果后端中只出现密文
+
+    Args:
+        data: 可JSON序列化的参数
+
+    Returns:
+        str: 密文
+    """
+    return _job_payload_cipher(get_settings()).encrypt(json.dumps(data).encode("utf-8")).decode("ascii")
+
+def decrypt_job_payload(token: str) -> Any:
+    """
+    在worker中解密encrypt_job_payload加密的参数
+
+    Args:
+        token: 密文
+
+    Returns:
+        Any: 原始参数
+    """
+    return json.loads(_job_payload_cipher(get_settings()).decrypt(token.encode("ascii")))
+
 def get_user(db: Session, username: str) -> Optional[User]:
     return db.query(User).filter(User.username == username).first()
 
@@ -57,25 +91,50 @@ def authenticate_user(db: Session, username: str, password: str) -> bool | User:
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    settings = get_settings()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now() + expires_delta
     else:
         expire = datetime.now() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+# 小车令牌的typ声明，用户令牌没有该声明
+CAR_TOKEN_TYPE = "car"
+
+def create_car_token(car_id: int, car_number: str, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    签发小车令牌（不访问数据库即可校验，用于高频上报接口）
+
+    Args:
+        car_id: 小车ID
+        car_number: 小车编号
+        expires_delta: 有效期，默认CAR_TOKEN_EXPIRE_DAYS天
+
+    Returns:
+        str: JWT令牌
+    """
+    settings = get_settings()
+    expire = datetime.now() + (expires_delta or timedelta(days=settings.car_token_expire_days))
+    to_encode = {"sub": car_number, "car_id": car_id, "typ": CAR_TOKEN_TYPE, "exp": expire}
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code = status.HTTP_401_UNAUTHORIZED,
         detail = '无效的认证凭据',
         headers = {"WWW-Authenticate": "Bearer"},
     )
+
+def _user_from_token(token: str, db: Session, settings: Settings) -> User:
+    credentials_exception = _credentials_exception()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
-        if username is None:
+        # 小车令牌不能当作用户令牌使用（小车编号可能与用户名相同）
+        if username is None or payload.get("typ") == CAR_TOKEN_TYPE:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
@@ -85,7 +144,76 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return user
 
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    settings: Settings = Depends(get_settings)
+) -> User:
+    return _user_from_token(token, db, settings)
+
+async def get_current_read_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_read_db),
+    settings: Settings = Depends(get_settings)
+) -> User:
+    """只读接口使用：从只读副本加载当前用户（返回的对象不要在主库会话中修改）"""
+    return _user_from_token(token, db, settings)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    if current_user.role != UserRole.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
+    return current_user
+
+async def get_current_car(
+    token: str = Depends(oauth2_scheme),
+    settings: Settings = Depends(get_settings)
+) -> CarPrincipal:
+    """从小车令牌解析小车身份（不访问数据库）"""
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        raise _credentials_exception()
+    if payload.get("typ") != CAR_TOKEN_TYPE or payload.get("sub") is None or payload.get("car_id") is None:
+        raise _credentials_exception()
+    return CarPrincipal(car_id=payload["car_id"], car_number=payload["sub"])
+
+async def get_current_car_or_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    settings: Settings = Depends(get_settings)
+) -> Union[CarPrincipal, User]:
+    """
+    小车和用户都可调用的接口使用：小车令牌返回小车身份（不访问数据库），用户令牌返回当前激活用户
+
+    调用方根据返回类型分别校验小车和用户的权限
+    """
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        raise _credentials_exception()
+    if payload.get("typ") == CAR_TOKEN_TYPE:
+        return await get_current_car(token, settings)
+    return await get_current_active_user(_user_from_token(token, db, settings))
+
+def car_path_guard(name: str):
+    """
+    创建校验路径参数属于当前小车的依赖，例如car_id、car_number
+
+    放在准入控制之前，未认证的请求不会消耗该小车的限流额度
+
+    Args:
+        name: 路径参数名（同CarPrincipal的字段名）
+
+    Returns:
+        依赖函数：返回当前小车，路径参数不属于该小车时抛出403
+    """
+    async def dependency(request: Request, car: CarPrincipal = Depends(get_current_car)) -> CarPrincipal:
+        if request.path_params.get(name) != str(getattr(car, name)):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只能上报本车数据")
+        return car
+    return dependency
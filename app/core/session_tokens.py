@@ -0,0 +1,166 @@
+# 无状态会话令牌
+# SESSION_TOKEN_MODE开启后，会话初始化返回签名令牌（携带会话ID、用户ID、设备ID和过期时间）代替随机会话ID，
+# 校验会话时只需验签并查询进程内的吊销列表，不访问数据库
+# 终止会话时将会话ID写入吊销列表并通过消息代理广播到所有工作进程；吊销记录在令牌过期后自动清除
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+from jose import JWTError, jwt
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from app.core.config import Settings, get_settings
+from app.models.session import UserSession
+from app.utils.pubsub import Broker, get_broker
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "session-revocations"
+SESSION_TOKEN_TYPE = "session"
+
+@dataclass(frozen=True)
+class SessionClaims:
+    """会话令牌中携带的信息"""
+    session_id: str
+    user_id: int
+    device_id: str
+    expires_at: float
+
+def is_session_token(value: str) -> bool:
+    """判断会话标识是签名令牌还是旧式随机会话ID"""
+    return value.count(".") == 2
+
+def issue_session_token(session_id: str, user_id: int, device_id: str, expires_at: datetime, settings: Optional[Settings] = None) -> str:
+    """
+    签发会话令牌
+
+    Args:
+        session_id: 数据库中的会话ID
+        user_id: 用户ID
+        device_id: 设备ID
+        expires_at: 过期时间（与数据库中会话的过期时间一致）
+        settings: 应用配置
+
+    Returns:
+        str: 签名令牌
+    """
+    settings = settings or get_settings()
+    claims = {
+        "typ": SESSION_TOKEN_TYPE,
+        "sid": session_id,
+        "uid": user_id,
+        "did": device_id,
+        "exp": int(expires_at.timestamp()),
+    }
+    return jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)
+
+def decode_session_token(token: str, settings: Optional[Settings] = None, verify_exp: bool = True) -> Optional[SessionClaims]:
+    """
+    验签并解析会话令牌
+
+    Args:
+        token: 会话令牌
+        settings: 应用配置
+        verify_exp: 是否校验过期时间（终止已过期的会话时不需要）
+
+    Returns:
+        Optional[SessionClaims]: 令牌信息，签名无效、已过期或不是会话令牌时返回None
+    """
+    settings = settings or get_settings()
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm], options={"verify_exp": verify_exp})
+    except JWTError:
+        return None
+    if payload.get("typ") != SESSION_TOKEN_TYPE:
+        return None
+    return SessionClaims(session_id=payload["sid"], user_id=payload["uid"], device_id=payload["did"], expires_at=payload["exp"])
+
+class RevocationList:
+    """已吊销会话的进程内列表，会话ID -> 令牌过期时间（时间戳），过期的记录定期清除"""
+
+    # 两次清除过期记录之间的最短间隔（秒）
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, broker: Broker):
+        """
+        初始化吊销列表
+
+        Args:
+            broker: 用于在工作进程间同步吊销记录的消息代理
+        """
+        self.broker = broker
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._next_prune = 0.0
+        broker.subscribe(REVOCATION_CHANNEL, self._receive)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def ensure_loaded(self, db: Session):
+        """
+        首次使用时从数据库加载仍在有效期内的已终止会话，覆盖本进程启动前发生的吊销
+
+        Args:
+            db: 数据库会话
+        """
+        if self._loaded:
+            return
+        rows = db.query(UserSession.session_id, UserSession.expires_at).filter(
+            and_(UserSession.is_active == False, UserSession.expires_at > datetime.now())
+        ).all()
+        with self._lock:
+            for session_id, expires_at in rows:
+                self._revoked.setdefault(session_id, expires_at.timestamp())
+            self._loaded = True
+
+    def revoke(self, session_id: str, expires_at: datetime):
+        """
+        吊销会话并广播到其他工作进程（应在数据库事务提交之后调用）
+
+        广播失败（如Redis不可用）只记录日志：会话已在数据库中终止，本进程立即生效，
+        其他工作进程在令牌过期前仍可能放行该令牌，但不应让已成功的终止请求返回错误
+
+        Args:
+            session_id: 会话ID
+            expires_at: 会话令牌的过期时间，之后无需再保留吊销记录
+        """
+        message = {"session_id": session_id, "expires_at": expires_at.timestamp()}
+        # 先写入本进程，不等待消息代理回传
+        self._receive(message)
+        try:
+            self.broker.publish(REVOCATION_CHANNEL, message)
+        except Exception:
+            logger.exception("广播会话吊销失败，其他工作进程在令牌过期前可能仍接受该会话: %s", session_id)
+
+    def is_revoked(self, session_id: str) -> bool:
+        """判断会话是否已吊销"""
+        return session_id in self._revoked
+
+    def _receive(self, message: dict):
+        now = time.time()
+        with self._lock:
+            self._revoked[message["session_id"]] = message["expires_at"]
+            if now >= self._next_prune:
+                self._revoked = {sid: exp for sid, exp in self._revoked.items() if exp > now}
+                self._next_prune = now + self.PRUNE_INTERVAL
+
+_revocation_list: Optional[RevocationList] = None
+_revocation_list_lock = threading.Lock()
+
+def get_revocation_list() -> RevocationList:
+    """
+    获取进程内吊销列表单例
+
+    Returns:
+        RevocationList: 吊销列表
+    """
+    global _revocation_list
+    if _revocation_list is None:
+        with _revocation_list_lock:
+            if _revocation_list is None:
+                _revocation_list = RevocationList(get_broker())
+    return _revocation_list
@@ -1,19 +1,84 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import threading
+from typing import Optional
+from app.core.config import get_settings
 
 Base = declarative_base()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+class _LazySessionmaker(sessionmaker):
+    """首次创建会话时才创建数据库引擎的sessionmaker"""
+
+    def __call__(self, **local_kw):
+        # sessionmaker默认在kw中保存bind=None，需按值判断
+        if self.kw.get("bind") is None and local_kw.get("bind") is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+def create_db_engine(url: str) -> Engine:
+    """
+    按配置创建数据库引擎（SQLite不使用连接池参数）
+
+    Args:
+        url: 数据库连接URL
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    settings = get_settings()
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_engine(url)
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+
+def get_engine() -> Engine:
+    """
+    获取数据库引擎，首次调用时创建（导入模块不会连接数据库）
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                database_url = get_settings().database_url
+                if not database_url:
+                    raise RuntimeError("未配置DATABASE_URL")
+                _engine = create_db_engine(database_url)
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+def dispose_engine():
+    """释放连接池（应用关闭时调用）"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            SessionLocal.kw.pop("bind", None)
+
+def __getattr__(name):
+    # 兼容旧代码中的 from app.db.database import engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
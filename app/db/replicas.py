@@ -0,0 +1,273 @@
+# 只读副本路由
+# 只读接口通过get_read_db获取数据库会话：
+#   配置DATABASE_REPLICA_URLS后轮流使用各副本；副本延迟超过REPLICA_MAX_LAG_SECONDS或检测失败时回退到主库
+#   同一客户端写请求后READ_YOUR_WRITES_SECONDS内的读请求走主库（读己之写）：写请求按Authorization头和来源IP各记录一次，
+#   读请求匹配其中任一即可，未认证的写请求（注册、登录）之后带令牌的读请求同样走主库
+# 写请求由ReadYourWritesMiddleware在处理前后各记录一次，不经过ORM刷新的批量UPDATE同样覆盖
+# 会写数据库的接口（如校验会话时标记过期）和结果被缓存的接口（副本的旧数据会回填缓存）仍使用get_db
+import hashlib
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Iterable, List, Optional
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.core.config import Settings, get_settings
+from app.core.instrumentation import REGISTRY
+from app.db.database import SessionLocal, create_db_engine
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# PostgreSQL备库的回放延迟（秒）：已回放全部收到的WAL时为0（主库空闲时回放时间戳不再前进，不能直接相减）
+_PG_REPLICA_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+READ_ROUTING = REGISTRY.counter(
+    "db_read_routing_total", "只读会话的路由结果", ("target", "reason")
+)
+
+def client_keys(authorization: Optional[str], host: Optional[str]) -> List[str]:
+    """
+    读己之写的客户端标识：Authorization头和来源IP各一个
+
+    Args:
+        authorization: Authorization请求头
+        host: 客户端IP
+
+    Returns:
+        List[str]: 客户端标识，无法识别时为空
+    """
+    keys = []
+    if authorization:
+        keys.append("auth:" + hashlib.sha256(authorization.encode("utf-8")).hexdigest())
+    if host:
+        keys.append("ip:" + host)
+    return keys
+
+class RecentWrites:
+    """最近有写请求的客户端记录基类"""
+
+    def mark(self, key: str, seconds: float):
+        """
+        记录客户端的写请求
+
+        Args:
+            key: 客户端标识
+            seconds: 读己之写的时间窗口
+        """
+        raise NotImplementedError
+
+    def is_recent(self, key: str) -> bool:
+        """
+        客户端是否在时间窗口内有写请求
+
+        Args:
+            key: 客户端标识
+
+        Returns:
+            bool: 是否有最近的写请求
+        """
+        raise NotImplementedError
+
+class LocalRecentWrites(RecentWrites):
+    """进程内记录，单进程部署或客户端固定路由到同一工作进程时使用"""
+
+    def __init__(self, maxsize: int = 100000):
+        self._expires = LRUCache(maxsize)
+
+    def mark(self, key: str, seconds: float):
+        self._expires.set(key, time.monotonic() + seconds)
+
+    def is_recent(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+
+class RedisRecentWrites(RecentWrites):
+    """基于Redis的共享记录，写请求和随后的读请求落到不同工作进程时也能识别"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "recent-write:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url or get_settings().redis_url)
+        self._prefix = prefix
+
+    def mark(self, key: str, seconds: float):
+        self._redis.set(self._prefix + key, 1, px=int(seconds * 1000))
+
+    def is_recent(self, key: str) -> bool:
+        return bool(self._redis.exists(self._prefix + key))
+
+class ReplicaLagMonitor:
+    """副本延迟检测，结果缓存REPLICA_LAG_CHECK_INTERVAL_SECONDS，同一时刻只有一个线程检测"""
+
+    def __init__(self, engine: Engine, settings: Optional[Settings] = None):
+        """
+        初始化检测器
+
+        Args:
+            engine: 副本数据库引擎
+            settings: 应用配置，默认使用全局配置
+        """
+        self.engine = engine
+        self.settings = settings or get_settings()
+        self._lag = math.inf
+        self._checked_at = -math.inf
+        self._lock = threading.Lock()
+
+    def lag_seconds(self) -> float:
+        """
+        副本延迟（秒），检测失败时为无穷大
+
+        Returns:
+            float: 延迟秒数
+        """
+        if time.monotonic() - self._checked_at < self.settings.replica_lag_check_interval_seconds:
+            return self._lag
+        # 其他线程正在检测时直接使用上一次的结果
+        if not self._lock.acquire(blocking=False):
+            return self._lag
+        try:
+            self._lag = self._measure()
+        except Exception:
+            logger.warning("检测副本%s的延迟失败，回退到主库", self.engine.url.render_as_string(hide_password=True), exc_info=True)
+            self._lag = math.inf
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+        return self._lag
+
+    def _measure(self) -> float:
+        if self.engine.url.get_backend_name() != "postgresql":
+            return 0.0
+        with self.engine.connect() as conn:
+            return float(conn.scalar(_PG_REPLICA_LAG))
+
+class ReplicaRouter:
+    """为只读会话选择副本或主库"""
+
+    def __init__(self, replicas: List[Engine], settings: Optional[Settings] = None, recent_writes: Optional[RecentWrites] = None):
+        """
+        初始化路由
+
+        Args:
+            replicas: 副本数据库引擎
+            settings: 应用配置，默认使用全局配置
+            recent_writes: 最近写请求记录，默认按READ_YOUR_WRITES_BACKEND创建
+        """
+        self.settings = settings or get_settings()
+        self.monitors = [ReplicaLagMonitor(engine, self.settings) for engine in replicas]
+        self._next = itertools.cycle(self.monitors)
+        self._next_lock = threading.Lock()
+        if recent_writes is None:
+            recent_writes = RedisRecentWrites() if self.settings.read_your_writes_backend == "redis" else LocalRecentWrites()
+        self.recent_writes = recent_writes
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了副本"""
+        return bool(self.monitors)
+
+    def mark_write(self, keys: Iterable[str]):
+        """
+        记录客户端的写请求
+
+        Args:
+            keys: 客户端标识
+        """
+        if self.enabled:
+            for key in keys:
+                self.recent_writes.mark(key, self.settings.read_your_writes_seconds)
+
+    def choose(self, keys: Iterable[str]) -> Optional[Engine]:
+        """
+        选择只读会话使用的引擎
+
+        Args:
+            keys: 客户端标识，其中任一最近有写请求时使用主库
+
+        Returns:
+            Optional[Engine]: 副本引擎，应使用主库时返回None
+        """
+        if not self.enabled:
+            return None
+        if any(self.recent_writes.is_recent(key) for key in keys):
+            READ_ROUTING.inc(("primary", "read_your_writes"))
+            return None
+        for _ in range(len(self.monitors)):
+            with self._next_lock:
+                monitor = next(self._next)
+            if monitor.lag_seconds() <= self.settings.replica_max_lag_seconds:
+                READ_ROUTING.inc(("replica", "ok"))
+                return monitor.engine
+        READ_ROUTING.inc(("primary", "replica_lag"))
+        return None
+
+    def dispose(self):
+        """释放副本连接池"""
+        for monitor in self.monitors:
+            monitor.engine.dispose()
+
+_router: Optional[ReplicaRouter] = None
+_router_lock = threading.Lock()
+
+def get_replica_router() -> ReplicaRouter:
+    """
+    获取按DATABASE_REPLICA_URLS创建的副本路由（进程内单例，首次调用时创建副本引擎）
+
+    Returns:
+        ReplicaRouter: 副本路由
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                urls = [url.strip() for url in (get_settings().database_replica_urls or "").split(",") if url.strip()]
+                _router = ReplicaRouter([create_db_engine(url) for url in urls])
+    return _router
+
+def dispose_replicas():
+    """释放副本连接池（应用关闭时调用）"""
+    global _router
+    with _router_lock:
+        if _router is not None:
+            _router.dispose()
+            _router = None
+
+def get_read_db(request: Request):
+    """只读接口的数据库会话依赖：按副本延迟和读己之写选择副本或主库"""
+    engine = get_replica_router().choose(client_keys(request.headers.get("authorization"), request.client.host if request.client else None))
+    db = SessionLocal(bind=engine) if engine is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+class ReadYourWritesMiddleware:
+    """在写请求处理前后记录客户端，使其随后的读请求走主库"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization")
+        client = scope.get("client")
+        keys = client_keys(authorization.decode("latin-1") if authorization else None, client[0] if client else None)
+        router = get_replica_router()
+        # 处理前记录：响应发出后、处理结束前到达的读请求同样走主库
+        router.mark_write(keys)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            router.mark_write(keys)
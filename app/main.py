@@ -1,12 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api import router as api_router
-from app.db.database import engine
+from app.core.config import get_settings
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.instrumentation import MetricsMiddleware
+from app.core.query_diagnostics import QueryDiagnosticsMiddleware  # 导入时注册慢查询/N+1检测监听器
+from app.db.database import SessionLocal, get_engine, dispose_engine
+from app.db.replicas import ReadYourWritesMiddleware, dispose_replicas
 import app.models as models
+from app.services.car_position_service import get_position_coalescer
+from app.services.invalidation_service import invalidation_bus
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：导入时不连接数据库，启动/关闭阶段完成初始化和资源释放"""
+    # 启动阶段按模型创建缺失的表（默认关闭，生产环境由迁移脚本管理表结构）
+    if get_settings().db_create_tables_on_startup:
+        models.Base.metadata.create_all(bind=get_engine())
+    # 订阅其他工作进程广播的缓存失效
+    invalidation_bus.connect()
+    get_position_coalescer().start(SessionLocal)
+    yield
+    # 先写回内存中合并的小车位置，再释放连接池
+    get_position_coalescer().stop()
+    dispose_engine()
+    dispose_replicas()
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,4 +38,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 配置只读副本时记录写请求的客户端，保证其随后的读请求走主库
+if get_settings().database_replica_urls:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# 重放的响应不进入路由和准入控制
+app.add_middleware(IdempotencyMiddleware)
+
+# 查询诊断的请求上下文（是否诊断由QUERY_DIAGNOSTICS_ENABLED在执行查询时判断）
+app.add_middleware(QueryDiagnosticsMiddleware)
+
+# 最外层中间件，覆盖完整的请求处理耗时
+if get_settings().metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router)
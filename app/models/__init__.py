@@ -8,6 +8,10 @@ from .express import Express
 from .route import Route, RouteStep
 from .appointment import Appointment
 from .car_log import CarLog
+from .geocode_cache import GeocodeCache
+from .announcement import Announcement
+from .sync_tombstone import SyncTombstone
+from .dashboard_counter import DashboardCounter
 from .enums import UserRole, TaskStatus, ExpressStatus, CarTaskStatus, AppointmentStatus
 
 __all__ = [
@@ -22,6 +26,10 @@ __all__ = [
     'RouteStep',
     'Appointment',
     'CarLog',
+    'GeocodeCache',
+    'Announcement',
+    'SyncTombstone',
+    'DashboardCounter',
     'UserRole',
     'TaskStatus', 
     'ExpressStatus',
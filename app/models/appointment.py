@@ -1,12 +1,13 @@
 from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 from app.models.enums import AppointmentStatus
 from app.models.base import BaseModel
 
 class Appointment(BaseModel):
     __tablename__ = 'appointments'
 
-    customer_id = Column(Integer, ForeignKey('users.id'), nullable=False, comment='客户ID')
+    # 所属用户变化时同步服务为原用户写入墓碑，需要修改前的值（属性已过期时同样加载）
+    customer_id = column_property(Column(Integer, ForeignKey('users.id'), nullable=False, comment='客户ID'), active_history=True)
     express_tracking_number = Column(String(100), ForeignKey('express.tracking_number'), nullable=False, comment='对应快递单号')
     appointment_time = Column(DateTime, nullable=False, comment='预约时间')
     status = Column(Enum(AppointmentStatus), default=AppointmentStatus.scheduled, comment='预约状态')
@@ -9,4 +9,5 @@ class BaseModel(Base):
     
     id = Column(Integer, primary_key=True, index=True, comment='主键ID')
     created_at = Column(DateTime, default=datetime.now, comment='创建时间')
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment='更新时间')
\ No newline at end of file
+    # 增量同步按(updated_at, id)游标读取变更，需要索引
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, index=True, comment='更新时间')
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Boolean, Float, ForeignKey, Integer, Enum, String
 
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 from app.models.enums import CarTaskStatus
 from app.models.base import BaseModel
 
@@ -8,7 +8,8 @@ class Car(BaseModel):
     __tablename__ = 'cars'
 
     car_number = Column(String(50), unique=True, nullable=False, comment='小车编号')
-    task_status = Column(Enum(CarTaskStatus), default=CarTaskStatus.idle, comment='任务状态')
+    # 看板计数根据状态字段的新旧值计算增量：修改前先加载旧值（属性已过期时同样如此）
+    task_status = column_property(Column(Enum(CarTaskStatus), default=CarTaskStatus.idle, comment='任务状态'), active_history=True)
     current_task_id = Column(Integer, ForeignKey('tasks.id'), nullable=True, comment='当前任务ID')
     current_speed = Column(Float, default=0.0, comment='当前速度(km/h)')
     current_latitude = Column(Float, nullable=True, comment='当前纬度')
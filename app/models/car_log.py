@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Integer, Enum
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Integer, Enum, Index
 from sqlalchemy.orm import relationship
 from app.models.enums import CarTaskStatus
 from datetime import datetime
@@ -6,6 +6,10 @@ from app.models.base import BaseModel
 
 class CarLog(BaseModel):
     __tablename__ = 'car_logs'
+    __table_args__ = (
+        # 按小车和时间范围查询日志（轨迹、汇总）
+        Index('ix_car_logs_car_id_logged_at', 'car_id', 'logged_at'),
+    )
 
     car_id = Column(Integer, ForeignKey('cars.id'), nullable=False, comment='小车编号')
     logged_at = Column(DateTime, default = datetime.now, comment='记录时间')
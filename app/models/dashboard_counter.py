@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from app.models.base import BaseModel
+
+class DashboardCounter(BaseModel):
+    """运营看板计数（按状态分组的记录数），随状态变更在同一事务内增减，由对账任务定期校正"""
+    __tablename__ = 'dashboard_counters'
+    __table_args__ = (UniqueConstraint('metric', 'bucket', name='uq_dashboard_counters_metric_bucket'),)
+
+    metric = Column(String(50), nullable=False, comment='指标（tasks/express/cars/sessions）')
+    bucket = Column(String(50), nullable=False, comment='分组（状态值）')
+    value = Column(Integer, nullable=False, default=0, comment='计数')
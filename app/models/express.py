@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, Integer, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, ForeignKey, Integer, Enum, JSON, Float, DateTime
+from sqlalchemy.orm import column_property, relationship
 from app.models.enums import ExpressStatus
 from app.models.base import BaseModel
 
@@ -11,13 +11,19 @@ class Express(BaseModel):
     recipient_address = Column(JSON, nullable=False, comment='收件人地址')
     tracking_number = Column(String(100), unique=True, nullable=False, comment='快递单号')
     pickup_code = Column(String(20), nullable=True, comment='取件码')
-    recipient_user_id = Column(Integer, ForeignKey('users.id'), nullable=False, comment='收件人用户ID')
-    status = Column(Enum(ExpressStatus), default=ExpressStatus.unassigned, comment='快递状态')
+    # 所属用户变化时同步服务为原用户写入墓碑，需要修改前的值（属性已过期时同样加载）
+    recipient_user_id = column_property(Column(Integer, ForeignKey('users.id'), nullable=False, comment='收件人用户ID'), active_history=True)
+    # 看板计数根据状态字段的新旧值计算增量：修改前先加载旧值（属性已过期时同样如此）
+    status = column_property(Column(Enum(ExpressStatus), default=ExpressStatus.unassigned, comment='快递状态'), active_history=True)
     station_name = Column(String(200), nullable=True, comment='所属驿站名称')
     station_address = Column(String(500), nullable=True, comment='驿站地址')
     task_id = Column(Integer, ForeignKey('tasks.id'), nullable=True, comment='对应配送任务ID')
+    recipient_latitude = Column(Float, nullable=True, comment='收件地址纬度')
+    recipient_longitude = Column(Float, nullable=True, comment='收件地址经度')
+    address_hash = Column(String(64), nullable=True, index=True, comment='规范化收件地址哈希')
+    geocoded_at = Column(DateTime, nullable=True, comment='最近一次地理编码时间（无法解析时同样记录）')
 
-    task = relationship('Task', back_populates='express_items')
+    task = relationship('Task', back_populates='express_item')
     appointment = relationship('Appointment', back_populates='express', uselist=False)
     route_steps = relationship('RouteStep', back_populates='express')
     recipient_user = relationship('User', back_populates='express_items', foreign_keys=[recipient_user_id])
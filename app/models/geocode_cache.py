@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Float
+from app.models.base import BaseModel
+
+class GeocodeCache(BaseModel):
+    __tablename__ = 'geocode_cache'
+
+    address_hash = Column(String(64), unique=True, index=True, nullable=False, comment='规范化地址哈希')
+    normalized_address = Column(String(500), nullable=False, comment='规范化地址')
+    latitude = Column(Float, nullable=False, comment='纬度')
+    longitude = Column(Float, nullable=False, comment='经度')
+    provider = Column(String(50), nullable=True, comment='地理编码服务提供方')
@@ -0,0 +1,11 @@
+from sqlalchemy import Boolean, Column, Integer, String
+from app.models.base import BaseModel
+
+class SyncTombstone(BaseModel):
+    """已删除记录的墓碑，供增量同步接口通知客户端删除本地数据"""
+    __tablename__ = 'sync_tombstones'
+
+    entity = Column(String(50), nullable=False, comment='实体类型（同步接口中的集合名）')
+    entity_id = Column(Integer, nullable=False, comment='被删除记录的ID')
+    owner_user_id = Column(Integer, nullable=True, index=True, comment='记录所属用户ID（按用户过滤同步数据）')
+    owner_only = Column(Boolean, nullable=False, default=False, comment='仅通知原所属用户：记录转给了其他用户，并未删除')
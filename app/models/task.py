@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index, Integer, Enum
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 from app.models.enums import TaskStatus
 from app.models.base import BaseModel
@@ -7,13 +7,17 @@ from app.models.base import BaseModel
 
 class Task(BaseModel):
     __tablename__ = 'tasks'
+    # 任务队列按状态领取待处理任务、查找租约到期的任务
+    __table_args__ = (Index('ix_tasks_status_lease', 'status', 'lease_expires_at'),)
 
-    status = Column(Enum(TaskStatus), default=TaskStatus.pending, comment='任务状态')
+    # 看板计数根据状态字段的新旧值计算增量：修改前先加载旧值（属性已过期时同样如此）
+    status = column_property(Column(Enum(TaskStatus), default=TaskStatus.pending, comment='任务状态'), active_history=True)
     assigned_car_number = Column(String(50), ForeignKey('cars.car_number'), nullable=True, comment='分配的小车编号')
 
     expected_completion_time = Column(DateTime(timezone=True), nullable=True, comment='任务预计完成时间')
     completed_at = Column(DateTime(timezone=True), nullable=True, comment='任务完成时间')
     route_id = Column(Integer, ForeignKey('routes.id'), nullable=True, comment='路线ID')
+    lease_expires_at = Column(DateTime, nullable=True, comment='领取租约到期时间，到期未续约的任务可被重新领取')
     assigned_car = relationship('Car', foreign_keys=[assigned_car_number], back_populates='assigned_tasks')
     route = relationship('Route', back_populates='tasks')
     express_item = relationship('Express', back_populates='task', uselist = False)
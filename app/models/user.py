@@ -17,3 +17,4 @@ class User(BaseModel):
 
     appointments = relationship('Appointment', back_populates='customer')
     express_items = relationship('Express', back_populates='recipient_user', foreign_keys='Express.recipient_user_id')
+    sessions = relationship('UserSession', back_populates='user')
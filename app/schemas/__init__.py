@@ -1,4 +1,10 @@
 # 导出模型schemas
+from .announcement import (
+    AnnouncementBase,
+    AnnouncementCreate,
+    AnnouncementUpdate,
+    AnnouncementResponse,
+)
 from .appointment import (
     AppointmentBase,
     AppointmentCreate,
@@ -13,6 +19,8 @@ from .express import (
     ExpressUpdate,
     ExpressResponse,
     ExpressStatusUpdate,
+    ExpressImportItem,
+    ExpressImportResult,
 )
 from .car import (
     CarBase,
@@ -21,6 +29,7 @@ from .car import (
     CarResponse,
     CarLocationUpdate,
     CarStatusUpdate,
+    CarTelemetry,
 )
 from .car_log import (
     CarLogBase,
@@ -28,6 +37,9 @@ from .car_log import (
     CarLogResponse,
     CarLogQuery,
     CarLogSummary,
+    CarTrackPoint,
+    CarTrackResponse,
+    CarTrackEncodedResponse,
 )
 from .route import (
     RouteBase,
@@ -39,6 +51,9 @@ from .route import (
     RouteStepUpdate,
     RouteStepResponse,
     RouteWithStepsResponse,
+    RouteStepDetailResponse,
+    RouteGeometry,
+    RouteDetailResponse,
 )
 from .task import (
     TaskBase,
@@ -46,6 +61,7 @@ from .task import (
     TaskUpdate,
     TaskResponse,
     TaskStatusUpdate,
+    TaskClaimRequest,
 )
 from .user import (
     UserBase,
@@ -53,6 +69,8 @@ from .user import (
     UserUpdate,
     UserLogin,
     UserResponse,
+    UserProvisionRowResult,
+    UserProvisionResult,
 )
 from .session import (
     SessionBase,
@@ -71,8 +89,26 @@ from .session import (
     SessionUpdate,
     SessionFullResponse,
 )
+from .job import (
+    JobSubmitResponse,
+    JobProgress,
+    JobStatusResponse,
+    CarLogRollupRequest,
+)
+from .dashboard import (
+    DashboardCountersResponse,
+)
+from .sync import (
+    SyncDeletion,
+    SyncChangesResponse,
+)
 
 __all__ = [
+    # Announcement schemas
+    "AnnouncementBase",
+    "AnnouncementCreate",
+    "AnnouncementUpdate",
+    "AnnouncementResponse",
     # Appointment schemas
     "AppointmentBase",
     "AppointmentCreate",
@@ -86,6 +122,8 @@ __all__ = [
     "ExpressUpdate",
     "ExpressResponse",
     "ExpressStatusUpdate",
+    "ExpressImportItem",
+    "ExpressImportResult",
     # Car schemas
     "CarBase",
     "CarCreate",
@@ -93,12 +131,16 @@ __all__ = [
     "CarResponse",
     "CarLocationUpdate",
     "CarStatusUpdate",
+    "CarTelemetry",
     # CarLog schemas
     "CarLogBase",
     "CarLogCreate",
     "CarLogResponse",
     "CarLogQuery",
     "CarLogSummary",
+    "CarTrackPoint",
+    "CarTrackResponse",
+    "CarTrackEncodedResponse",
     # Route schemas
     "RouteBase",
     "RouteCreate",
@@ -109,18 +151,24 @@ __all__ = [
     "RouteStepUpdate",
     "RouteStepResponse",
     "RouteWithStepsResponse",
+    "RouteStepDetailResponse",
+    "RouteGeometry",
+    "RouteDetailResponse",
     # Task schemas
     "TaskBase",
     "TaskCreate",
     "TaskUpdate",
     "TaskResponse",
     "TaskStatusUpdate",
+    "TaskClaimRequest",
     # User schemas
     "UserBase",
     "UserCreate",
     "UserUpdate",
     "UserLogin",
     "UserResponse",
+    "UserProvisionRowResult",
+    "UserProvisionResult",
     # Session schemas
     "SessionBase",
     "SessionInitializeRequest",
@@ -137,4 +185,14 @@ __all__ = [
     "SessionCreate",
     "SessionUpdate",
     "SessionFullResponse",
-]
\ No newline at end of file
+    # Job schemas
+    "JobSubmitResponse",
+    "JobProgress",
+    "JobStatusResponse",
+    "CarLogRollupRequest",
+    # Dashboard schemas
+    "DashboardCountersResponse",
+    # Sync schemas
+    "SyncDeletion",
+    "SyncChangesResponse",
+]
@@ -0,0 +1,54 @@
+# 预构建的TypeAdapter
+# TypeAdapter构建时会编译校验器和序列化器，模块级复用可避免每次请求重复构建
+from functools import lru_cache
+from typing import List, Type
+from pydantic import BaseModel, TypeAdapter
+from .announcement import AnnouncementResponse
+from .appointment import AppointmentResponse
+from .car import CarResponse
+from .car_log import CarLogResponse
+from .express import ExpressResponse
+from .route import RouteResponse, RouteStepResponse, RouteWithStepsResponse
+from .session import SessionResponse
+from .task import TaskResponse
+from .user import UserResponse
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """
+    获取List[schema]的TypeAdapter（按schema缓存）
+
+    Args:
+        schema: Pydantic模型类
+
+    Returns:
+        TypeAdapter: 列表类型适配器
+    """
+    return TypeAdapter(List[schema])
+
+AnnouncementListAdapter = list_adapter(AnnouncementResponse)
+AppointmentListAdapter = list_adapter(AppointmentResponse)
+CarListAdapter = list_adapter(CarResponse)
+CarLogListAdapter = list_adapter(CarLogResponse)
+ExpressListAdapter = list_adapter(ExpressResponse)
+RouteListAdapter = list_adapter(RouteResponse)
+RouteStepListAdapter = list_adapter(RouteStepResponse)
+RouteWithStepsListAdapter = list_adapter(RouteWithStepsResponse)
+SessionListAdapter = list_adapter(SessionResponse)
+TaskListAdapter = list_adapter(TaskResponse)
+UserListAdapter = list_adapter(UserResponse)
+
+__all__ = [
+    "list_adapter",
+    "AnnouncementListAdapter",
+    "AppointmentListAdapter",
+    "CarListAdapter",
+    "CarLogListAdapter",
+    "ExpressListAdapter",
+    "RouteListAdapter",
+    "RouteStepListAdapter",
+    "RouteWithStepsListAdapter",
+    "SessionListAdapter",
+    "TaskListAdapter",
+    "UserListAdapter",
+]
@@ -57,4 +57,12 @@ class CarStatusUpdate(BaseModel):
     task_status: CarTaskStatus = Field(..., description="任务状态")
     current_task_id: Optional[int] = Field(None, description="当前任务ID")
     battery_level: Optional[float] = Field(None, ge=0, le=100, description="电量百分比")
-    running_time: Optional[int] = Field(None, ge=0, description="已经运行时间(分钟)")
\ No newline at end of file
+    running_time: Optional[int] = Field(None, ge=0, description="已经运行时间(分钟)")
+class CarTelemetry(BaseModel):
+    """小车遥测上报schema"""
+    current_latitude: float = Field(..., ge=-90, le=90, description="当前纬度")
+    current_longitude: float = Field(..., ge=-180, le=180, description="当前经度")
+    current_speed: float = Field(default=0.0, ge=0, description="当前速度(km/h)")
+    battery_level: float = Field(..., ge=0, le=100, description="电量百分比")
+    task_status: Optional[CarTaskStatus] = Field(None, description="任务状态，不传则保持不变")
+    running_time: Optional[int] = Field(None, ge=0, description="已经运行时间(分钟)")
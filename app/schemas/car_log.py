@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from app.models.enums import CarTaskStatus
 
 class CarLogBase(BaseModel):
@@ -58,4 +58,24 @@ class CarLogSummary(BaseModel):
     average_speed: float = Field(..., description="平均速度(km/h)")
     min_battery_level: float = Field(..., description="最低电量百分比")
     max_battery_level: float = Field(..., description="最高电量百分比")
-    status_distribution: dict = Field(..., description="状态分布统计")
\ No newline at end of file
+    status_distribution: dict = Field(..., description="状态分布统计")
+
+class CarTrackPoint(BaseModel):
+    """小车轨迹点schema"""
+    latitude: float = Field(..., description="纬度")
+    longitude: float = Field(..., description="经度")
+    logged_at: datetime = Field(..., description="记录时间")
+
+class CarTrackResponse(BaseModel):
+    """小车轨迹响应schema"""
+    car_id: int = Field(..., description="小车ID")
+    points: List[CarTrackPoint] = Field(default=[], description="按时间排序的轨迹点")
+
+class CarTrackEncodedResponse(BaseModel):
+    """折线编码的小车轨迹响应schema"""
+    car_id: int = Field(..., description="小车ID")
+    encoding: str = Field(default="polyline", description="编码方式")
+    precision: int = Field(..., description="坐标小数精度")
+    polyline: str = Field(..., description="按时间顺序编码的轨迹折线")
+    start_time: Optional[datetime] = Field(None, description="第一个轨迹点的记录时间")
+    time_offsets: List[int] = Field(default=[], description="各轨迹点相对start_time的秒数")
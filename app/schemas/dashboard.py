@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+class DashboardCountersResponse(BaseModel):
+    """运营看板计数schema"""
+    tasks: Dict[str, int] = Field(..., description="按任务状态统计的任务数")
+    express: Dict[str, int] = Field(..., description="按快递状态统计的快递数")
+    cars: Dict[str, int] = Field(..., description="按小车任务状态统计的小车数")
+    active_sessions: int = Field(..., description="活跃会话数")
@@ -38,6 +38,8 @@ class ExpressUpdate(BaseModel):
 class ExpressResponse(ExpressBase):
     """快递响应schema"""
     id: int = Field(..., description="快递ID")
+    recipient_latitude: Optional[float] = Field(None, ge=-90, le=90, description="收件地址纬度")
+    recipient_longitude: Optional[float] = Field(None, ge=-180, le=180, description="收件地址经度")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
     
@@ -48,3 +50,14 @@ class ExpressStatusUpdate(BaseModel):
     status: ExpressStatus = Field(..., description="快递状态")
     station_name: Optional[str] = Field(None, max_length=200, description="所属驿站名称")
     station_address: Optional[str] = Field(None, max_length=500, description="驿站地址")
+
+class ExpressImportItem(ExpressCreate):
+    """批量导入快递schema"""
+    tracking_number: str = Field(..., max_length=100, description="快递单号")
+    pickup_code: Optional[str] = Field(None, max_length=20, description="取件码")
+
+class ExpressImportResult(BaseModel):
+    """批量导入快递结果schema"""
+    created: int = Field(..., description="新建数量")
+    skipped: int = Field(..., description="因单号重复跳过的数量")
+    skipped_tracking_numbers: List[str] = Field(default=[], description="跳过的快递单号")
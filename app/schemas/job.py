@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, Any
+
+class JobSubmitResponse(BaseModel):
+    """后台任务提交响应schema"""
+    job_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态")
+
+class JobProgress(BaseModel):
+    """后台任务进度schema"""
+    current: int = Field(..., description="已处理数量")
+    total: int = Field(..., description="总数量")
+
+class JobStatusResponse(BaseModel):
+    """后台任务状态响应schema"""
+    job_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态（PENDING/STARTED/PROGRESS/SUCCESS/FAILURE）")
+    progress: Optional[JobProgress] = Field(None, description="任务进度")
+    result: Optional[Any] = Field(None, description="任务结果")
+    error: Optional[str] = Field(None, description="错误信息")
+
+class CarLogRollupRequest(BaseModel):
+    """小车日志汇总任务请求schema"""
+    car_id: int = Field(..., description="小车ID")
+    start_time: Optional[datetime] = Field(None, description="开始时间")
+    end_time: Optional[datetime] = Field(None, description="结束时间")
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
 from typing import Optional, List
+from .appointment import AppointmentResponse
+from .express import ExpressResponse
 
 class RouteBase(BaseModel):
     """路线基础schema"""
@@ -64,6 +66,7 @@ class RouteStepUpdate(BaseModel):
 
 class RouteStepResponse(RouteStepBase):
     """路线步骤响应schema"""
+    id: int = Field(..., description="步骤ID")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
     
@@ -71,4 +74,21 @@ class RouteStepResponse(RouteStepBase):
 
 class RouteWithStepsResponse(RouteResponse):
     """包含步骤的路线响应schema"""
-    route_steps: List[RouteStepResponse] = Field(default=[], description="路线步骤列表")
\ No newline at end of file
+    route_steps: List[RouteStepResponse] = Field(default=[], description="路线步骤列表")
+
+class RouteStepDetailResponse(RouteStepResponse):
+    """包含快递和预约信息的路线步骤响应schema"""
+    express: Optional[ExpressResponse] = Field(None, description="对应快递")
+    appointment: Optional[AppointmentResponse] = Field(None, description="对应预约")
+
+class RouteGeometry(BaseModel):
+    """路线步骤坐标的折线编码schema"""
+    encoding: str = Field(default="polyline", description="编码方式")
+    precision: int = Field(..., description="坐标小数精度")
+    polyline: str = Field(..., description="按步骤顺序编码的取件位置折线")
+    step_orders: List[int] = Field(default=[], description="折线中各点对应的步骤顺序（没有坐标的步骤不在折线中）")
+
+class RouteDetailResponse(RouteResponse):
+    """包含步骤、快递和预约的完整路线响应schema"""
+    route_steps: List[RouteStepDetailResponse] = Field(default=[], description="路线步骤列表")
+    geometry: Optional[RouteGeometry] = Field(None, description="折线编码的步骤坐标（geometry=polyline时返回，此时步骤不再逐个返回坐标）")
@@ -54,6 +54,7 @@ class HeartbeatResponse(BaseModel):
     session_valid: bool = Field(..., description="会话是否有效")
     server_time: int = Field(..., description="服务器时间戳")
     message: Optional[str] = Field(None, description="消息")
+    session_id: Optional[str] = Field(None, description="续期后的会话令牌（仅令牌模式），客户端应替换原会话ID")
 
 class SessionValidationResponse(BaseModel):
     """会话验证响应schema"""
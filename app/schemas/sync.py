@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List
+from .appointment import AppointmentResponse
+from .express import ExpressResponse
+from .route import RouteResponse, RouteStepResponse
+from .task import TaskResponse
+
+class SyncDeletion(BaseModel):
+    """已删除记录schema"""
+    entity: str = Field(..., description="实体类型（与changes中的集合名一致）")
+    id: int = Field(..., description="被删除记录的ID")
+    deleted_at: datetime = Field(..., description="删除时间")
+
+class SyncChangesResponse(BaseModel):
+    """增量同步响应schema"""
+    tasks: List[TaskResponse] = Field(default=[], description="变更的任务")
+    express: List[ExpressResponse] = Field(default=[], description="变更的快递")
+    routes: List[RouteResponse] = Field(default=[], description="变更的路线")
+    route_steps: List[RouteStepResponse] = Field(default=[], description="变更的路线步骤")
+    appointments: List[AppointmentResponse] = Field(default=[], description="变更的预约")
+    deleted: List[SyncDeletion] = Field(default=[], description="已删除的记录")
+    cursor: str = Field(..., description="下次同步使用的游标")
+    has_more: bool = Field(..., description="是否还有未返回的变更（为true时应立即用新游标继续请求）")
@@ -9,6 +9,10 @@ class TaskBase(BaseModel):
     assigned_car_number: Optional[str] = Field(None, max_length=50, description="分配的小车编号")
     expected_completion_time: Optional[datetime] = Field(None, description="任务预计完成时间")
     completed_at: Optional[datetime] = Field(None, description="任务完成时间")
+
+class TaskClaimRequest(BaseModel):
+    """任务队列领取请求schema"""
+    car_number: Optional[str] = Field(None, max_length=50, description="小车编号（调度员代小车领取时必填，小车令牌领取时取自令牌）")
     route_id: Optional[int] = Field(None, description="路线ID")
 
 class TaskCreate(BaseModel):
@@ -31,10 +35,11 @@ class TaskResponse(TaskBase):
     id: int = Field(..., description="任务ID")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
+    lease_expires_at: Optional[datetime] = Field(None, description="领取租约到期时间")
     
     model_config = ConfigDict(from_attributes=True)
 
 class TaskStatusUpdate(BaseModel):
     """任务状态更新schema"""
     status: TaskStatus = Field(..., description="任务状态")
-    completed_at: Optional[datetime] = Field(None, description="任务完成时间")
\ No newline at end of file
+    completed_at: Optional[datetime] = Field(None, description="任务完成时间")
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List
 from app.models.enums import UserRole
 
 class UserBase(BaseModel):
@@ -39,3 +39,18 @@ class UserLogin(BaseModel):
     username: str = Field(..., description="用户名")
     password: str = Field(..., description="密码")
 
+
+
+class UserProvisionRowResult(BaseModel):
+    """批量创建用户单行结果schema"""
+    row: int = Field(..., description="行号（从0开始）")
+    username: Optional[str] = Field(None, description="用户名")
+    status: Literal["created", "duplicate_username", "duplicate_email", "invalid"] = Field(..., description="处理结果")
+    user_id: Optional[int] = Field(None, description="新建用户ID")
+    detail: Optional[str] = Field(None, description="未创建的原因")
+
+class UserProvisionResult(BaseModel):
+    """批量创建用户结果schema"""
+    created: int = Field(..., description="新建数量")
+    skipped: int = Field(..., description="未创建数量（用户名/邮箱重复或数据无效）")
+    rows: List[UserProvisionRowResult] = Field(default=[], description="逐行结果")
@@ -0,0 +1,149 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.announcement import Announcement
+from app.schemas.adapters import AnnouncementListAdapter
+from app.schemas.announcement import AnnouncementCreate, AnnouncementUpdate, AnnouncementResponse
+from app.services.invalidation_service import invalidation_bus
+from app.utils.responses import make_etag
+
+class AnnouncementSnapshot:
+    """有效公告的只读快照，包含预先序列化的响应体和ETag"""
+
+    def __init__(self, version: int, announcements: List[AnnouncementResponse]):
+        """
+        构建快照
+
+        Args:
+            version: 快照版本号
+            announcements: 有效公告列表
+        """
+        self.version = version
+        self.content = AnnouncementListAdapter.dump_json(announcements)
+        self.etag = make_etag(self.content)
+        self.items: Dict[int, Tuple[bytes, str]] = {}
+        for announcement in announcements:
+            content = announcement.model_dump_json().encode("utf-8")
+            self.items[announcement.id] = (content, make_etag(content))
+
+class AnnouncementCache:
+    """公告快照缓存，公告变更时失效，下次读取时重建"""
+
+    def __init__(self):
+        self._version = 1
+        self._snapshot: Optional[AnnouncementSnapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """当前版本号，每次失效单调递增"""
+        return self._version
+
+    def invalidate(self):
+        """使快照失效并递增版本号"""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def get(self, db: Session) -> AnnouncementSnapshot:
+        """
+        获取当前快照，快照失效时查询数据库重建（并发请求只重建一次）
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            AnnouncementSnapshot: 公告快照
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                announcements = db.query(Announcement).filter(
+                    Announcement.is_active == True
+                ).order_by(Announcement.id.desc()).all()
+                self._snapshot = AnnouncementSnapshot(
+                    self._version,
+                    [AnnouncementResponse.model_validate(a) for a in announcements]
+                )
+            return self._snapshot
+
+announcement_cache = AnnouncementCache()
+# 任意公告变更都使整个快照失效
+invalidation_bus.register(Announcement, lambda announcement_ids: announcement_cache.invalidate())
+
+class AnnouncementService:
+    """公告服务类"""
+
+    def __init__(self, db: Session, cache: AnnouncementCache = announcement_cache):
+        """
+        初始化公告服务
+
+        Args:
+            db: 数据库会话
+            cache: 公告快照缓存
+        """
+        self.db = db
+        self.cache = cache
+
+    def get_snapshot(self) -> AnnouncementSnapshot:
+        """
+        获取有效公告快照
+
+        Returns:
+            AnnouncementSnapshot: 公告快照
+        """
+        return self.cache.get(self.db)
+
+    def create_announcement(self, data: AnnouncementCreate) -> Announcement:
+        """
+        创建公告
+
+        Args:
+            data: 公告内容
+
+        Returns:
+            Announcement: 新建的公告
+        """
+        announcement = Announcement(**data.model_dump())
+        self.db.add(announcement)
+        self.db.commit()
+        self.db.refresh(announcement)
+        return announcement
+
+    def update_announcement(self, announcement_id: int, data: AnnouncementUpdate) -> Announcement:
+        """
+        更新公告
+
+        Args:
+            announcement_id: 公告ID
+            data: 需要更新的字段
+
+        Returns:
+            Announcement: 更新后的公告
+        """
+        announcement = self._get_or_raise(announcement_id)
+        for field, value in data.model_dump(exclude_unset=True).items():
+            setattr(announcement, field, value)
+        self.db.commit()
+        self.db.refresh(announcement)
+        return announcement
+
+    def delete_announcement(self, announcement_id: int):
+        """
+        删除公告
+
+        Args:
+            announcement_id: 公告ID
+        """
+        self.db.delete(self._get_or_raise(announcement_id))
+        self.db.commit()
+
+    def _get_or_raise(self, announcement_id: int) -> Announcement:
+        announcement = self.db.query(Announcement).filter(
+            Announcement.id == announcement_id
+        ).first()
+        if not announcement:
+            raise ValueError(f"公告 {announcement_id} 不存在")
+        return announcement
@@ -0,0 +1,186 @@
+# 小车遥测流式异常检测
+# 遥测上报时逐条更新每辆小车的固定大小状态，不回读历史日志：
+#   停滞：配送中的小车在ANOMALY_STALL_SECONDS内未离开ANOMALY_STALL_RADIUS_M范围，且速度的指数滑动平均接近0
+#   电量骤降：相邻两次上报电量下降超过ANOMALY_BATTERY_DROP_PERCENT
+#   电量异常消耗：电量变化率（%/分钟）的指数滑动平均低于-ANOMALY_BATTERY_DRAIN_PER_MINUTE
+#   偏离路线：到路线下一步骤的距离比此前的最近距离增大超过ANOMALY_OFF_ROUTE_M（到达步骤后切换到下一步骤）
+# 持续性异常（停滞、异常消耗、偏离路线）只在进入异常时告警一次，恢复后才会再次告警
+# 状态保存在各工作进程内存中，同一辆小车的上报应路由到同一工作进程（或接受检测延迟）
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from app.core.config import Settings, get_settings
+from app.utils.geo import haversine_km
+
+STALLED = "stalled"
+BATTERY_DROP = "battery_drop"
+BATTERY_DRAIN = "battery_drain"
+OFF_ROUTE = "off_route"
+
+# 告警写入小车日志时的日志类型和发布的事件类型
+ALERT_LOG_TYPE = "alert"
+ALERT_EVENT_TYPE = "car.alert"
+
+# 速度低于该值(km/h)视为静止
+_STOPPED_SPEED = 1.0
+
+RoutePoints = Sequence[Tuple[float, float]]
+
+@dataclass
+class Alert:
+    """异常告警"""
+    kind: str
+    message: str
+    value: float
+
+@dataclass
+class CarAnomalyState:
+    """单辆小车的检测状态（大小固定，与上报次数无关）"""
+    at: float
+    ewma_speed: float
+    battery: Optional[float]
+    battery_slope: float = 0.0
+    anchor: Tuple[float, float] = (0.0, 0.0)
+    last_moved_at: float = 0.0
+    route_id: Optional[int] = None
+    next_step: int = 0
+    best_distance_m: float = math.inf
+    # 当前处于告警状态的持续性异常
+    raised: Set[str] = field(default_factory=set)
+
+class TelemetryAnomalyDetector:
+    """遥测异常检测器"""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        """
+        初始化检测器
+
+        Args:
+            settings: 应用配置，默认使用全局配置
+        """
+        self.settings = settings or get_settings()
+        self._states: Dict[int, CarAnomalyState] = {}
+        self._lock = threading.Lock()
+
+    def state(self, car_id: int) -> Optional[CarAnomalyState]:
+        """获取小车的检测状态"""
+        return self._states.get(car_id)
+
+    def observe(
+        self,
+        car_id: int,
+        at: float,
+        latitude: float,
+        longitude: float,
+        speed: float,
+        battery: Optional[float] = None,
+        delivering: bool = False,
+        route_id: Optional[int] = None,
+        route_points: Optional[RoutePoints] = None,
+    ) -> List[Alert]:
+        """
+        处理一条遥测并返回新产生的告警
+
+        Args:
+            car_id: 小车ID
+            at: 上报时间（时间戳，秒）
+            latitude: 纬度
+            longitude: 经度
+            speed: 速度(km/h)
+            battery: 电量百分比，未上报时为None
+            delivering: 是否处于配送中（只有配送中的小车检测停滞和偏离路线）
+            route_id: 当前路线ID
+            route_points: 当前路线各步骤的坐标（按步骤顺序）
+
+        Returns:
+            List[Alert]: 告警列表
+        """
+        with self._lock:
+            state = self._states.get(car_id)
+            if state is None:
+                self._states[car_id] = CarAnomalyState(
+                    at=at, ewma_speed=speed, battery=battery, anchor=(latitude, longitude), last_moved_at=at
+                )
+                return []
+            alerts: List[Alert] = []
+            self._check_stall(state, at, latitude, longitude, speed, delivering, alerts)
+            if battery is not None:
+                self._check_battery(state, at, battery, alerts)
+            if delivering and route_points:
+                self._check_route(state, latitude, longitude, route_id, route_points, alerts)
+            state.at = at
+            return alerts
+
+    def _raise(self, state: CarAnomalyState, kind: str, active: bool, message: str, value: float, alerts: List[Alert]):
+        """持续性异常：进入时告警一次，恢复时清除"""
+        if active and kind not in state.raised:
+            state.raised.add(kind)
+            alerts.append(Alert(kind, message, value))
+        elif not active:
+            state.raised.discard(kind)
+
+    def _check_stall(self, state, at, latitude, longitude, speed, delivering, alerts):
+        alpha = self.settings.anomaly_speed_alpha
+        state.ewma_speed = alpha * speed + (1 - alpha) * state.ewma_speed
+        if haversine_km(state.anchor[0], state.anchor[1], latitude, longitude) * 1000 > self.settings.anomaly_stall_radius_m:
+            state.anchor = (latitude, longitude)
+            state.last_moved_at = at
+        stalled_seconds = at - state.last_moved_at
+        stalled = delivering and stalled_seconds >= self.settings.anomaly_stall_seconds and state.ewma_speed < _STOPPED_SPEED
+        self._raise(state, STALLED, stalled, f"配送中停滞{int(stalled_seconds)}秒", stalled_seconds, alerts)
+
+    def _check_battery(self, state, at, battery, alerts):
+        previous = state.battery
+        state.battery = battery
+        if previous is None:
+            return
+        drop = previous - battery
+        if drop >= self.settings.anomaly_battery_drop_percent:
+            # 骤降单独告警，不计入变化率，避免一次骤降同时触发异常消耗
+            alerts.append(Alert(BATTERY_DROP, f"电量骤降{drop:.1f}%", drop))
+            return
+        minutes = (at - state.at) / 60
+        if minutes > 0:
+            alpha = self.settings.anomaly_speed_alpha
+            state.battery_slope = alpha * (-drop / minutes) + (1 - alpha) * state.battery_slope
+        draining = state.battery_slope <= -self.settings.anomaly_battery_drain_per_minute
+        self._raise(state, BATTERY_DRAIN, draining, f"电量消耗过快{-state.battery_slope:.1f}%/分钟", -state.battery_slope, alerts)
+
+    def _check_route(self, state, latitude, longitude, route_id, route_points, alerts):
+        if route_id != state.route_id:
+            state.route_id, state.next_step, state.best_distance_m = route_id, 0, math.inf
+        # 依次跳过已到达的步骤
+        while state.next_step < len(route_points):
+            step_latitude, step_longitude = route_points[state.next_step]
+            distance_m = haversine_km(latitude, longitude, step_latitude, step_longitude) * 1000
+            if distance_m > self.settings.anomaly_step_arrival_m:
+                break
+            state.next_step += 1
+            state.best_distance_m = math.inf
+            state.raised.discard(OFF_ROUTE)
+        else:
+            return
+        state.best_distance_m = min(state.best_distance_m, distance_m)
+        deviation = distance_m - state.best_distance_m
+        self._raise(
+            state, OFF_ROUTE, deviation > self.settings.anomaly_off_route_m,
+            f"偏离路线：距第{state.next_step + 1}个步骤{distance_m:.0f}米，比最近时远{deviation:.0f}米", deviation, alerts
+        )
+
+_detector: Optional[TelemetryAnomalyDetector] = None
+_detector_lock = threading.Lock()
+
+def get_anomaly_detector() -> TelemetryAnomalyDetector:
+    """
+    获取进程内异常检测器单例
+
+    Returns:
+        TelemetryAnomalyDetector: 异常检测器
+    """
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = TelemetryAnomalyDetector()
+    return _detector
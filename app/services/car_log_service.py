@@ -0,0 +1,155 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.car import Car
+from app.models.car_log import CarLog
+from app.models.enums import ExpressStatus, TaskStatus
+from app.models.express import Express
+from app.models.task import Task
+from app.schemas.car_log import CarLogSummary, CarTrackPoint, CarTrackResponse, CarTrackEncodedResponse
+from app.utils.polyline import DEFAULT_PRECISION, encode_polyline
+
+# 单次返回的最大轨迹点数
+MAX_TRACK_POINTS = 10000
+
+class CarLogService:
+    """小车日志服务类"""
+
+    def __init__(self, db: Session):
+        """
+        初始化小车日志服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def is_delivering_to(self, car_id: int, user_id: int) -> bool:
+        """
+        小车当前是否在为该用户配送快递（快递配送中，所属任务分配给该小车且未结束）
+
+        Args:
+            car_id: 小车ID
+            user_id: 收件用户ID
+
+        Returns:
+            bool: 是否在配送该用户的快递
+        """
+        return self.db.execute(
+            select(Express.id)
+            .join(Task, Task.id == Express.task_id)
+            .join(Car, Car.car_number == Task.assigned_car_number)
+            .where(
+                Car.id == car_id,
+                Express.recipient_user_id == user_id,
+                Express.status == ExpressStatus.delivering,
+                Task.status.in_((TaskStatus.pending, TaskStatus.running)),
+            ).limit(1)
+        ).first() is not None
+
+    def summarize(self, car_id: int, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> CarLogSummary:
+        """
+        汇总小车在时间范围内的日志
+
+        聚合在数据库端完成，不加载日志明细
+
+        Args:
+            car_id: 小车ID
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            CarLogSummary: 日志汇总
+        """
+        filters = [CarLog.car_id == car_id]
+        if start_time:
+            filters.append(CarLog.logged_at >= start_time)
+        if end_time:
+            filters.append(CarLog.logged_at <= end_time)
+
+        total_logs, total_running_time, average_speed, min_battery, max_battery = self.db.query(
+            func.count(CarLog.id),
+            func.max(CarLog.running_time),
+            func.avg(CarLog.current_speed),
+            func.min(CarLog.battery_level),
+            func.max(CarLog.battery_level),
+        ).filter(*filters).one()
+
+        distribution = self.db.query(CarLog.task_status, func.count(CarLog.id)).filter(
+            *filters
+        ).group_by(CarLog.task_status).all()
+
+        return CarLogSummary(
+            car_id=car_id,
+            total_logs=total_logs,
+            total_running_time=total_running_time or 0,
+            average_speed=float(average_speed or 0.0),
+            min_battery_level=float(min_battery or 0.0),
+            max_battery_level=float(max_battery or 0.0),
+            status_distribution={
+                getattr(task_status, "value", task_status): count
+                for task_status, count in distribution
+            }
+        )
+
+    def get_track(self, car_id: int, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                  limit: int = MAX_TRACK_POINTS) -> List[CarTrackPoint]:
+        """
+        获取小车在时间范围内的轨迹点（只查询坐标和时间列，不加载完整日志）
+
+        Args:
+            car_id: 小车ID
+            start_time: 开始时间
+            end_time: 结束时间
+            limit: 最多返回的点数
+
+        Returns:
+            List[CarTrackPoint]: 按时间排序的轨迹点
+        """
+        query = self.db.query(CarLog.current_latitude, CarLog.current_longitude, CarLog.logged_at).filter(
+            CarLog.car_id == car_id,
+            CarLog.current_latitude.isnot(None),
+            CarLog.current_longitude.isnot(None),
+        )
+        if start_time:
+            query = query.filter(CarLog.logged_at >= start_time)
+        if end_time:
+            query = query.filter(CarLog.logged_at <= end_time)
+        rows = query.order_by(CarLog.logged_at, CarLog.id).limit(min(limit, MAX_TRACK_POINTS)).all()
+        return [CarTrackPoint(latitude=lat, longitude=lon, logged_at=logged_at) for lat, lon, logged_at in rows]
+
+    @staticmethod
+    def build_track_response(car_id: int, points: List[CarTrackPoint]) -> CarTrackResponse:
+        """
+        构建逐点返回的轨迹响应
+
+        Args:
+            car_id: 小车ID
+            points: 轨迹点
+
+        Returns:
+            CarTrackResponse: 轨迹响应
+        """
+        return CarTrackResponse(car_id=car_id, points=points)
+
+    @staticmethod
+    def build_encoded_track_response(car_id: int, points: List[CarTrackPoint]) -> CarTrackEncodedResponse:
+        """
+        构建折线编码的轨迹响应，时间以相对第一个点的秒数返回
+
+        Args:
+            car_id: 小车ID
+            points: 轨迹点
+
+        Returns:
+            CarTrackEncodedResponse: 编码后的轨迹响应
+        """
+        start_time = points[0].logged_at if points else None
+        return CarTrackEncodedResponse(
+            car_id=car_id,
+            precision=DEFAULT_PRECISION,
+            polyline=encode_polyline((p.latitude, p.longitude) for p in points),
+            start_time=start_time,
+            time_offsets=[round((p.logged_at - start_time).total_seconds()) for p in points],
+        )
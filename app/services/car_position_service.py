@@ -0,0 +1,272 @@
+# 小车位置写回合并
+# 高频位置上报不直接更新cars表：内存中每辆小车（按小车编号）只保留最新位置，
+# 后台线程每隔CAR_POSITION_FLUSH_INTERVAL_MS用一条批量UPDATE写回有变化的小车，避免热点行锁争用和表膨胀；
+# 每第CAR_POSITION_LOG_EVERY次上报或位置/速度显著变化时采样一条小车日志，随同一批次写入
+# 提交后只为实际被更新的小车发布状态事件（较旧的上报被updated_at条件拒绝时不发布）；
+# 发布在写入的异常处理之外，提交成功后不会因发布失败而放回数据重复写入
+# 应用关闭时停止后台线程并写回剩余数据
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import Settings, get_settings
+from app.models.car import Car
+from app.models.car_log import CarLog
+from app.schemas.car import CarLocationUpdate
+from app.services.event_service import get_event_bus
+from app.utils.geo import haversine_km
+
+logger = logging.getLogger(__name__)
+
+# 采样生成的小车日志类型
+POSITION_LOG_TYPE = "position"
+
+@dataclass
+class _Position:
+    latitude: float
+    longitude: float
+    speed: Optional[float]
+    received_at: datetime
+
+@dataclass
+class _LogState:
+    """每辆小车的采样状态：距上次采样的上报次数及上次采样的位置和速度"""
+    updates: int = 0
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    speed: float = 0.0
+
+class CarPositionCoalescer:
+    """小车位置写回合并器"""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        """
+        初始化合并器
+
+        Args:
+            settings: 应用配置，默认使用全局配置
+        """
+        self.settings = settings or get_settings()
+        self._positions: Dict[str, _Position] = {}
+        self._samples: List[tuple] = []
+        self._log_states: Dict[str, _LogState] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session_factory: Optional[Callable[[], Session]] = None
+
+    @property
+    def pending(self) -> int:
+        """等待写回的小车数"""
+        return len(self._positions)
+
+    def submit(self, car_number: str, location: CarLocationUpdate):
+        """
+        提交一次位置上报（只更新内存，不访问数据库）
+
+        Args:
+            car_number: 小车编号
+            location: 位置数据
+        """
+        position = _Position(location.current_latitude, location.current_longitude, location.current_speed, datetime.now())
+        with self._lock:
+            self._positions[car_number] = position
+            state = self._log_states.get(car_number)
+            if state is None:
+                state = self._log_states[car_number] = _LogState()
+            state.updates += 1
+            if self._should_sample(state, position):
+                self._samples.append((car_number, position))
+                state.updates = 0
+                state.latitude, state.longitude = position.latitude, position.longitude
+                if position.speed is not None:
+                    state.speed = position.speed
+
+    def _should_sample(self, state: _LogState, position: _Position) -> bool:
+        """每第N次上报，或与上次采样相比移动距离/速度变化超过阈值时采样"""
+        if state.latitude is None or state.updates >= self.settings.car_position_log_every:
+            return True
+        moved_m = haversine_km(state.latitude, state.longitude, position.latitude, position.longitude) * 1000
+        if moved_m >= self.settings.car_position_log_min_distance_m:
+            return True
+        return position.speed is not None and abs(position.speed - state.speed) >= self.settings.car_position_log_min_speed_change
+
+    def flush(self, db: Session) -> int:
+        """
+        将积累的位置和采样写入数据库：一次查询小车、一条批量UPDATE、一条批量INSERT，同一事务提交
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            int: 更新的小车数
+        """
+        with self._flush_lock:
+            with self._lock:
+                positions, self._positions = self._positions, {}
+                samples, self._samples = self._samples, []
+            if not positions and not samples:
+                return 0
+            try:
+                events = self._write(db, positions, samples)
+            except Exception:
+                db.rollback()
+                self._requeue(positions, samples)
+                raise
+        # 批量UPDATE不经过ORM对象，在提交后补发小车状态事件
+        bus = get_event_bus()
+        for item in events:
+            bus.publish(item)
+        return len(events)
+
+    def _write(self, db: Session, positions: Dict[str, _Position], samples: List[tuple]) -> List[dict]:
+        """写入并提交，返回实际被更新的小车的状态事件"""
+        numbers = set(positions) | {car_number for car_number, _ in samples}
+        cars = {row.car_number: row for row in db.execute(
+            select(Car.id, Car.car_number, Car.task_status, Car.current_task_id, Car.current_speed,
+                   Car.battery_level, Car.running_time).where(Car.car_number.in_(numbers))
+        )}
+        unknown = numbers - set(cars)
+        if unknown:
+            logger.warning("忽略未知小车的位置上报: %s", ", ".join(sorted(unknown)))
+            # 不保留未知小车的采样状态，否则每个新编号都会永久占用内存
+            with self._lock:
+                for car_number in unknown:
+                    self._log_states.pop(car_number, None)
+
+        rows, moved = [], []
+        for car_number, position in positions.items():
+            car = cars.get(car_number)
+            if car is None:
+                continue
+            moved.append(car)
+            rows.append({
+                "car_id": car.id,
+                "latitude": position.latitude,
+                "longitude": position.longitude,
+                "speed": position.speed if position.speed is not None else car.current_speed,
+                "received_at": position.received_at,
+            })
+        updated_ids = set()
+        if rows:
+            table = Car.__table__
+            # 多个工作进程各自合并同一辆小车时，只让较新的上报覆盖较旧的
+            statement = update(table).where(
+                table.c.id == bindparam("car_id"),
+                or_(table.c.updated_at.is_(None), table.c.updated_at <= bindparam("received_at")),
+            ).values(
+                current_latitude=bindparam("latitude"),
+                current_longitude=bindparam("longitude"),
+                current_speed=bindparam("speed"),
+                updated_at=bindparam("received_at"),
+            )
+            updated = db.execute(statement, rows).rowcount
+            if updated == len(rows) and db.get_bind().dialect.supports_sane_multi_rowcount:
+                updated_ids = {row["car_id"] for row in rows}
+            else:
+                # 批量UPDATE不支持RETURNING：有行被拒绝时按updated_at找出本批次写入的行（行锁持有到提交）
+                received = {row["car_id"]: row["received_at"] for row in rows}
+                updated_ids = {car_id for car_id, updated_at in db.execute(
+                    select(table.c.id, table.c.updated_at).where(table.c.id.in_(received))
+                ) if updated_at == received[car_id]}
+
+        logs = []
+        for car_number, position in samples:
+            car = cars.get(car_number)
+            if car is None:
+                continue
+            logs.append({
+                "car_id": car.id,
+                "logged_at": position.received_at,
+                "task_status": car.task_status,
+                "current_speed": position.speed if position.speed is not None else car.current_speed,
+                "current_latitude": position.latitude,
+                "current_longitude": position.longitude,
+                "battery_level": car.battery_level,
+                "running_time": car.running_time,
+                "current_task_id": car.current_task_id,
+                "log_type": POSITION_LOG_TYPE,
+            })
+        if logs:
+            db.execute(insert(CarLog), logs)
+        db.commit()
+
+        return [
+            {
+                "type": "car.status",
+                "car_number": car.car_number,
+                "task_status": getattr(car.task_status, "value", car.task_status),
+                "current_task_id": car.current_task_id,
+                "current_latitude": row["latitude"],
+                "current_longitude": row["longitude"],
+                "current_speed": row["speed"],
+                "battery_level": car.battery_level,
+            }
+            for car, row in zip(moved, rows) if car.id in updated_ids
+        ]
+
+    def _requeue(self, positions: Dict[str, _Position], samples: List[tuple]):
+        """写入失败时放回未写入的数据，期间收到的更新位置优先"""
+        with self._lock:
+            for car_number, position in positions.items():
+                self._positions.setdefault(car_number, position)
+            self._samples[:0] = samples
+
+    def start(self, session_factory: Callable[[], Session]):
+        """
+        启动后台写回线程
+
+        Args:
+            session_factory: 创建数据库会话的工厂函数
+        """
+        if self._thread is not None:
+            return
+        self._session_factory = session_factory
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="car-position-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并写回剩余数据"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._session_factory is not None:
+            self._flush_with_new_session()
+
+    def _run(self):
+        interval = self.settings.car_position_flush_interval_ms / 1000
+        while not self._stop.wait(interval):
+            try:
+                self._flush_with_new_session()
+            except Exception:
+                logger.exception("写回小车位置失败，将在下一周期重试")
+
+    def _flush_with_new_session(self):
+        db = self._session_factory()
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+_coalescer: Optional[CarPositionCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+def get_position_coalescer() -> CarPositionCoalescer:
+    """
+    获取进程内小车位置合并器单例
+
+    Returns:
+        CarPositionCoalescer: 合并器
+    """
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = CarPositionCoalescer()
+    return _coalescer
@@ -0,0 +1,166 @@
+import json
+import time
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import Settings, get_settings
+from app.core.security import create_car_token
+from app.models.car import Car
+from app.models.car_log import CarLog
+from app.models.enums import CarTaskStatus
+from app.models.route import Route, RouteStep
+from app.models.task import Task
+from app.schemas.car import CarTelemetry
+from app.services.anomaly_service import (
+    ALERT_EVENT_TYPE, ALERT_LOG_TYPE, TelemetryAnomalyDetector, get_anomaly_detector
+)
+from app.services.event_service import queue_domain_event
+from app.services.invalidation_service import invalidation_bus
+from app.utils.cache import LRUCache
+
+# 遥测上报生成的小车日志类型
+TELEMETRY_LOG_TYPE = "telemetry"
+
+# 异常检测使用的缓存：任务ID -> 路线ID，路线ID -> 步骤坐标；任务或路线变更时失效
+_task_routes = LRUCache(4096)
+_route_points = LRUCache(1024)
+
+def _evict(cache: LRUCache):
+    def evict(keys):
+        for key in keys:
+            cache.pop(key)
+    return evict
+
+invalidation_bus.register(Task, _evict(_task_routes))
+invalidation_bus.register(Route, _evict(_route_points))
+
+class CarService:
+    """小车服务类"""
+
+    def __init__(self, db: Session, settings: Optional[Settings] = None, detector: Optional[TelemetryAnomalyDetector] = None):
+        """
+        初始化小车服务
+
+        Args:
+            db: 数据库会话
+            settings: 应用配置，默认使用全局配置
+            detector: 遥测异常检测器，默认使用进程内单例
+        """
+        self.db = db
+        self.settings = settings or get_settings()
+        self._detector = detector
+
+    @property
+    def detector(self) -> TelemetryAnomalyDetector:
+        """遥测异常检测器"""
+        if self._detector is None:
+            self._detector = get_anomaly_detector()
+        return self._detector
+
+    def issue_token(self, car_id: int) -> str:
+        """
+        为小车签发令牌（小车上报遥测、位置和领取任务时使用）
+
+        Args:
+            car_id: 小车ID
+
+        Returns:
+            str: 小车令牌
+        """
+        car = self.db.get(Car, car_id)
+        if not car or not car.is_active:
+            raise ValueError(f"小车 {car_id} 不存在")
+        return create_car_token(car.id, car.car_number)
+
+    def record_telemetry(self, car_id: int, telemetry: CarTelemetry) -> Car:
+        """
+        记录小车遥测：更新小车当前状态并写入一条小车日志，检测到异常时追加告警日志并发布告警事件
+
+        Args:
+            car_id: 小车ID
+            telemetry: 遥测数据
+
+        Returns:
+            Car: 更新后的小车
+        """
+        car = self.db.get(Car, car_id)
+        if not car:
+            raise ValueError(f"小车 {car_id} 不存在")
+
+        car.current_latitude = telemetry.current_latitude
+        car.current_longitude = telemetry.current_longitude
+        car.current_speed = telemetry.current_speed
+        car.battery_level = telemetry.battery_level
+        if telemetry.task_status is not None:
+            car.task_status = telemetry.task_status
+        if telemetry.running_time is not None:
+            car.running_time = telemetry.running_time
+
+        self.db.add(self._car_log(car, TELEMETRY_LOG_TYPE))
+        if self.settings.anomaly_detection_enabled:
+            self._detect_anomalies(car)
+        self.db.commit()
+        self.db.refresh(car)
+        return car
+
+    def _car_log(self, car: Car, log_type: str, description: Optional[str] = None, extra_data: Optional[str] = None) -> CarLog:
+        return CarLog(
+            car_id=car.id,
+            task_status=car.task_status,
+            current_speed=car.current_speed,
+            current_latitude=car.current_latitude,
+            current_longitude=car.current_longitude,
+            battery_level=car.battery_level,
+            running_time=car.running_time,
+            current_task_id=car.current_task_id,
+            log_type=log_type,
+            description=description,
+            extra_data=extra_data,
+        )
+
+    def _detect_anomalies(self, car: Car):
+        """将本次遥测交给异常检测器，告警写入小车日志并在提交后发布事件"""
+        delivering = car.task_status == CarTaskStatus.delivering
+        route_id = self._current_route_id(car) if delivering else None
+        alerts = self.detector.observe(
+            car.id, time.time(), car.current_latitude, car.current_longitude, car.current_speed,
+            battery=car.battery_level, delivering=delivering,
+            route_id=route_id, route_points=self._route_points(route_id) if route_id else None,
+        )
+        for alert in alerts:
+            self.db.add(self._car_log(
+                car, ALERT_LOG_TYPE, alert.message,
+                json.dumps({"kind": alert.kind, "value": alert.value}, ensure_ascii=False)
+            ))
+            queue_domain_event(self.db, {
+                "type": ALERT_EVENT_TYPE,
+                "car_number": car.car_number,
+                "kind": alert.kind,
+                "message": alert.message,
+                "value": alert.value,
+                "current_latitude": car.current_latitude,
+                "current_longitude": car.current_longitude,
+            })
+
+    def _current_route_id(self, car: Car) -> Optional[int]:
+        if car.current_task_id is None:
+            return None
+        route_id = _task_routes.get(car.current_task_id, 0)
+        if route_id == 0:
+            route_id = self.db.execute(select(Task.route_id).where(Task.id == car.current_task_id)).scalar()
+            _task_routes.set(car.current_task_id, route_id)
+        return route_id
+
+    def _route_points(self, route_id: int) -> List[Tuple[float, float]]:
+        points = _route_points.get(route_id)
+        if points is None:
+            points = [
+                (latitude, longitude) for latitude, longitude in self.db.execute(
+                    select(RouteStep.pickup_latitude, RouteStep.pickup_longitude)
+                    .where(RouteStep.route_id == route_id)
+                    .order_by(RouteStep.step_order)
+                )
+                if latitude is not None and longitude is not None
+            ]
+            _route_points.set(route_id, points)
+        return points
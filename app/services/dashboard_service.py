@@ -0,0 +1,248 @@
+# 运营看板计数
+# 任务/快递/小车按状态的数量和活跃会话数保存在dashboard_counters表中，不在每次刷新看板时对大表GROUP BY：
+#   ORM刷新时根据状态字段的新旧值计算增量，在同一事务内用一条批量UPDATE增减对应计数（按键排序，避免死锁）
+#   绕过ORM的批量UPDATE（如任务队列）调用record_transitions登记状态变化
+#   看板接口返回进程内缓存的预先序列化快照；计数提交后通过缓存失效总线使各工作进程的快照失效
+#   对账任务（analytics.reconcile_dashboard_counters）定期用GROUP BY重新统计并校正偏差，
+#   同时补齐缺失的计数行（首次读取看板时发现缺行也会执行一次）
+# 状态字段设置了active_history，属性已过期（如提交后）时赋值也会先加载旧值，增量不会遗漏
+import itertools
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import bindparam, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+from app.models.car import Car
+from app.models.dashboard_counter import DashboardCounter
+from app.models.enums import CarTaskStatus, ExpressStatus, TaskStatus
+from app.models.express import Express
+from app.models.session import UserSession
+from app.models.task import Task
+from app.schemas.dashboard import DashboardCountersResponse
+from app.services.invalidation_service import invalidation_bus, mark_changed
+from app.utils.responses import make_etag
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_BUCKET = "active"
+
+@dataclass(frozen=True)
+class CounterDefinition:
+    """一类计数：按模型的某个字段分组"""
+    metric: str
+    model: type
+    attribute: str
+    buckets: Tuple[str, ...]
+
+    def bucket(self, value) -> Optional[str]:
+        """字段值对应的分组，不计数时返回None"""
+        if isinstance(value, bool):
+            return ACTIVE_BUCKET if value else None
+        value = getattr(value, "value", value)
+        return value if value in self.buckets else None
+
+COUNTERS = (
+    CounterDefinition("tasks", Task, "status", tuple(status.value for status in TaskStatus)),
+    CounterDefinition("express", Express, "status", tuple(status.value for status in ExpressStatus)),
+    CounterDefinition("cars", Car, "task_status", tuple(status.value for status in CarTaskStatus)),
+    CounterDefinition("sessions", UserSession, "is_active", (ACTIVE_BUCKET,)),
+)
+_COUNTERS_BY_MODEL = {counter.model: counter for counter in COUNTERS}
+_COUNTERS_BY_METRIC = {counter.metric: counter for counter in COUNTERS}
+
+def _apply_deltas(session: Session, deltas: Dict[Tuple[str, str], int]):
+    """在当前事务内增减计数，并登记提交后使看板快照失效"""
+    rows = [{"m": metric, "b": bucket, "d": delta} for (metric, bucket), delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    table = DashboardCounter.__table__
+    session.connection().execute(
+        update(table)
+        .where(table.c.metric == bindparam("m"), table.c.bucket == bindparam("b"))
+        .values(value=table.c.value + bindparam("d"), updated_at=datetime.now()),
+        rows,
+    )
+    mark_changed(session, DashboardCounter.__tablename__, {row["m"] for row in rows})
+
+def record_transitions(session: Session, metric: str, transitions: Iterable[Tuple[object, object]]):
+    """
+    登记不经过ORM刷新的状态变化（在执行批量UPDATE的同一事务内调用）
+
+    Args:
+        session: 数据库会话
+        metric: 指标名
+        transitions: (旧值, 新值)列表，新增记录的旧值、删除记录的新值为None
+    """
+    counter = _COUNTERS_BY_METRIC[metric]
+    deltas: Counter = Counter()
+    for previous, current in transitions:
+        previous_bucket, current_bucket = counter.bucket(previous), counter.bucket(current)
+        if previous_bucket == current_bucket:
+            continue
+        if previous_bucket is not None:
+            deltas[(metric, previous_bucket)] -= 1
+        if current_bucket is not None:
+            deltas[(metric, current_bucket)] += 1
+    _apply_deltas(session, deltas)
+
+@event.listens_for(Session, "after_flush")
+def _count_status_transitions(session, flush_context):
+    """刷新时按状态字段的新旧值更新计数"""
+    transitions: Dict[str, list] = {}
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        counter = _COUNTERS_BY_MODEL.get(type(obj))
+        if counter is None:
+            continue
+        current = getattr(obj, counter.attribute)
+        if obj in session.new:
+            transitions.setdefault(counter.metric, []).append((None, current))
+            continue
+        history = inspect(obj).attrs[counter.attribute].history
+        previous = history.deleted[0] if history.deleted else current
+        if obj in session.deleted:
+            transitions.setdefault(counter.metric, []).append((previous, None))
+        elif history.deleted:
+            transitions.setdefault(counter.metric, []).append((previous, current))
+    for metric, items in transitions.items():
+        record_transitions(session, metric, items)
+
+class DashboardSnapshot:
+    """看板计数快照，包含预先序列化的响应体和ETag"""
+
+    def __init__(self, counters: DashboardCountersResponse):
+        self.counters = counters
+        self.content = counters.model_dump_json().encode("utf-8")
+        self.etag = make_etag(self.content)
+
+class DashboardCache:
+    """看板快照缓存，计数变化时失效，下次读取时重建"""
+
+    def __init__(self):
+        self._version = 0
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """使快照失效"""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def get(self, db: Session) -> DashboardSnapshot:
+        """
+        获取当前快照，快照失效时读取计数表重建
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            DashboardSnapshot: 看板快照
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        # 重建期间计数又发生变化（包括重建时对账补齐计数行）时不缓存，避免保存过期快照，再重建一次
+        for _ in range(2):
+            version = self._version
+            snapshot = DashboardSnapshot(DashboardService(db).read_counters())
+            with self._lock:
+                if self._version == version:
+                    self._snapshot = snapshot
+                    break
+        return snapshot
+
+dashboard_cache = DashboardCache()
+invalidation_bus.register(DashboardCounter, lambda metrics: dashboard_cache.invalidate(), key="metric")
+
+class DashboardService:
+    """运营看板服务类"""
+
+    def __init__(self, db: Session):
+        """
+        初始化看板服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def read_counters(self) -> DashboardCountersResponse:
+        """
+        读取计数表（一次查询），计数行缺失时先执行对账
+
+        Returns:
+            DashboardCountersResponse: 看板计数
+        """
+        table = DashboardCounter.__table__
+        values = {(metric, bucket): value for metric, bucket, value in self.db.execute(
+            select(table.c.metric, table.c.bucket, table.c.value)
+        )}
+        if any((counter.metric, bucket) not in values for counter in COUNTERS for bucket in counter.buckets):
+            self.reconcile()
+            return self.read_counters()
+        grouped = {
+            counter.metric: {bucket: values[(counter.metric, bucket)] for bucket in counter.buckets}
+            for counter in COUNTERS
+        }
+        return DashboardCountersResponse(
+            tasks=grouped["tasks"],
+            express=grouped["express"],
+            cars=grouped["cars"],
+            active_sessions=grouped["sessions"][ACTIVE_BUCKET],
+        )
+
+    def _count(self, counter: CounterDefinition) -> Dict[Tuple[str, str], int]:
+        column = getattr(counter.model, counter.attribute)
+        actual = {(counter.metric, bucket): 0 for bucket in counter.buckets}
+        for value, count in self.db.execute(select(column, func.count()).group_by(column)):
+            bucket = counter.bucket(value)
+            if bucket is not None:
+                actual[(counter.metric, bucket)] = count
+        return actual
+
+    def reconcile(self) -> Dict[str, Dict[str, int]]:
+        """
+        重新统计各类计数并校正计数表（建议每隔几分钟由定时任务触发）
+
+        先锁定计数行再统计：正在修改状态的事务已持有对应计数行的锁，统计在其提交后进行，不会遗漏或重复
+
+        Returns:
+            Dict[str, Dict[str, int]]: 各指标被校正的分组及校正量
+        """
+        table = DashboardCounter.__table__
+        recorded = {(metric, bucket): value for metric, bucket, value in self.db.execute(
+            select(table.c.metric, table.c.bucket, table.c.value)
+            .order_by(table.c.metric, table.c.bucket).with_for_update()
+        )}
+        actual: Dict[Tuple[str, str], int] = {}
+        for counter in COUNTERS:
+            actual.update(self._count(counter))
+
+        corrections: Dict[str, Dict[str, int]] = {}
+        now = datetime.now()
+        updates, inserts = [], []
+        for (metric, bucket), value in sorted(actual.items()):
+            if (metric, bucket) not in recorded:
+                inserts.append({"metric": metric, "bucket": bucket, "value": value, "created_at": now, "updated_at": now})
+            elif recorded[(metric, bucket)] != value:
+                updates.append({"m": metric, "b": bucket, "v": value})
+            else:
+                continue
+            corrections.setdefault(metric, {})[bucket] = value - recorded.get((metric, bucket), 0)
+        if updates:
+            self.db.execute(
+                update(table).where(table.c.metric == bindparam("m"), table.c.bucket == bindparam("b"))
+                .values(value=bindparam("v"), updated_at=now),
+                updates,
+            )
+        if inserts:
+            self.db.execute(insert(table), inserts)
+        if updates or inserts:
+            mark_changed(self.db, DashboardCounter.__tablename__, corrections.keys())
+            if updates:
+                logger.warning("看板计数与实际数量不一致，已校正: %s", corrections)
+        self.db.commit()
+        return corrections
@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.car import Car
+from app.models.express import Express
+from app.models.task import Task
+from app.utils.pubsub import Broker, get_broker
+
+logger = logging.getLogger(__name__)
+
+EVENT_CHANNEL = "domain-events"
+SUBSCRIPTION_QUEUE_SIZE = 256
+
+# 触发小车事件的字段
+CAR_EVENT_FIELDS = (
+    "task_status", "current_latitude", "current_longitude",
+    "current_speed", "battery_level", "current_task_id",
+)
+
+class Subscription:
+    """单个SSE连接的事件订阅"""
+
+    def __init__(self, matches: Callable[[dict], bool], loop: asyncio.AbstractEventLoop):
+        """
+        初始化订阅
+
+        Args:
+            matches: 事件过滤函数
+            loop: 订阅者所在的事件循环
+        """
+        self.matches = matches
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def _put(self, item: dict):
+        """在订阅者的事件循环中入队，队列已满时丢弃最旧的事件"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+    def deliver(self, item: dict):
+        """线程安全地投递事件"""
+        self.loop.call_soon_threadsafe(self._put, item)
+
+class EventBus:
+    """领域事件总线：数据库提交后发布事件，并分发给本进程的SSE订阅者"""
+
+    def __init__(self, broker: Broker):
+        """
+        初始化事件总线
+
+        Args:
+            broker: 用于跨进程广播的消息代理
+        """
+        self.broker = broker
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        broker.subscribe(EVENT_CHANNEL, self._dispatch)
+
+    def publish(self, item: dict):
+        """
+        发布领域事件
+
+        在事务提交后调用，发布失败（如Redis不可用）只记录日志：数据已经写入，
+        漏推一条事件（客户端重连后可重新拉取状态）比让已成功的写请求返回错误的影响小
+
+        Args:
+            item: 事件内容，必须包含type字段
+        """
+        item.setdefault("timestamp", int(time.time() * 1000))
+        try:
+            self.broker.publish(EVENT_CHANNEL, item)
+        except Exception:
+            logger.exception("发布领域事件失败: %s", item.get("type"))
+
+    def subscribe(self, matches: Callable[[dict], bool]) -> Subscription:
+        """
+        在当前事件循环中创建订阅
+
+        Args:
+            matches: 事件过滤函数
+
+        Returns:
+            Subscription: 订阅对象
+        """
+        subscription = Subscription(matches, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """取消订阅"""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def _dispatch(self, item: dict):
+        """将收到的事件分发给匹配的订阅者"""
+        item = dict(item, id=next(self._sequence))
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(item):
+                subscription.deliver(item)
+
+_event_bus: Optional[EventBus] = None
+_event_bus_lock = threading.Lock()
+
+def get_event_bus() -> EventBus:
+    """
+    获取进程内事件总线单例
+
+    Returns:
+        EventBus: 事件总线
+    """
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                _event_bus = EventBus(get_broker())
+    return _event_bus
+
+def _enum_value(value):
+    return getattr(value, "value", value)
+
+def _changed(obj, *fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+def build_domain_event(obj) -> Optional[dict]:
+    """
+    根据刷新到数据库的对象构建领域事件
+
+    Args:
+        obj: ORM对象
+
+    Returns:
+        Optional[dict]: 事件内容，对象无需发布事件时返回None
+    """
+    if isinstance(obj, Task) and _changed(obj, "status"):
+        return {
+            "type": "task.status",
+            "task_id": obj.id,
+            "status": _enum_value(obj.status),
+            "car_number": obj.assigned_car_number,
+        }
+    if isinstance(obj, Express) and _changed(obj, "status"):
+        return {
+            "type": "express.status",
+            "express_id": obj.id,
+            "tracking_number": obj.tracking_number,
+            "status": _enum_value(obj.status),
+            "user_id": obj.recipient_user_id,
+            "task_id": obj.task_id,
+        }
+    if isinstance(obj, Car) and _changed(obj, *CAR_EVENT_FIELDS):
+        return {
+            "type": "car.status",
+            "car_number": obj.car_number,
+            "task_status": _enum_value(obj.task_status),
+            "current_task_id": obj.current_task_id,
+            "current_latitude": obj.current_latitude,
+            "current_longitude": obj.current_longitude,
+            "current_speed": obj.current_speed,
+            "battery_level": obj.battery_level,
+        }
+    return None
+
+def queue_domain_event(session: Session, item: dict):
+    """
+    登记待发布的事件，事务提交后发布，回滚时丢弃
+
+    Args:
+        session: 数据库会话
+        item: 事件内容，必须包含type字段
+    """
+    session.info.setdefault("pending_domain_events", []).append(item)
+
+@event.listens_for(Session, "after_flush")
+def _collect_domain_events(session, flush_context):
+    """刷新后收集状态变更事件，待事务提交后发布"""
+    for obj in itertools.chain(session.new, session.dirty):
+        item = build_domain_event(obj)
+        if item is not None:
+            queue_domain_event(session, item)
+
+@event.listens_for(Session, "after_commit")
+def _publish_domain_events(session):
+    """事务提交后发布收集到的事件（保存点提交时不发布）"""
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop("pending_domain_events", None)
+    if pending:
+        bus = get_event_bus()
+        for item in pending:
+            bus.publish(item)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_domain_events(session):
+    """事务回滚时丢弃未发布的事件"""
+    if session.in_nested_transaction():
+        return
+    session.info.pop("pending_domain_events", None)
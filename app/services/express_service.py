@@ -0,0 +1,68 @@
+from typing import Callable, List, Optional
+from sqlalchemy.orm import Session
+from app.models.express import Express
+from app.schemas.express import ExpressImportItem, ExpressImportResult
+
+ProgressCallback = Callable[[int, int], None]
+
+class ExpressService:
+    """快递服务类"""
+
+    # 批量导入时每批处理的条目数
+    IMPORT_CHUNK_SIZE = 500
+
+    def __init__(self, db: Session):
+        """
+        初始化快递服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def bulk_import(self, items: List[ExpressImportItem], progress: Optional[ProgressCallback] = None) -> ExpressImportResult:
+        """
+        批量导入快递
+
+        按批次用一次IN查询检查单号是否已存在，每批提交一次
+
+        Args:
+            items: 待导入的快递列表
+            progress: 进度回调，参数为(已处理条目数, 总条目数)
+
+        Returns:
+            ExpressImportResult: 导入结果
+        """
+        total = len(items)
+        created = 0
+        skipped: List[str] = []
+        seen = set()
+
+        for start in range(0, total, self.IMPORT_CHUNK_SIZE):
+            chunk = items[start:start + self.IMPORT_CHUNK_SIZE]
+            numbers = [item.tracking_number for item in chunk]
+            existing = {
+                number for (number,) in self.db.query(Express.tracking_number).filter(
+                    Express.tracking_number.in_(numbers)
+                )
+            }
+
+            new_rows = []
+            for item in chunk:
+                if item.tracking_number in existing or item.tracking_number in seen:
+                    skipped.append(item.tracking_number)
+                    continue
+                seen.add(item.tracking_number)
+                new_rows.append(Express(**item.model_dump()))
+
+            self.db.add_all(new_rows)
+            self.db.commit()
+            created += len(new_rows)
+            if progress:
+                progress(min(start + len(chunk), total), total)
+
+        return ExpressImportResult(
+            created=created,
+            skipped=len(skipped),
+            skipped_tracking_numbers=skipped
+        )
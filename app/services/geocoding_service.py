@@ -0,0 +1,285 @@
+import csv
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.core.config import get_settings
+from app.models.express import Express
+from app.models.geocode_cache import GeocodeCache
+from app.services.invalidation_service import invalidation_bus
+from app.utils.address import normalize_address, address_hash
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]
+
+class GeocoderBackend:
+    """地理编码后端基类，子类实现geocode方法"""
+
+    name = "base"
+
+    def geocode(self, normalized_address: str) -> Optional[Coordinates]:
+        """
+        将规范化地址解析为坐标
+
+        Args:
+            normalized_address: 规范化后的地址
+
+        Returns:
+            Optional[Coordinates]: (纬度, 经度)，无法解析时返回None
+        """
+        raise NotImplementedError
+
+class GazetteerGeocoder(GeocoderBackend):
+    """基于本地地名表文件的离线地理编码后端"""
+
+    name = "gazetteer"
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        加载地名表
+
+        地名表为CSV文件，包含address、latitude、longitude三列；仓库中的data/gazetteer.csv只有表头，
+        部署时需用所服务区域的地名数据替换，否则所有地址都无法解析
+
+        Args:
+            path: 地名表文件路径，默认使用配置的GAZETTEER_PATH，文件不存在时地名表为空
+        """
+        path = path or get_settings().gazetteer_path
+        self.path = path
+        self.entries: Dict[str, Coordinates] = {}
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    normalized = normalize_address(row["address"])
+                    if normalized:
+                        self.entries[normalized] = (float(row["latitude"]), float(row["longitude"]))
+        if not self.entries:
+            logger.warning("地名表%s不存在或为空，离线地理编码无法解析任何地址", path)
+
+    def geocode(self, normalized_address: str) -> Optional[Coordinates]:
+        """
+        精确匹配地名表，未命中时按词逐级截短地址匹配最长前缀（如楼栋级条目）
+        """
+        tokens = normalized_address.split(" ")
+        for end in range(len(tokens), 0, -1):
+            coordinates = self.entries.get(" ".join(tokens[:end]))
+            if coordinates is not None:
+                return coordinates
+        return None
+
+class NominatimGeocoder(GeocoderBackend):
+    """基于geopy Nominatim的在线地理编码后端"""
+
+    name = "nominatim"
+
+    def __init__(self, user_agent: str = "last-mile-backend", timeout: int = 5):
+        from geopy.geocoders import Nominatim
+
+        self._client = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, normalized_address: str) -> Optional[Coordinates]:
+        location = self._client.geocode(normalized_address)
+        if location is None:
+            return None
+        return (location.latitude, location.longitude)
+
+GEOCODER_BACKENDS = {
+    GazetteerGeocoder.name: GazetteerGeocoder,
+    NominatimGeocoder.name: NominatimGeocoder,
+}
+
+_backend: Optional[GeocoderBackend] = None
+_geocode_lru: Optional[LRUCache] = None
+_lock = threading.Lock()
+
+def get_geocoder_backend() -> GeocoderBackend:
+    """
+    获取按GEOCODER_BACKEND配置创建的地理编码后端（进程内单例）
+
+    Returns:
+        GeocoderBackend: 地理编码后端
+    """
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                name = get_settings().geocoder_backend
+                if name not in GEOCODER_BACKENDS:
+                    raise ValueError(f"未知的地理编码后端 {name}")
+                _backend = GEOCODER_BACKENDS[name]()
+    return _backend
+
+def get_geocode_cache() -> LRUCache:
+    """
+    获取进程内共享的LRU缓存（规范化地址哈希 -> 坐标），位于数据库缓存表之前
+
+    Returns:
+        LRUCache: 地理编码缓存
+    """
+    global _geocode_lru
+    if _geocode_lru is None:
+        with _lock:
+            if _geocode_lru is None:
+                _geocode_lru = LRUCache(get_settings().geocode_cache_size)
+    return _geocode_lru
+
+def _evict_geocodes(address_hashes):
+    """数据库缓存表中的坐标被修改或删除时，从进程内缓存中移除"""
+    if _geocode_lru is not None:
+        for hashed in address_hashes:
+            _geocode_lru.pop(hashed)
+
+invalidation_bus.register(GeocodeCache, _evict_geocodes, key="address_hash")
+
+class GeocodingService:
+    """地址地理编码服务类，依次查询LRU缓存、数据库缓存表和地理编码后端"""
+
+    def __init__(self, db: Session, backend: Optional[GeocoderBackend] = None, cache: Optional[LRUCache] = None):
+        """
+        初始化地理编码服务
+
+        Args:
+            db: 数据库会话
+            backend: 地理编码后端，默认使用配置的后端
+            cache: 进程内缓存，默认使用模块级共享缓存
+        """
+        self.db = db
+        self.backend = backend or get_geocoder_backend()
+        self.cache = cache if cache is not None else get_geocode_cache()
+
+    def geocode(self, address: Any) -> Optional[Coordinates]:
+        """
+        解析地址坐标
+
+        Args:
+            address: 地址（字符串、列表或字典）
+
+        Returns:
+            Optional[Coordinates]: (纬度, 经度)，无法解析时返回None
+        """
+        normalized = normalize_address(address)
+        if not normalized:
+            return None
+        return self._geocode_normalized(normalized, address_hash(normalized))
+
+    def resolve_express(self, express: Express) -> Optional[Coordinates]:
+        """
+        解析快递收件地址坐标并保存在快递记录上
+
+        收件地址未变化且已有坐标时直接返回，不会重复地理编码
+
+        Args:
+            express: 快递对象
+
+        Returns:
+            Optional[Coordinates]: (纬度, 经度)，无法解析时返回None
+        """
+        normalized = normalize_address(express.recipient_address)
+        if not normalized:
+            return None
+        hashed = address_hash(normalized)
+        if express.address_hash == hashed and express.recipient_latitude is not None:
+            return (express.recipient_latitude, express.recipient_longitude)
+
+        coordinates = self._geocode_normalized(normalized, hashed)
+        express.address_hash = hashed
+        express.geocoded_at = datetime.now()
+        if coordinates is not None:
+            express.recipient_latitude, express.recipient_longitude = coordinates
+        self.db.commit()
+        return coordinates
+
+    def resolve_pending_express(self, limit: int = 500) -> int:
+        """
+        批量解析尚无坐标且未解析过的快递收件地址
+
+        同一批次内的相同地址只解析一次，数据库缓存通过一次IN查询预取；
+        无法解析的快递记录解析时间，之后的批次不再选取（否则会占满批次并反复请求后端），需要时调用resolve_express重新解析
+
+        Args:
+            limit: 单批处理的快递数量上限
+
+        Returns:
+            int: 成功解析坐标的快递数量
+        """
+        pending = self.db.query(Express).filter(
+            Express.recipient_latitude.is_(None),
+            Express.geocoded_at.is_(None)
+        ).limit(limit).all()
+
+        now = datetime.now()
+        groups: Dict[str, List[Express]] = {}
+        normalized_by_hash: Dict[str, str] = {}
+        for express in pending:
+            express.geocoded_at = now
+            normalized = normalize_address(express.recipient_address)
+            if not normalized:
+                continue
+            hashed = address_hash(normalized)
+            groups.setdefault(hashed, []).append(express)
+            normalized_by_hash[hashed] = normalized
+
+        uncached = [hashed for hashed in groups if hashed not in self.cache]
+        if uncached:
+            rows = self.db.query(GeocodeCache).filter(
+                GeocodeCache.address_hash.in_(uncached)
+            ).all()
+            for row in rows:
+                self.cache.set(row.address_hash, (row.latitude, row.longitude))
+
+        resolved = 0
+        for hashed, items in groups.items():
+            coordinates = self._geocode_normalized(normalized_by_hash[hashed], hashed)
+            for express in items:
+                express.address_hash = hashed
+                if coordinates is not None:
+                    express.recipient_latitude, express.recipient_longitude = coordinates
+                    resolved += 1
+
+        self.db.commit()
+        return resolved
+
+    def _geocode_normalized(self, normalized: str, hashed: str) -> Optional[Coordinates]:
+        """
+        按LRU缓存、数据库缓存表、地理编码后端的顺序解析坐标
+        """
+        coordinates = self.cache.get(hashed)
+        if coordinates is not None:
+            return coordinates
+
+        row = self.db.query(GeocodeCache).filter(
+            GeocodeCache.address_hash == hashed
+        ).first()
+        if row:
+            coordinates = (row.latitude, row.longitude)
+            self.cache.set(hashed, coordinates)
+            return coordinates
+
+        coordinates = self.backend.geocode(normalized)
+        if coordinates is None:
+            return None
+
+        self._store(normalized, hashed, coordinates)
+        self.cache.set(hashed, coordinates)
+        return coordinates
+
+    def _store(self, normalized: str, hashed: str, coordinates: Coordinates):
+        """
+        写入数据库缓存表，并发写入同一地址时忽略唯一约束冲突
+        """
+        try:
+            with self.db.begin_nested():
+                self.db.add(GeocodeCache(
+                    address_hash=hashed,
+                    normalized_address=normalized[:500],
+                    latitude=coordinates[0],
+                    longitude=coordinates[1],
+                    provider=self.backend.name
+                ))
+        except IntegrityError:
+            pass
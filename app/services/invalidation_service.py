@@ -0,0 +1,156 @@
+# 跨进程缓存失效总线
+# 各服务的进程内缓存通过register登记关心的模型及缓存键对应的字段；
+# 数据库事务提交后，本事务修改过的已登记记录（模型 -> 键集合）先在本进程内分发，再通过消息代理广播到其他工作进程/节点，
+# 其他进程收到后调用同样的回调使自己的缓存失效。事务回滚时丢弃收集到的变更
+import itertools
+import logging
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.utils.pubsub import Broker, get_broker
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache-invalidation"
+# 事务内收集的变更在session.info中的键
+PENDING_KEY = "pending_invalidations"
+
+# 失效回调：参数为失效的缓存键集合
+InvalidationCallback = Callable[[Set], None]
+
+class InvalidationBus:
+    """缓存失效总线"""
+
+    def __init__(self, broker: Optional[Broker] = None):
+        """
+        初始化失效总线
+
+        Args:
+            broker: 消息代理，默认在首次使用时按PUBSUB_BACKEND配置获取
+        """
+        # 本进程的标识，用于忽略广播回来的本进程消息（本进程的变更已在提交时直接分发）
+        self.origin = uuid.uuid4().hex
+        self._broker: Optional[Broker] = None
+        self._key_attributes: Dict[str, str] = {}
+        self._callbacks: Dict[str, List[InvalidationCallback]] = {}
+        self._lock = threading.Lock()
+        if broker is not None:
+            self.connect(broker)
+
+    @property
+    def key_attributes(self) -> Dict[str, str]:
+        """已登记的表名 -> 缓存键字段"""
+        return self._key_attributes
+
+    def register(self, model, callback: InvalidationCallback, key: Optional[str] = None):
+        """
+        登记缓存失效回调
+
+        Args:
+            model: ORM模型类
+            callback: 失效回调，参数为失效的键集合
+            key: 作为缓存键的字段，默认为主键；同一模型的所有回调必须使用相同的字段
+        """
+        entity = model.__tablename__
+        key = key or inspect(model).primary_key[0].key
+        with self._lock:
+            if self._key_attributes.setdefault(entity, key) != key:
+                raise ValueError(f"{entity} 已按 {self._key_attributes[entity]} 登记缓存失效")
+            self._callbacks.setdefault(entity, []).append(callback)
+
+    def connect(self, broker: Optional[Broker] = None) -> Broker:
+        """
+        订阅消息代理上的失效广播（重复调用无副作用）
+
+        Args:
+            broker: 消息代理，默认按PUBSUB_BACKEND配置获取
+
+        Returns:
+            Broker: 已订阅的消息代理
+        """
+        if self._broker is None:
+            with self._lock:
+                if self._broker is None:
+                    broker = broker or get_broker()
+                    broker.subscribe(INVALIDATION_CHANNEL, self._receive)
+                    self._broker = broker
+        return self._broker
+
+    def publish(self, changes: Dict[str, Set]):
+        """
+        使本进程和其他进程中的缓存失效
+
+        在事务提交后调用，广播失败（如Redis不可用）只记录日志：数据已经写入，
+        其他进程的缓存暂时保持旧数据比让已成功的写请求返回错误的影响小
+
+        Args:
+            changes: 表名 -> 失效的键集合
+        """
+        self._dispatch(changes)
+        try:
+            self.connect().publish(INVALIDATION_CHANNEL, {
+                "origin": self.origin,
+                "changes": {entity: list(keys) for entity, keys in changes.items()},
+            })
+        except Exception:
+            logger.exception("广播缓存失效失败，其他进程的缓存可能保持旧数据: %s", list(changes))
+
+    def _receive(self, message: dict):
+        if message.get("origin") == self.origin:
+            return
+        self._dispatch({entity: set(keys) for entity, keys in message.get("changes", {}).items()})
+
+    def _dispatch(self, changes: Dict[str, Set]):
+        for entity, keys in changes.items():
+            for callback in self._callbacks.get(entity, ()):
+                try:
+                    callback(keys)
+                except Exception:
+                    logger.exception("使 %s 的缓存失效失败", entity)
+
+invalidation_bus = InvalidationBus()
+
+def mark_changed(session: Session, entity: str, keys: Iterable):
+    """
+    将缓存键加入本事务待失效的集合，用于无法从被修改的记录直接得到的缓存键（例如快递变更影响的路线）
+
+    Args:
+        session: 数据库会话
+        entity: 表名
+        keys: 缓存键
+    """
+    session.info.setdefault(PENDING_KEY, {}).setdefault(entity, set()).update(keys)
+
+def _key_values(obj, attribute: str) -> list:
+    """缓存键的当前值及本次刷新前的旧值（键字段被修改时新旧两个键都要失效）"""
+    history = inspect(obj).attrs[attribute].history
+    return [value for value in itertools.chain([getattr(obj, attribute)], history.deleted or ()) if value is not None]
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    """刷新时记录已登记模型中被新增、修改或删除的记录"""
+    key_attributes = invalidation_bus.key_attributes
+    if not key_attributes:
+        return
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        entity = getattr(obj, "__tablename__", None)
+        attribute = key_attributes.get(entity)
+        if attribute is not None:
+            mark_changed(session, entity, _key_values(obj, attribute))
+
+@event.listens_for(Session, "after_commit")
+def _publish_invalidations(session):
+    """事务提交后广播失效"""
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop(PENDING_KEY, None)
+    if changes:
+        invalidation_bus.publish(changes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop(PENDING_KEY, None)
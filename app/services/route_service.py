@@ -0,0 +1,284 @@
+import itertools
+import threading
+from typing import Callable, Iterable, List, Optional, Set
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.core.config import get_settings
+from app.models.appointment import Appointment
+from app.models.enums import TaskStatus
+from app.models.express import Express
+from app.models.route import Route, RouteStep
+from app.models.task import Task
+from app.schemas.route import RouteDetailResponse, RouteGeometry
+from app.services.invalidation_service import invalidation_bus, mark_changed
+from app.utils.cache import LRUCache
+from app.utils.geo import haversine_km
+from app.utils.polyline import DEFAULT_PRECISION, encode_polyline
+from app.utils.responses import GEOMETRY_JSON, GEOMETRY_POLYLINE, make_etag
+
+ProgressCallback = Callable[[int, int], None]
+
+# 重排步骤顺序时使用的临时偏移量，避免与现有主键冲突
+_STEP_ORDER_OFFSET = 100000
+
+class RoutePayload:
+    """预先序列化的路线详情响应体及其ETag"""
+
+    __slots__ = ("content", "etag")
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.etag = make_etag(content)
+
+class RoutePayloadCache:
+    """
+    按路线缓存预先序列化的路线详情，路线、步骤或步骤关联的快递/预约变更时失效
+
+    每条路线的各种坐标格式（json/polyline）一起缓存、一起失效
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最多缓存的路线数，默认取配置ROUTE_PAYLOAD_CACHE_SIZE
+        """
+        self._maxsize = maxsize
+        self._cache: Optional[LRUCache] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """失效计数，每次失效递增"""
+        return self._generation
+
+    def _entries(self) -> LRUCache:
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = LRUCache(self._maxsize or get_settings().route_payload_cache_size)
+        return self._cache
+
+    def get(self, route_id: int, geometry: str = GEOMETRY_JSON) -> Optional[RoutePayload]:
+        variants = self._entries().get(route_id)
+        return variants.get(geometry) if variants else None
+
+    def store(self, route_id: int, geometry: str, payload: RoutePayload, generation: int):
+        """
+        写入缓存；构建期间发生过失效时丢弃，避免把旧数据写回缓存
+
+        Args:
+            route_id: 路线ID
+            geometry: 坐标格式
+            payload: 路线详情
+            generation: 开始构建时的失效计数
+        """
+        with self._lock:
+            if generation == self._generation:
+                entries = self._entries()
+                entries.set(route_id, {**(entries.get(route_id) or {}), geometry: payload})
+
+    def invalidate(self, route_ids: Iterable[int]):
+        """使指定路线的缓存失效"""
+        entries = self._entries()
+        with self._lock:
+            self._generation += 1
+            for route_id in route_ids:
+                entries.pop(route_id)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._generation += 1
+            if self._cache is not None:
+                self._cache.clear()
+
+route_payload_cache = RoutePayloadCache()
+# 路线本身的变更由失效总线直接收集，步骤/快递/预约的变更由_collect_changed_routes换算为路线ID
+invalidation_bus.register(Route, route_payload_cache.invalidate)
+
+class RouteService:
+    """路线服务类"""
+
+    def __init__(self, db: Session, cache: RoutePayloadCache = route_payload_cache):
+        """
+        初始化路线服务
+
+        Args:
+            db: 数据库会话
+            cache: 路线详情缓存
+        """
+        self.db = db
+        self.cache = cache
+
+    def get_route_detail(self, route_id: int) -> Route:
+        """
+        获取路线及其步骤、步骤对应的快递和预约
+
+        步骤用selectinload批量加载，快递和预约在同一条语句中连接加载，
+        无论步骤多少都只执行两条查询
+
+        Args:
+            route_id: 路线ID
+
+        Returns:
+            Route: 已加载完整关系的路线
+        """
+        route = self.db.execute(
+            select(Route)
+            .where(Route.id == route_id)
+            .options(selectinload(Route.route_steps).options(
+                joinedload(RouteStep.express),
+                joinedload(RouteStep.appointment),
+            ))
+        ).scalar_one_or_none()
+        if not route:
+            raise ValueError(f"路线 {route_id} 不存在")
+        return route
+
+    def is_assigned_to_car(self, route_id: int, car_number: str) -> bool:
+        """
+        路线是否属于分配给该小车且未结束的任务
+
+        Args:
+            route_id: 路线ID
+            car_number: 小车编号
+
+        Returns:
+            bool: 是否已分配给该小车
+        """
+        return self.db.execute(
+            select(Task.id).where(
+                Task.route_id == route_id,
+                Task.assigned_car_number == car_number,
+                Task.status.in_((TaskStatus.pending, TaskStatus.running)),
+            ).limit(1)
+        ).first() is not None
+
+    def get_route_payload(self, route_id: int, geometry: str = GEOMETRY_JSON) -> RoutePayload:
+        """
+        获取预先序列化的路线详情（优先读取缓存）
+
+        Args:
+            route_id: 路线ID
+            geometry: 坐标格式，polyline时步骤坐标合并编码为一条折线
+
+        Returns:
+            RoutePayload: 路线详情响应体及ETag
+        """
+        payload = self.cache.get(route_id, geometry)
+        if payload is not None:
+            return payload
+        generation = self.cache.generation
+        detail = RouteDetailResponse.model_validate(self.get_route_detail(route_id))
+        if geometry == GEOMETRY_POLYLINE:
+            located = [s for s in detail.route_steps if s.pickup_latitude is not None and s.pickup_longitude is not None]
+            detail.geometry = RouteGeometry(
+                precision=DEFAULT_PRECISION,
+                polyline=encode_polyline((s.pickup_latitude, s.pickup_longitude) for s in located),
+                step_orders=[s.step_order for s in located],
+            )
+            content = detail.model_dump_json(
+                exclude={"route_steps": {"__all__": {"pickup_latitude", "pickup_longitude"}}}
+            )
+        else:
+            content = detail.model_dump_json(exclude={"geometry"})
+        payload = RoutePayload(content.encode("utf-8"))
+        self.cache.store(route_id, geometry, payload, generation)
+        return payload
+
+    def optimize_route(self, route_id: int, progress: Optional[ProgressCallback] = None) -> dict:
+        """
+        使用最近邻启发式重排路线步骤并更新总距离
+
+        第一个步骤作为起点保持不变，没有坐标的步骤保持原有相对顺序排在最后
+
+        Args:
+            route_id: 路线ID
+            progress: 进度回调，参数为(已处理步骤数, 总步骤数)
+
+        Returns:
+            dict: 路线ID、优化后的总距离和步骤顺序
+        """
+        route = self.db.query(Route).filter(Route.id == route_id).first()
+        if not route:
+            raise ValueError(f"路线 {route_id} 不存在")
+
+        steps: List[RouteStep] = list(route.route_steps)
+        total = len(steps)
+        located = [s for s in steps if s.pickup_latitude is not None and s.pickup_longitude is not None]
+        unlocated = [s for s in steps if s not in located]
+
+        ordered: List[RouteStep] = []
+        total_distance = 0.0
+        if located:
+            current = located.pop(0)
+            ordered.append(current)
+            while located:
+                nearest = min(located, key=lambda s: haversine_km(
+                    current.pickup_latitude, current.pickup_longitude,
+                    s.pickup_latitude, s.pickup_longitude
+                ))
+                total_distance += haversine_km(
+                    current.pickup_latitude, current.pickup_longitude,
+                    nearest.pickup_latitude, nearest.pickup_longitude
+                )
+                located.remove(nearest)
+                ordered.append(nearest)
+                current = nearest
+                if progress:
+                    progress(len(ordered), total)
+        ordered.extend(unlocated)
+
+        # step_order是主键的一部分，分两次刷新以避免重排过程中的主键冲突
+        for step in ordered:
+            step.step_order += _STEP_ORDER_OFFSET
+        self.db.flush()
+        for index, step in enumerate(ordered, start=1):
+            step.step_order = index
+        route.total_distance = round(total_distance, 3)
+        self.db.commit()
+        if progress:
+            progress(total, total)
+
+        return {
+            "route_id": route_id,
+            "total_distance": route.total_distance,
+            "step_ids": [step.id for step in ordered],
+        }
+
+
+def _previous_values(obj, attribute: str) -> list:
+    """当前值及本次刷新前的旧值"""
+    history = inspect(obj).attrs[attribute].history
+    return [value for value in itertools.chain([getattr(obj, attribute)], history.deleted or ()) if value is not None]
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_routes(session, flush_context):
+    """刷新时将步骤、快递和预约的变更换算为需要失效的路线"""
+    route_ids: Set[int] = set()
+    tracking_numbers: Set[str] = set()
+    appointment_ids: Set[int] = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, RouteStep):
+            route_ids.update(_previous_values(obj, "route_id"))
+        elif isinstance(obj, Express) and obj not in session.new:
+            tracking_numbers.update(_previous_values(obj, "tracking_number"))
+        elif isinstance(obj, Appointment) and obj not in session.new:
+            appointment_ids.add(obj.id)
+
+    # 快递和预约内嵌在路线详情中，需要找出引用它们的路线（直接用连接查询，不触发自动刷新）
+    if tracking_numbers or appointment_ids:
+        conditions = []
+        if tracking_numbers:
+            conditions.append(RouteStep.express_tracking_number.in_(tracking_numbers))
+        if appointment_ids:
+            conditions.append(RouteStep.appointment_id.in_(appointment_ids))
+        route_ids.update(session.connection().execute(
+            select(RouteStep.route_id).where(or_(*conditions)).distinct()
+        ).scalars())
+
+    if route_ids:
+        mark_changed(session, Route.__tablename__, route_ids)
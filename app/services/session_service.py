@@ -4,6 +4,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 import uuid
 import time
+from app.core.config import Settings, get_settings
+from app.core.session_tokens import (
+    RevocationList, decode_session_token, get_revocation_list, is_session_token, issue_session_token
+)
 from app.models.session import UserSession
 from app.models.user import User
 from app.schemas.session import (
@@ -14,19 +18,50 @@ from app.schemas.session import (
 class SessionService:
     """用户会话服务类"""
     
-    # 会话配置常量
-    SESSION_TIMEOUT_MINUTES = 30  # 会话超时时间（分钟）
-    HEARTBEAT_INTERVAL_MINUTES = 5  # 心跳间隔（分钟）
-    MAX_CONCURRENT_SESSIONS = 1  # 最大并发会话数
-    
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, settings: Optional[Settings] = None, revocations: Optional[RevocationList] = None):
         """
         初始化会话服务
         
         Args:
             db: 数据库会话
+            settings: 应用配置，默认使用全局配置
+            revocations: 会话令牌吊销列表，默认使用进程内单例（仅令牌模式使用）
         """
         self.db = db
+        self.settings = settings or get_settings()
+        self._revocations = revocations
+
+    @property
+    def revocations(self) -> RevocationList:
+        """会话令牌吊销列表"""
+        if self._revocations is None:
+            self._revocations = get_revocation_list()
+        return self._revocations
+
+    def _public_session_id(self, session: UserSession) -> str:
+        """返回给客户端的会话标识：令牌模式下为签名令牌，否则为会话ID"""
+        if not self.settings.session_token_mode:
+            return session.session_id
+        return issue_session_token(session.session_id, session.user_id, session.device_id, session.expires_at, self.settings)
+
+    def _resolve_session_id(self, session_id: str) -> Optional[str]:
+        """
+        将客户端传入的会话标识解析为数据库中的会话ID
+
+        签名令牌验签后取出会话ID（不校验过期，过期由数据库中的expires_at判断），签名无效时返回None；
+        关闭令牌模式后之前签发的令牌仍可使用
+        """
+        if not is_session_token(session_id):
+            return session_id
+        claims = decode_session_token(session_id, self.settings, verify_exp=False)
+        return claims.session_id if claims else None
+
+    def _revoke(self, sessions: List[UserSession]):
+        """令牌模式下吊销已终止会话的令牌（在事务提交后调用）"""
+        if not self.settings.session_token_mode:
+            return
+        for session in sessions:
+            self.revocations.revoke(session.session_id, session.expires_at)
     
     def generate_session_id(self) -> str:
         """
@@ -58,7 +93,7 @@ class SessionService:
         
         # 创建新会话
         now = datetime.now()
-        expires_at = now + timedelta(minutes=self.SESSION_TIMEOUT_MINUTES)
+        expires_at = now + timedelta(minutes=self.settings.session_timeout_minutes)
         session_id = self.generate_session_id()
         
         new_session = UserSession(
@@ -76,7 +111,7 @@ class SessionService:
         self.db.refresh(new_session)
         
         return SessionResponse(
-            session_id=new_session.session_id,
+            session_id=self._public_session_id(new_session),
             user_id=new_session.user_id,
             device_id=new_session.device_id,
             start_time=int(new_session.start_time.timestamp() * 1000),
@@ -89,14 +124,12 @@ class SessionService:
         终止指定会话
         
         Args:
-            session_id: 会话ID
+            session_id: 会话ID或会话令牌
             
         Returns:
             SessionTerminationResponse: 终止结果
         """
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
+        session = self.get_session_by_id(session_id)
         
         if not session:
             return SessionTerminationResponse(
@@ -108,6 +141,7 @@ class SessionService:
         # 标记会话为非活跃
         session.is_active = False
         self.db.commit()
+        self._revoke([session])
         
         return SessionTerminationResponse(
             success=True,
@@ -142,6 +176,7 @@ class SessionService:
             session.is_active = False
         
         self.db.commit()
+        self._revoke(sessions_to_terminate)
         
         return SessionTerminationResponse(
             success=True,
@@ -154,14 +189,12 @@ class SessionService:
         处理用户心跳信号
         
         Args:
-            session_id: 会话ID
+            session_id: 会话ID或会话令牌
             
         Returns:
-            HeartbeatResponse: 心跳响应
+            HeartbeatResponse: 心跳响应（令牌模式下携带续期后的令牌）
         """
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
+        session = self.get_session_by_id(session_id)
         
         if not session:
             return HeartbeatResponse(
@@ -185,14 +218,15 @@ class SessionService:
         
         # 更新最后活跃时间和过期时间
         session.last_active_time = now
-        session.expires_at = now + timedelta(minutes=self.SESSION_TIMEOUT_MINUTES)
+        session.expires_at = now + timedelta(minutes=self.settings.session_timeout_minutes)
         self.db.commit()
         
         return HeartbeatResponse(
             success=True,
             session_valid=True,
             server_time=int(time.time() * 1000),
-            message="心跳成功"
+            message="心跳成功",
+            session_id=self._public_session_id(session) if self.settings.session_token_mode else None
         )
     
     def get_user_active_sessions(self, user_id: int) -> List[SessionResponse]:
@@ -232,14 +266,18 @@ class SessionService:
         验证会话是否有效
         
         Args:
-            session_id: 会话ID
+            session_id: 会话ID或会话令牌
             
         Returns:
             SessionValidationResponse: 验证结果
         """
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
+        if self.settings.session_token_mode and is_session_token(session_id):
+            # 令牌模式：验签、检查过期时间和吊销列表，不访问数据库（吊销列表首次使用时加载一次）
+            self.revocations.ensure_loaded(self.db)
+            claims = decode_session_token(session_id, self.settings)
+            return SessionValidationResponse(valid=claims is not None and not self.revocations.is_revoked(claims.session_id))
+
+        session = self.get_session_by_id(session_id)
         
         if not session:
             return SessionValidationResponse(valid=False)
@@ -259,14 +297,12 @@ class SessionService:
         更新会话的最后活跃时间
         
         Args:
-            session_id: 会话ID
+            session_id: 会话ID或会话令牌
             
         Returns:
             ActivityUpdateResponse: 更新结果
         """
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
+        session = self.get_session_by_id(session_id)
         
         if not session or not session.is_active:
             return ActivityUpdateResponse(success=False)
@@ -280,7 +316,7 @@ class SessionService:
         
         # 更新最后活跃时间和过期时间
         session.last_active_time = now
-        session.expires_at = now + timedelta(minutes=self.SESSION_TIMEOUT_MINUTES)
+        session.expires_at = now + timedelta(minutes=self.settings.session_timeout_minutes)
         self.db.commit()
         
         return ActivityUpdateResponse(success=True)
@@ -293,9 +329,9 @@ class SessionService:
             SessionConfigResponse: 超时配置信息
         """
         return SessionConfigResponse(
-            session_timeout=self.SESSION_TIMEOUT_MINUTES * 60 * 1000,  # 转换为毫秒
-            heartbeat_interval=self.HEARTBEAT_INTERVAL_MINUTES * 60 * 1000,  # 转换为毫秒
-            max_concurrent_sessions=self.MAX_CONCURRENT_SESSIONS
+            session_timeout=self.settings.session_timeout_minutes * 60 * 1000,  # 转换为毫秒
+            heartbeat_interval=self.settings.heartbeat_interval_minutes * 60 * 1000,  # 转换为毫秒
+            max_concurrent_sessions=self.settings.max_concurrent_sessions
         )
     
     def _cleanup_expired_sessions(self):
@@ -320,11 +356,14 @@ class SessionService:
         根据会话ID获取会话对象
         
         Args:
-            session_id: 会话ID
+            session_id: 会话ID或会话令牌
             
         Returns:
             Optional[UserSession]: 会话对象或None
         """
+        session_id = self._resolve_session_id(session_id)
+        if session_id is None:
+            return None
         return self.db.query(UserSession).filter(
             UserSession.session_id == session_id
         ).first()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, event, inspect, or_, select
+from sqlalchemy.orm import Session
+from app.core.config import Settings, get_settings
+from app.models.appointment import Appointment
+from app.models.enums import UserRole
+from app.models.express import Express
+from app.models.route import Route, RouteStep
+from app.models.sync_tombstone import SyncTombstone
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.appointment import AppointmentResponse
+from app.schemas.express import ExpressResponse
+from app.schemas.route import RouteResponse, RouteStepResponse
+from app.schemas.sync import SyncChangesResponse, SyncDeletion
+from app.schemas.task import TaskResponse
+
+CURSOR_VERSION = 1
+# 墓碑在游标中的键
+TOMBSTONES_KEY = "deleted"
+
+# 同步集合名 -> (模型, 响应schema, 所属用户列)；所属用户列为None的集合只同步给非客户角色
+SYNC_ENTITIES = {
+    "tasks": (Task, TaskResponse, None),
+    "express": (Express, ExpressResponse, "recipient_user_id"),
+    "routes": (Route, RouteResponse, None),
+    "route_steps": (RouteStep, RouteStepResponse, None),
+    "appointments": (Appointment, AppointmentResponse, "customer_id"),
+}
+_ENTITY_BY_MODEL = {model: name for name, (model, _, _) in SYNC_ENTITIES.items()}
+
+Position = Tuple[datetime, int]
+
+class SyncCursorExpired(ValueError):
+    """游标早于墓碑保留期，客户端需要清空本地数据后全量同步"""
+
+def encode_cursor(positions: Dict[str, Position]) -> str:
+    """
+    将各集合的读取位置编码为不透明游标
+
+    Args:
+        positions: 集合名 -> (updated_at, id)
+
+    Returns:
+        str: 游标
+    """
+    payload = {"v": CURSOR_VERSION, "p": {name: [ts.isoformat(), row_id] for name, (ts, row_id) in positions.items()}}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Position]:
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor生成的游标
+
+    Returns:
+        Dict[str, Position]: 集合名 -> (updated_at, id)
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload.get("v") != CURSOR_VERSION:
+            raise ValueError
+        return {name: (datetime.fromisoformat(ts), int(row_id)) for name, (ts, row_id) in payload["p"].items()}
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, AttributeError, ValueError):
+        raise ValueError("无效的同步游标")
+
+class SyncService:
+    """增量同步服务类"""
+
+    def __init__(self, db: Session, settings: Optional[Settings] = None):
+        """
+        初始化增量同步服务
+
+        Args:
+            db: 数据库会话
+            settings: 应用配置，默认使用全局配置
+        """
+        self.db = db
+        self.settings = settings or get_settings()
+
+    def get_changes(self, user: User, cursor: Optional[str] = None, limit: Optional[int] = None) -> SyncChangesResponse:
+        """
+        获取游标之后变更和删除的记录
+
+        按(updated_at, id)顺序读取，每个集合最多返回limit条；
+        不带游标时返回全部现有记录（分页），不返回历史删除；
+        记录转给其他用户时，原用户（客户）收到该记录的删除
+
+        Args:
+            user: 当前用户，客户只同步自己的快递和预约
+            cursor: 上次同步返回的游标
+            limit: 每个集合的最大返回条数
+
+        Returns:
+            SyncChangesResponse: 变更记录、删除记录和新游标
+        """
+        limit = limit or self.settings.sync_page_size
+        positions = decode_cursor(cursor) if cursor else {}
+        now = datetime.now()
+        # 只读取已稳定的变更，较晚提交的事务不会落到已返回的游标之前
+        upper = now - timedelta(seconds=self.settings.sync_settle_seconds)
+
+        tombstone_position = positions.get(TOMBSTONES_KEY)
+        if cursor and tombstone_position and tombstone_position[0] < now - timedelta(days=self.settings.sync_tombstone_retention_days):
+            raise SyncCursorExpired("同步游标已过期，请重新全量同步")
+
+        changes = {}
+        has_more = False
+        for name, (model, schema, owner_column) in SYNC_ENTITIES.items():
+            if owner_column is None and user.role == UserRole.customer:
+                continue
+            query = select(model).where(model.updated_at < upper)
+            if owner_column is not None and user.role == UserRole.customer:
+                query = query.where(getattr(model, owner_column) == user.id)
+            rows = self._read_after(model, query, positions.get(name), limit)
+            if len(rows) > limit:
+                has_more = True
+                rows = rows[:limit]
+            if rows:
+                positions[name] = (rows[-1].updated_at, rows[-1].id)
+            changes[name] = [schema.model_validate(row) for row in rows]
+
+        # 墓碑读完后位置推进到upper，长期没有删除的游标也不会被误判为过期；
+        # 不带游标的全量同步没有本地数据需要删除，直接从upper开始
+        deleted: List[SyncDeletion] = []
+        positions[TOMBSTONES_KEY] = (upper, 0)
+        if cursor:
+            tombstone_query = select(SyncTombstone).where(SyncTombstone.updated_at < upper)
+            if user.role == UserRole.customer:
+                tombstone_query = tombstone_query.where(SyncTombstone.owner_user_id == user.id)
+            else:
+                # 非客户角色同步全部记录，转移所属用户的记录仍然存在
+                tombstone_query = tombstone_query.where(SyncTombstone.owner_only.is_(False))
+            tombstones = self._read_after(SyncTombstone, tombstone_query, tombstone_position, limit)
+            if len(tombstones) > limit:
+                has_more = True
+                tombstones = tombstones[:limit]
+                positions[TOMBSTONES_KEY] = (tombstones[-1].updated_at, tombstones[-1].id)
+            # 记录转走后又转回该用户时，本次返回的变更晚于墓碑，不再通知删除
+            changed_at = {(name, row.id): row.updated_at for name, rows in changes.items() for row in rows}
+            deleted = [
+                SyncDeletion(entity=t.entity, id=t.entity_id, deleted_at=t.updated_at) for t in tombstones
+                if changed_at.get((t.entity, t.entity_id), t.updated_at) <= t.updated_at
+            ]
+
+        return SyncChangesResponse(**changes, deleted=deleted, cursor=encode_cursor(positions), has_more=has_more)
+
+    def _read_after(self, model, query, position: Optional[Position], limit: int) -> list:
+        """按(updated_at, id)顺序读取位置之后的limit + 1条记录（多读一条用于判断是否还有更多）"""
+        if position is not None:
+            updated_at, row_id = position
+            query = query.where(or_(
+                model.updated_at > updated_at,
+                and_(model.updated_at == updated_at, model.id > row_id),
+            ))
+        return self.db.execute(query.order_by(model.updated_at, model.id).limit(limit + 1)).scalars().all()
+
+    def purge_tombstones(self) -> int:
+        """
+        删除超过保留期的墓碑
+
+        Returns:
+            int: 删除的条数
+        """
+        cutoff = datetime.now() - timedelta(days=self.settings.sync_tombstone_retention_days)
+        deleted = self.db.query(SyncTombstone).filter(SyncTombstone.updated_at < cutoff).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+@event.listens_for(Session, "before_flush")
+def _record_tombstones(session, flush_context, instances):
+    """删除同步集合中的记录、或记录转给其他用户时写入墓碑（与修改在同一事务中提交）"""
+    for obj in list(session.deleted):
+        name = _ENTITY_BY_MODEL.get(type(obj))
+        if name is None or obj.id is None:
+            continue
+        owner_column = SYNC_ENTITIES[name][2]
+        session.add(SyncTombstone(
+            entity=name,
+            entity_id=obj.id,
+            owner_user_id=getattr(obj, owner_column) if owner_column else None,
+        ))
+    for obj in list(session.dirty):
+        name = _ENTITY_BY_MODEL.get(type(obj))
+        owner_column = SYNC_ENTITIES[name][2] if name else None
+        if owner_column is None or obj.id is None:
+            continue
+        previous = inspect(obj).attrs[owner_column].history.deleted
+        if previous and previous[0] is not None and previous[0] != getattr(obj, owner_column):
+            session.add(SyncTombstone(entity=name, entity_id=obj.id, owner_user_id=previous[0], owner_only=True))
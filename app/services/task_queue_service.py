@@ -0,0 +1,156 @@
+# 任务队列
+# 多个小车/调度进程并发领取待处理任务：
+#   领取用一条UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED LIMIT 1) RETURNING完成，
+#   并发领取者跳过已被其他事务锁定的行而不是排队等待，同一任务不会被领取两次
+#   领取时设置租约，小车需在到期前续约；租约到期的任务只由定时任务退回待处理（领取时不做全表UPDATE，避免队列为空时每个领取者都执行一次）
+# 状态变更用批量UPDATE完成，不经过ORM对象，任务状态事件和看板计数手动登记，随事务提交生效
+# SQLite不支持FOR UPDATE（写事务本身串行），同一条语句在SQLite上同样是原子的
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import Settings, get_settings
+from app.models.enums import TaskStatus
+from app.models.task import Task
+from app.services.dashboard_service import record_transitions
+from app.services.event_service import queue_domain_event
+
+class TaskQueueService:
+    """任务队列服务"""
+
+    def __init__(self, db: Session, settings: Optional[Settings] = None):
+        """
+        初始化服务
+
+        Args:
+            db: 数据库会话
+            settings: 应用配置，默认使用全局配置
+        """
+        self.db = db
+        self.settings = settings or get_settings()
+
+    def _lease_expiry(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.settings.task_lease_seconds)
+
+    def _claimable(self, car_number: str):
+        """可领取的任务：未分配或预先分配给该小车的待处理任务"""
+        return and_(
+            Task.status == TaskStatus.pending,
+            or_(Task.assigned_car_number.is_(None), Task.assigned_car_number == car_number),
+        )
+
+    def _publish(self, tasks: List[Task]):
+        for task in tasks:
+            queue_domain_event(self.db, {
+                "type": "task.status",
+                "task_id": task.id,
+                "status": task.status.value,
+                "car_number": task.assigned_car_number,
+            })
+
+    def _execute(self, statement, previous_status: TaskStatus) -> List[Task]:
+        """执行带RETURNING的批量UPDATE并提交，返回更新后的任务（WHERE条件限定了更新前的状态）"""
+        try:
+            tasks = list(self.db.scalars(statement.returning(Task), execution_options={"synchronize_session": False}))
+            self._publish(tasks)
+            record_transitions(self.db, "tasks", [(previous_status, task.status) for task in tasks])
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError("小车不存在")
+        return tasks
+
+    def claim(self, car_number: str) -> Optional[Task]:
+        """
+        领取下一个可领取的任务（一次数据库往返），设置为进行中并分配给该小车
+
+        Args:
+            car_number: 小车编号
+
+        Returns:
+            Optional[Task]: 领取到的任务，没有可领取的任务时返回None
+        """
+        now = datetime.now()
+        claimable = self._claimable(car_number)
+        candidate = (
+            select(Task.id).where(claimable).order_by(Task.id).limit(1)
+            .with_for_update(skip_locked=True).scalar_subquery()
+        )
+        # 外层重复判断条件：READ COMMITTED下行被并发修改后重新检查
+        statement = update(Task).where(Task.id == candidate, claimable).values(
+            status=TaskStatus.running,
+            assigned_car_number=car_number,
+            lease_expires_at=self._lease_expiry(now),
+            updated_at=now,
+        )
+        tasks = self._execute(statement, TaskStatus.pending)
+        return tasks[0] if tasks else None
+
+    def renew_lease(self, task_id: int, car_number: str) -> Optional[Task]:
+        """
+        续约（小车仍在执行任务时定期调用）
+
+        Args:
+            task_id: 任务ID
+            car_number: 小车编号
+
+        Returns:
+            Optional[Task]: 续约后的任务，任务已不属于该小车时返回None
+        """
+        now = datetime.now()
+        statement = update(Task).where(
+            Task.id == task_id, Task.assigned_car_number == car_number, Task.status == TaskStatus.running
+        ).values(lease_expires_at=self._lease_expiry(now), updated_at=now)
+        # 续约不改变状态，不发布事件
+        tasks = list(self.db.scalars(statement.returning(Task), execution_options={"synchronize_session": False}))
+        self.db.commit()
+        return tasks[0] if tasks else None
+
+    def complete(self, task_id: int, car_number: str) -> Optional[Task]:
+        """
+        完成任务
+
+        Args:
+            task_id: 任务ID
+            car_number: 小车编号
+
+        Returns:
+            Optional[Task]: 完成的任务，任务已不属于该小车时返回None
+        """
+        now = datetime.now()
+        statement = update(Task).where(
+            Task.id == task_id, Task.assigned_car_number == car_number, Task.status == TaskStatus.running
+        ).values(status=TaskStatus.completed, completed_at=now, lease_expires_at=None, updated_at=now)
+        tasks = self._execute(statement, TaskStatus.running)
+        return tasks[0] if tasks else None
+
+    def release(self, task_id: int, car_number: str) -> Optional[Task]:
+        """
+        放弃任务，退回待处理（不再保留分配的小车）
+
+        Args:
+            task_id: 任务ID
+            car_number: 小车编号
+
+        Returns:
+            Optional[Task]: 退回的任务，任务已不属于该小车时返回None
+        """
+        statement = update(Task).where(
+            Task.id == task_id, Task.assigned_car_number == car_number, Task.status == TaskStatus.running
+        ).values(status=TaskStatus.pending, assigned_car_number=None, lease_expires_at=None, updated_at=datetime.now())
+        tasks = self._execute(statement, TaskStatus.running)
+        return tasks[0] if tasks else None
+
+    def requeue_expired(self) -> int:
+        """
+        将租约已到期的进行中任务退回待处理
+
+        Returns:
+            int: 退回的任务数
+        """
+        now = datetime.now()
+        statement = update(Task).where(
+            Task.status == TaskStatus.running, Task.lease_expires_at < now
+        ).values(status=TaskStatus.pending, assigned_car_number=None, lease_expires_at=None, updated_at=now)
+        return len(self._execute(statement, TaskStatus.running))
@@ -0,0 +1,159 @@
+# 用户服务
+# 批量创建用户（新小区入驻时一次导入数千个账号）：
+#   按批次用一条查询同时检查用户名和邮箱是否已存在，批次内重复的行同样跳过
+#   密码哈希（bcrypt，CPU密集）分发到进程池并行计算
+#   新用户用一条executemany INSERT写入并返回ID，每批提交一次
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import Settings, get_settings
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.schemas.user import UserCreate, UserProvisionResult, UserProvisionRowResult
+
+ProgressCallback = Callable[[int, int], None]
+
+CREATED = "created"
+DUPLICATE_USERNAME = "duplicate_username"
+DUPLICATE_EMAIL = "duplicate_email"
+INVALID = "invalid"
+
+class UserService:
+    """用户服务类"""
+
+    # 批量创建时每批处理的行数
+    PROVISION_CHUNK_SIZE = 500
+    # 少于该数量的密码直接在当前进程计算，不值得启动进程池
+    PARALLEL_HASH_MIN = 8
+
+    def __init__(self, db: Session, settings: Optional[Settings] = None, hasher: Callable[[str], str] = get_password_hash):
+        """
+        初始化用户服务
+
+        Args:
+            db: 数据库会话
+            settings: 应用配置，默认使用全局配置
+            hasher: 密码哈希函数（需为模块级函数，以便传给子进程）
+        """
+        self.db = db
+        self.settings = settings or get_settings()
+        self.hasher = hasher
+
+    def _hash_executor(self) -> Executor:
+        """
+        创建计算密码哈希的进程池
+
+        Celery prefork的工作进程是守护进程，不能再创建子进程，此时改用线程池（bcrypt计算时释放GIL）
+        """
+        workers = self.settings.password_hash_workers or os.cpu_count() or 1
+        if multiprocessing.current_process().daemon:
+            return ThreadPoolExecutor(max_workers=workers)
+        return ProcessPoolExecutor(max_workers=workers)
+
+    def bulk_provision(self, rows: List[dict], progress: Optional[ProgressCallback] = None) -> UserProvisionResult:
+        """
+        批量创建用户
+
+        Args:
+            rows: 用户数据（字段同UserCreate），逐行校验，无效的行记为invalid
+            progress: 进度回调，参数为(已处理行数, 总行数)
+
+        Returns:
+            UserProvisionResult: 创建数量及逐行结果
+        """
+        total = len(rows)
+        results: List[Optional[UserProvisionRowResult]] = [None] * total
+        valid: List[tuple] = []
+        for index, row in enumerate(rows):
+            try:
+                valid.append((index, UserCreate.model_validate(row)))
+            except ValidationError as e:
+                username = row.get("username") if isinstance(row, dict) else None
+                results[index] = UserProvisionRowResult(
+                    row=index, username=username, status=INVALID,
+                    detail="; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                )
+
+        seen_usernames, seen_emails = set(), set()
+        executor = self._hash_executor() if len(valid) >= self.PARALLEL_HASH_MIN else None
+        try:
+            for start in range(0, len(valid), self.PROVISION_CHUNK_SIZE):
+                chunk = valid[start:start + self.PROVISION_CHUNK_SIZE]
+                self._provision_chunk(chunk, results, seen_usernames, seen_emails, executor)
+                if progress:
+                    progress(min(start + len(chunk), len(valid)), len(valid))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        created = sum(1 for result in results if result.status == CREATED)
+        return UserProvisionResult(created=created, skipped=total - created, rows=results)
+
+    def _existing(self, chunk: List[tuple]) -> tuple:
+        """一条查询找出批次中已被占用的用户名和邮箱"""
+        usernames = [user.username for _, user in chunk]
+        emails = [user.email for _, user in chunk if user.email]
+        condition = User.username.in_(usernames)
+        if emails:
+            condition = or_(condition, User.email.in_(emails))
+        taken_usernames, taken_emails = set(), set()
+        for username, email in self.db.execute(select(User.username, User.email).where(condition)):
+            taken_usernames.add(username)
+            if email:
+                taken_emails.add(email)
+        return taken_usernames, taken_emails
+
+    def _provision_chunk(self, chunk, results, seen_usernames, seen_emails, executor: Optional[Executor], hashes: Optional[Dict[int, str]] = None):
+        retrying = hashes is not None
+        taken_usernames, taken_emails = self._existing(chunk)
+        accepted = []
+        for index, user in chunk:
+            if user.username in taken_usernames or user.username in seen_usernames:
+                results[index] = UserProvisionRowResult(row=index, username=user.username, status=DUPLICATE_USERNAME, detail="用户已被注册")
+            elif user.email and (user.email in taken_emails or user.email in seen_emails):
+                results[index] = UserProvisionRowResult(row=index, username=user.username, status=DUPLICATE_EMAIL, detail="邮箱已被注册")
+            else:
+                accepted.append((index, user))
+                seen_usernames.add(user.username)
+                if user.email:
+                    seen_emails.add(user.email)
+        if not accepted:
+            return
+
+        if hashes is None:
+            passwords = [user.password for _, user in accepted]
+            if executor is None:
+                hashed = [self.hasher(password) for password in passwords]
+            else:
+                hashed = list(executor.map(self.hasher, passwords, chunksize=max(1, len(passwords) // 64)))
+            hashes = {index: value for (index, _), value in zip(accepted, hashed)}
+
+        values = [
+            {
+                **user.model_dump(exclude={"password"}),
+                "hashed_password": hashes[index],
+            }
+            for index, user in accepted
+        ]
+        try:
+            inserted = self.db.execute(insert(User).returning(User.id, User.username), values).all()
+            self.db.commit()
+        except IntegrityError:
+            # 检查之后有其他请求注册了相同的用户名/邮箱：重新检查该批次（已计算的哈希沿用）
+            self.db.rollback()
+            if retrying:
+                raise
+            for _, user in accepted:
+                seen_usernames.discard(user.username)
+                seen_emails.discard(user.email)
+            self._provision_chunk(accepted, results, seen_usernames, seen_emails, None, hashes)
+            return
+
+        ids = {username: user_id for user_id, username in inserted}
+        for index, user in accepted:
+            results[index] = UserProvisionRowResult(row=index, username=user.username, status=CREATED, user_id=ids[user.username])
@@ -0,0 +1,57 @@
+# 地址处理工具
+# 将自由格式的地址（字符串、列表或字典JSON）规范化为统一的文本和哈希
+import hashlib
+import re
+import unicodedata
+from typing import Any
+
+_PUNCTUATION_RE = re.compile(r"[,，;；、.。#＃/\\|()（）\[\]【】\"'“”‘’]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _flatten_address(address: Any) -> list:
+    """将地址JSON展开为字符串片段列表"""
+    if address is None:
+        return []
+    if isinstance(address, dict):
+        # 按键排序保证相同内容的字典得到相同结果
+        parts = []
+        for key in sorted(address):
+            parts.extend(_flatten_address(address[key]))
+        return parts
+    if isinstance(address, (list, tuple)):
+        parts = []
+        for item in address:
+            parts.extend(_flatten_address(item))
+        return parts
+    return [str(address)]
+
+def normalize_address(address: Any) -> str:
+    """
+    规范化地址文本
+
+    统一全角/半角字符、大小写、标点和空白，使同一地址的不同写法得到相同结果
+
+    Args:
+        address: 地址（字符串、列表或字典）
+
+    Returns:
+        str: 规范化后的地址，无法解析时返回空字符串
+    """
+    tokens = []
+    for part in _flatten_address(address):
+        text = unicodedata.normalize("NFKC", part).lower()
+        text = _PUNCTUATION_RE.sub(" ", text)
+        tokens.extend(_WHITESPACE_RE.split(text.strip()))
+    return " ".join(token for token in tokens if token)
+
+def address_hash(normalized_address: str) -> str:
+    """
+    计算规范化地址的哈希值
+
+    Args:
+        normalized_address: 规范化后的地址
+
+    Returns:
+        str: SHA-256十六进制摘要
+    """
+    return hashlib.sha256(normalized_address.encode("utf-8")).hexdigest()
@@ -0,0 +1,23 @@
+# 地理计算工具
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    计算两点间的球面距离
+
+    Args:
+        lat1: 起点纬度
+        lon1: 起点经度
+        lat2: 终点纬度
+        lon2: 终点经度
+
+    Returns:
+        float: 距离(km)
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
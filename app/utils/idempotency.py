@@ -0,0 +1,154 @@
+# 幂等键存储
+# 每个幂等键对应一条记录：处理中（占位）或已完成（保存的响应），带过期时间
+# 提供进程内存储（有界LRU）和基于Redis的共享存储（多工作进程共享同一份记录）
+import base64
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from app.core.config import get_settings
+from app.utils.cache import LRUCache
+
+@dataclass
+class IdempotencyRecord:
+    """幂等键记录，status为None表示请求仍在处理中"""
+    fingerprint: str
+    status: Optional[int] = None
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+
+    @property
+    def completed(self) -> bool:
+        """是否已保存响应"""
+        return self.status is not None
+
+    def dumps(self) -> str:
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode("ascii"),
+        })
+
+    @classmethod
+    def loads(cls, raw) -> "IdempotencyRecord":
+        data = json.loads(raw)
+        return cls(
+            fingerprint=data["fingerprint"],
+            status=data["status"],
+            headers=[tuple(header) for header in data["headers"]],
+            body=base64.b64decode(data["body"]),
+        )
+
+class IdempotencyStore:
+    """幂等键存储基类"""
+
+    def begin(self, key: str, fingerprint: str, lock_seconds: float) -> Optional[IdempotencyRecord]:
+        """
+        原子地为幂等键写入处理中占位记录
+
+        Args:
+            key: 幂等键
+            fingerprint: 请求内容指纹
+            lock_seconds: 占位记录的有效期（处理进程崩溃后占位自动失效）
+
+        Returns:
+            Optional[IdempotencyRecord]: 占位成功返回None，键已存在时返回已有记录
+        """
+        raise NotImplementedError
+
+    def complete(self, key: str, record: IdempotencyRecord, ttl_seconds: float):
+        """
+        保存请求的响应
+
+        Args:
+            key: 幂等键
+            record: 包含响应的记录
+            ttl_seconds: 记录的有效期
+        """
+        raise NotImplementedError
+
+    def release(self, key: str):
+        """
+        删除占位记录（请求失败时调用，允许客户端重试）
+
+        Args:
+            key: 幂等键
+        """
+        raise NotImplementedError
+
+class LocalIdempotencyStore(IdempotencyStore):
+    """进程内幂等键存储，单进程部署时使用"""
+
+    def __init__(self, maxsize: int = 10000):
+        """
+        初始化存储
+
+        Args:
+            maxsize: 最多保留的记录数，超出时淘汰最久未使用的记录
+        """
+        self._records = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, fingerprint: str, lock_seconds: float) -> Optional[IdempotencyRecord]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._records.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            self._records.set(key, (now + lock_seconds, IdempotencyRecord(fingerprint)))
+        return None
+
+    def complete(self, key: str, record: IdempotencyRecord, ttl_seconds: float):
+        self._records.set(key, (time.monotonic() + ttl_seconds, record))
+
+    def release(self, key: str):
+        self._records.pop(key)
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """基于Redis的共享幂等键存储，重试请求落到其他工作进程时也能命中"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "idempotency:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url or get_settings().redis_url)
+        self._prefix = prefix
+
+    def begin(self, key: str, fingerprint: str, lock_seconds: float) -> Optional[IdempotencyRecord]:
+        key = self._prefix + key
+        placeholder = IdempotencyRecord(fingerprint).dumps()
+        if self._redis.set(key, placeholder, nx=True, px=int(lock_seconds * 1000)):
+            return None
+        raw = self._redis.get(key)
+        if raw is None:
+            # 已有记录恰好过期，重新占位
+            return self.begin(key[len(self._prefix):], fingerprint, lock_seconds)
+        return IdempotencyRecord.loads(raw)
+
+    def complete(self, key: str, record: IdempotencyRecord, ttl_seconds: float):
+        self._redis.set(self._prefix + key, record.dumps(), px=int(ttl_seconds * 1000))
+
+    def release(self, key: str):
+        self._redis.delete(self._prefix + key)
+
+_store: Optional[IdempotencyStore] = None
+_store_lock = threading.Lock()
+
+def get_idempotency_store() -> IdempotencyStore:
+    """
+    获取按IDEMPOTENCY_BACKEND配置创建的幂等键存储（进程内单例）
+
+    Returns:
+        IdempotencyStore: 幂等键存储
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                if settings.idempotency_backend == "redis":
+                    _store = RedisIdempotencyStore()
+                else:
+                    _store = LocalIdempotencyStore(settings.idempotency_cache_size)
+    return _store
@@ -0,0 +1,162 @@
+# 指标采集工具
+# 计数器按线程分片：每个线程只写自己的分片，写入路径无锁，导出时汇总所有分片
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _ThreadShards:
+    """按线程分片的累加值"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> dict:
+        """获取当前线程的分片（每个线程首次写入时注册一次）"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = defaultdict(float)
+            with self._lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def collect(self) -> Dict:
+        """汇总所有分片"""
+        with self._lock:
+            shards = list(self._shards)
+        total: Dict = defaultdict(float)
+        for shard in shards:
+            for key, value in shard.copy().items():
+                total[key] += value
+        return total
+
+    def reset(self):
+        """清空所有分片"""
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = _ThreadShards()
+
+    def reset(self):
+        self._values.reset()
+
+    def _format_labels(self, labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, labels)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """按Prometheus文本格式输出"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self._values.shard()[labels] += amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.collect().get(labels, 0.0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._format_labels(labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.collect().items())
+        ]
+
+class Gauge(Counter):
+    """可增可减的瞬时值"""
+
+    type_name = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self._values.shard()[labels] -= amount
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float):
+        shard = self._values.shard()
+        shard[(labels, bisect.bisect_left(self.buckets, value))] += 1
+        shard[(labels, "sum")] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        values = self._values.collect()
+        return int(sum(values.get((labels, index), 0) for index in range(len(self.buckets) + 1)))
+
+    def _samples(self) -> List[str]:
+        values = self._values.collect()
+        lines = []
+        for labels in sorted({labels for labels, _ in values}):
+            cumulative = 0.0
+            for index, bound in enumerate(self.buckets):
+                cumulative += values.get((labels, index), 0)
+                lines.append(f"{self.name}_bucket{self._format_labels(labels, [('le', _format_value(bound))])} {_format_value(cumulative)}")
+            cumulative += values.get((labels, len(self.buckets)), 0)
+            lines.append(f"{self.name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {_format_value(values.get((labels, 'sum'), 0.0))}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {_format_value(cumulative)}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        for metric in self._metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        """输出全部指标（Prometheus文本格式）"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
@@ -0,0 +1,66 @@
+# 折线编码工具
+# 采用Google Encoded Polyline算法：坐标按精度取整后与前一点做差，差值经ZigZag变换后以5位一组编码为可打印ASCII字符
+# 相邻点距离越近编码越短，路线步骤和小车轨迹通常只需每点4~8个字符
+from typing import Iterable, List, Tuple
+
+DEFAULT_PRECISION = 5
+
+def _encode_value(value: int, output: List[str]):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        output.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    output.append(chr(value + 63))
+
+def encode_polyline(points: Iterable[Tuple[float, float]], precision: int = DEFAULT_PRECISION) -> str:
+    """
+    将(纬度, 经度)序列编码为折线字符串
+
+    Args:
+        points: 坐标序列
+        precision: 小数精度（5约为1米，6约为0.1米）
+
+    Returns:
+        str: 编码后的折线
+    """
+    factor = 10 ** precision
+    output: List[str] = []
+    previous_lat = previous_lon = 0
+    for latitude, longitude in points:
+        lat = round(latitude * factor)
+        lon = round(longitude * factor)
+        _encode_value(lat - previous_lat, output)
+        _encode_value(lon - previous_lon, output)
+        previous_lat, previous_lon = lat, lon
+    return "".join(output)
+
+def decode_polyline(encoded: str, precision: int = DEFAULT_PRECISION) -> List[Tuple[float, float]]:
+    """
+    将折线字符串解码为(纬度, 经度)列表
+
+    Args:
+        encoded: 编码后的折线
+        precision: 编码时使用的小数精度
+
+    Returns:
+        List[Tuple[float, float]]: 坐标列表
+    """
+    factor = 10 ** precision
+    points: List[Tuple[float, float]] = []
+    index = lat = lon = 0
+    coordinates = [0, 0]
+    while index < len(encoded):
+        for axis in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            coordinates[axis] = ~(result >> 1) if result & 1 else result >> 1
+        lat += coordinates[0]
+        lon += coordinates[1]
+        points.append((lat / factor, lon / factor))
+    return points
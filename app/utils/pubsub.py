@@ -0,0 +1,128 @@
+# 发布/订阅工具
+# 提供进程内广播和基于Redis pub/sub的跨进程广播两种实现，以及测试用的FakeBroker
+import json
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[dict], None]
+
+class Broker:
+    """消息代理基类"""
+
+    def publish(self, channel: str, message: dict) -> None:
+        """
+        向频道发布消息
+
+        Args:
+            channel: 频道名称
+            message: 可JSON序列化的消息
+        """
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        """
+        订阅频道，收到消息时调用callback
+
+        Args:
+            channel: 频道名称
+            callback: 消息回调
+        """
+        raise NotImplementedError
+
+class LocalBroker(Broker):
+    """进程内消息代理，用于单进程部署、本地开发和测试"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callback]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: dict) -> None:
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("处理频道 %s 的消息失败", channel)
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+class FakeBroker(LocalBroker):
+    """
+    测试用消息代理：同步分发并记录已发布的消息
+
+    消息经过JSON往返后再分发，与RedisBroker的序列化行为一致；同一个FakeBroker上的多个订阅者可模拟多个工作进程
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.published: List[Tuple[str, dict]] = []
+
+    def publish(self, channel: str, message: dict) -> None:
+        message = json.loads(json.dumps(message, default=str))
+        self.published.append((channel, message))
+        super().publish(channel, message)
+
+class RedisBroker(Broker):
+    """基于Redis pub/sub的消息代理，将消息广播到所有工作进程"""
+
+    def __init__(self, url: Optional[str] = None):
+        import redis
+
+        self._redis = redis.Redis.from_url(url or get_settings().redis_url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._subscribers: Dict[str, List[Callback]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def publish(self, channel: str, message: dict) -> None:
+        self._redis.publish(channel, json.dumps(message, default=str))
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        with self._lock:
+            if channel not in self._subscribers:
+                self._pubsub.subscribe(channel)
+            self._subscribers.setdefault(channel, []).append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="redis-pubsub", daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        """后台线程：接收Redis消息并分发给本进程的订阅者"""
+        for item in self._pubsub.listen():
+            channel = item["channel"].decode() if isinstance(item["channel"], bytes) else item["channel"]
+            try:
+                message = json.loads(item["data"])
+            except (TypeError, ValueError):
+                logger.warning("忽略频道 %s 上无法解析的消息", channel)
+                continue
+            with self._lock:
+                callbacks = list(self._subscribers.get(channel, ()))
+            for callback in callbacks:
+                try:
+                    callback(message)
+                except Exception:
+                    logger.exception("处理频道 %s 的消息失败", channel)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker() -> Broker:
+    """
+    获取按PUBSUB_BACKEND配置创建的消息代理（进程内单例）
+
+    Returns:
+        Broker: 消息代理
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = RedisBroker() if get_settings().pubsub_backend == "redis" else LocalBroker()
+    return _broker
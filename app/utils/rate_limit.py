@@ -0,0 +1,150 @@
+# 限流工具
+# 令牌桶：每个键一个桶，按固定速率补充令牌，每次请求消耗一个令牌，桶空时拒绝
+# 提供进程内存储和基于Redis的共享存储（多工作进程共享同一个桶）
+import math
+import threading
+import time
+from typing import Optional, Tuple
+from app.core.config import get_settings
+from app.utils.cache import LRUCache
+
+# (是否放行, 需要等待的秒数)
+Decision = Tuple[bool, float]
+
+class RateLimitStore:
+    """令牌桶存储基类"""
+
+    def consume(self, key: str, rate: float, capacity: float) -> Decision:
+        """
+        从键对应的令牌桶中取一个令牌
+
+        Args:
+            key: 限流键
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+
+        Returns:
+            Decision: (是否放行, 被拒绝时距下一个令牌的秒数)
+        """
+        raise NotImplementedError
+
+def _refill(tokens: float, updated_at: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+class LocalRateLimitStore(RateLimitStore):
+    """进程内令牌桶，单进程部署或各进程独立限流时使用"""
+
+    def __init__(self, maxsize: int = 100000):
+        """
+        初始化存储
+
+        Args:
+            maxsize: 最多保留的桶数量，超出时淘汰最久未使用的桶（被淘汰的桶相当于已满）
+        """
+        self._buckets = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: float) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key) or (capacity, now)
+            tokens = _refill(tokens, updated_at, now, rate, capacity)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets.set(key, (tokens, now))
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+# 在Redis中原子地补充并消耗令牌，使用Redis服务器时间避免各工作进程时钟偏差
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisRateLimitStore(RateLimitStore):
+    """基于Redis的共享令牌桶，多工作进程部署时所有进程共用同一限额"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "ratelimit:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url or get_settings().redis_url)
+        self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._prefix = prefix
+
+    def consume(self, key: str, rate: float, capacity: float) -> Decision:
+        allowed, tokens = self._script(keys=[self._prefix + key], args=[rate, capacity])
+        if int(allowed):
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+class ConcurrencyLimiter:
+    """并发上限：同时处理的请求数达到上限时立即拒绝，而不是排队等待"""
+
+    def __init__(self, limit: int):
+        """
+        初始化并发上限
+
+        Args:
+            limit: 最大并发数，0表示不限制
+        """
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        """当前并发数"""
+        return self._active
+
+    def try_acquire(self) -> bool:
+        """
+        尝试占用一个并发名额
+
+        Returns:
+            bool: 是否占用成功
+        """
+        with self._lock:
+            if self.limit and self._active >= self.limit:
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        """释放一个并发名额"""
+        with self._lock:
+            self._active -= 1
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After响应头（整数秒，至少1秒）"""
+    return str(max(1, math.ceil(seconds)))
+
+_store: Optional[RateLimitStore] = None
+_store_lock = threading.Lock()
+
+def get_rate_limit_store() -> RateLimitStore:
+    """
+    获取按RATE_LIMIT_BACKEND配置创建的令牌桶存储（进程内单例）
+
+    Returns:
+        RateLimitStore: 令牌桶存储
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RedisRateLimitStore() if get_settings().rate_limit_backend == "redis" else LocalRateLimitStore()
+    return _store
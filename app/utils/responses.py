@@ -0,0 +1,108 @@
+# 响应序列化工具
+import hashlib
+from typing import Any, Literal, Optional
+from fastapi import Header, Query, Response
+from pydantic import BaseModel, TypeAdapter
+from app.core.config import get_settings
+
+JSON_MEDIA_TYPE = "application/json"
+
+# 坐标序列的返回格式：json为逐点浮点数，polyline为折线编码字符串
+GEOMETRY_JSON = "json"
+GEOMETRY_POLYLINE = "polyline"
+# 客户端可通过Accept请求头选择折线编码
+POLYLINE_MEDIA_TYPE = "application/vnd.polyline+json"
+
+def trusted_response(value: Any, adapter: Optional[TypeAdapter] = None, status_code: int = 200) -> Any:
+    """
+    返回服务层已构建好的响应对象
+
+    服务层返回的已经是经过校验的schema实例，开启skip_trusted_response_validation（默认关闭）时
+    由pydantic-core直接序列化为JSON字节，不再经过response_model校验和jsonable_encoder；
+    关闭时原样返回，由FastAPI照常校验
+
+    Args:
+        value: schema实例或schema实例列表
+        adapter: 对应的TypeAdapter，value为单个模型实例时可省略
+        status_code: HTTP状态码
+
+    Returns:
+        Any: Response或原始值
+    """
+    if not get_settings().skip_trusted_response_validation:
+        return value
+    if adapter is None:
+        if not isinstance(value, BaseModel):
+            return value
+        content = value.model_dump_json().encode("utf-8")
+    else:
+        content = adapter.dump_json(value)
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, status_code=status_code)
+
+def make_etag(content: bytes) -> str:
+    """
+    根据响应内容生成强ETag（内容哈希，多个工作进程间一致）
+
+    Args:
+        content: 响应字节
+
+    Returns:
+        str: 带引号的ETag
+    """
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断If-None-Match请求头是否匹配ETag（弱比较，忽略W/前缀）
+
+    Args:
+        if_none_match: If-None-Match请求头
+        etag: 当前ETag
+
+    Returns:
+        bool: 是否匹配
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def conditional_json_response(if_none_match: Optional[str], content: bytes, etag: str, headers: Optional[dict] = None) -> Response:
+    """
+    构建支持条件GET的JSON响应，ETag匹配时返回不带响应体的304
+
+    Args:
+        if_none_match: If-None-Match请求头
+        content: 预先序列化的JSON字节
+        etag: 内容对应的ETag
+        headers: 额外的响应头
+
+    Returns:
+        Response: 200或304响应
+    """
+    response_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if headers:
+        response_headers.update(headers)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=response_headers)
+
+def get_geometry_format(
+    geometry: Optional[Literal["json", "polyline"]] = Query(None, description="坐标返回格式：json或polyline"),
+    accept: Optional[str] = Header(None)
+) -> str:
+    """
+    确定坐标序列的返回格式（查询参数优先，其次Accept请求头）
+
+    Args:
+        geometry: geometry查询参数
+        accept: Accept请求头
+
+    Returns:
+        str: GEOMETRY_JSON或GEOMETRY_POLYLINE
+    """
+    if geometry:
+        return geometry
+    if accept and POLYLINE_MEDIA_TYPE in accept:
+        return GEOMETRY_POLYLINE
+    return GEOMETRY_JSON
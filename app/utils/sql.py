@@ -0,0 +1,30 @@
+# SQL语句处理工具
+import re
+from functools import lru_cache
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PARAMETER_RE = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST_RE = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    规范化SQL语句形态：字面量和绑定参数替换为?，IN列表折叠，空白合并
+
+    同一ORM查询在不同参数下得到相同结果，可用于识别重复执行的语句
+
+    Args:
+        statement: 原始SQL语句
+
+    Returns:
+        str: 规范化后的语句
+    """
+    normalized = _STRING_LITERAL_RE.sub("?", statement)
+    normalized = _PARAMETER_RE.sub("?", normalized)
+    normalized = _NUMBER_LITERAL_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+    return _VALUES_LIST_RE.sub(r"\1", normalized)
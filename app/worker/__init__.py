@@ -0,0 +1,5 @@
+# 后台任务（Celery）
+# 启动worker: celery -A app.worker.celery_app worker --loglevel=info
+from .celery_app import celery_app
+
+__all__ = ['celery_app']
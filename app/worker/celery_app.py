@@ -0,0 +1,40 @@
+# Celery应用配置
+# 设置CELERY_TASK_ALWAYS_EAGER=true时使用内存broker并在当前进程同步执行任务，便于本地运行和测试
+from celery import Celery
+from celery.signals import worker_process_init
+from app.core.config import get_settings
+
+settings = get_settings()
+
+if settings.celery_task_always_eager:
+    CELERY_BROKER_URL = "memory://"
+    CELERY_RESULT_BACKEND = "cache+memory://"
+else:
+    CELERY_BROKER_URL = settings.celery_broker_url or settings.redis_url
+    CELERY_RESULT_BACKEND = settings.celery_result_backend or settings.redis_url
+
+celery_app = Celery(
+    "last_mile",
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
+    include=["app.worker.tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=settings.celery_result_expires,
+    worker_concurrency=settings.celery_worker_concurrency,
+    task_always_eager=settings.celery_task_always_eager,
+    task_store_eager_result=settings.celery_task_always_eager,
+)
+
+@worker_process_init.connect
+def _connect_invalidation_bus(**kwargs):
+    """每个worker子进程订阅缓存失效广播"""
+    from app.services.invalidation_service import invalidation_bus
+    invalidation_bus.connect()
@@ -0,0 +1,89 @@
+# 后台任务定义
+# 路线优化、日志汇总、批量导入等耗时任务在worker中执行，API只返回任务ID
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+from app.core.security import decrypt_job_payload
+from app.db.database import SessionLocal
+from app.schemas.express import ExpressImportItem
+from app.services.car_log_service import CarLogService
+from app.services.dashboard_service import DashboardService
+from app.services.express_service import ExpressService
+from app.services.route_service import RouteService
+from app.services.sync_service import SyncService
+from app.services.task_queue_service import TaskQueueService
+from app.services.user_service import UserService
+from app.worker.celery_app import celery_app
+
+@contextmanager
+def _db_session():
+    """为单个任务创建独立的数据库会话"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _progress_reporter(task):
+    """
+    创建进度回调，将进度写入结果后端（状态为PROGRESS）
+
+    Args:
+        task: 绑定的Celery任务
+    """
+    def report(current: int, total: int):
+        task.update_state(state="PROGRESS", meta={"current": current, "total": total})
+    return report
+
+@celery_app.task(bind=True, name="dispatch.optimize_route")
+def optimize_route(self, route_id: int) -> dict:
+    """优化路线步骤顺序"""
+    with _db_session() as db:
+        return RouteService(db).optimize_route(route_id, progress=_progress_reporter(self))
+
+@celery_app.task(bind=True, name="analytics.rollup_car_logs")
+def rollup_car_logs(self, car_id: int, start_time: Optional[str] = None, end_time: Optional[str] = None) -> dict:
+    """汇总小车日志，时间参数为ISO格式字符串"""
+    with _db_session() as db:
+        summary = CarLogService(db).summarize(
+            car_id,
+            datetime.fromisoformat(start_time) if start_time else None,
+            datetime.fromisoformat(end_time) if end_time else None,
+        )
+        return summary.model_dump(mode="json")
+
+@celery_app.task(bind=True, name="imports.bulk_import_express")
+def bulk_import_express(self, items: List[dict]) -> dict:
+    """批量导入快递"""
+    with _db_session() as db:
+        result = ExpressService(db).bulk_import(
+            [ExpressImportItem(**item) for item in items],
+            progress=_progress_reporter(self)
+        )
+        return result.model_dump(mode="json")
+
+@celery_app.task(bind=True, name="imports.bulk_provision_users")
+def bulk_provision_users(self, payload: str) -> dict:
+    """批量创建用户（参数为encrypt_job_payload加密的用户数据，含明文密码），结果包含逐行报告"""
+    rows = decrypt_job_payload(payload)
+    with _db_session() as db:
+        result = UserService(db).bulk_provision(rows, progress=_progress_reporter(self))
+        return result.model_dump(mode="json")
+
+@celery_app.task(name="sync.purge_tombstones")
+def purge_sync_tombstones() -> int:
+    """清理超过保留期的同步墓碑（建议每天由定时任务触发）"""
+    with _db_session() as db:
+        return SyncService(db).purge_tombstones()
+
+@celery_app.task(name="dispatch.requeue_expired_tasks")
+def requeue_expired_tasks() -> int:
+    """将租约到期的任务退回待处理（建议每隔一个租约周期由定时任务触发）"""
+    with _db_session() as db:
+        return TaskQueueService(db).requeue_expired()
+
+@celery_app.task(name="analytics.reconcile_dashboard_counters")
+def reconcile_dashboard_counters() -> dict:
+    """重新统计看板计数并校正偏差（建议每隔几分钟由定时任务触发）"""
+    with _db_session() as db:
+        return DashboardService(db).reconcile()
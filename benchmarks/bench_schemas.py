@@ -0,0 +1,42 @@
+# 数据校验和地理计算基准测试
+import pytest
+
+from app.models.enums import CarTaskStatus
+from app.schemas.adapters import list_adapter
+from app.schemas.car_log import CarLogCreate
+from app.utils.geo import haversine_km
+
+
+@pytest.fixture
+def car_log_batch(rng):
+    statuses = [status.value for status in CarTaskStatus]
+    return [
+        {
+            "car_id": rng.randint(1, 50),
+            "logged_at": f"2024-01-01T08:{i // 60 % 60:02d}:{i % 60:02d}",
+            "task_status": rng.choice(statuses),
+            "current_speed": rng.uniform(0, 15),
+            "current_latitude": 31.2 + rng.uniform(-0.05, 0.05),
+            "current_longitude": 121.4 + rng.uniform(-0.05, 0.05),
+            "battery_level": rng.uniform(5, 100),
+            "running_time": rng.randint(0, 600),
+            "log_type": "telemetry",
+        }
+        for i in range(500)
+    ]
+
+
+def bench_car_log_create_batch_500(benchmark, car_log_batch):
+    adapter = list_adapter(CarLogCreate)
+    logs = benchmark(adapter.validate_python, car_log_batch)
+    assert len(logs) == 500
+
+
+def bench_distance_matrix_50(benchmark, rng):
+    points = [(31.2 + rng.uniform(-0.05, 0.05), 121.4 + rng.uniform(-0.05, 0.05)) for _ in range(50)]
+
+    def distance_matrix():
+        return [[haversine_km(a[0], a[1], b[0], b[1]) for b in points] for a in points]
+
+    matrix = benchmark(distance_matrix)
+    assert matrix[0][0] == 0
@@ -0,0 +1,30 @@
+# 认证热点函数基准测试
+import pytest
+
+from app.core.config import get_settings
+from app.core.security import create_access_token, get_current_user
+from app.models.user import User
+
+
+def _run_sync(coroutine):
+    """执行不含await挂起点的协程（避免事件循环开销计入测量）"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("协程发生了挂起")
+
+
+def bench_create_access_token(benchmark):
+    benchmark(create_access_token, {"sub": "alice"})
+
+
+# 每次调用都查询SQLite，阈值同服务层基准测试
+@pytest.mark.max_regression(50)
+def bench_get_current_user(benchmark, db_session):
+    db_session.add(User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123"))
+    db_session.commit()
+    token = create_access_token({"sub": "alice"})
+    settings = get_settings()
+    user = benchmark(lambda: _run_sync(get_current_user(token=token, db=db_session, settings=settings)))
+    assert user.username == "alice"
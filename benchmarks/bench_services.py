@@ -0,0 +1,71 @@
+# 服务层热点函数基准测试
+# 访问SQLite的基准测试受文件系统缓存和内存分配影响，波动比纯计算的基准测试大，阈值放宽到50%
+import pytest
+
+from app.models.route import Route, RouteStep
+from app.models.user import User
+from app.services.route_service import RouteService
+from app.services.session_service import SessionService
+
+
+@pytest.fixture
+def session_setup(db_session):
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    service = SessionService(db_session)
+    session_id = service.initialize_user_session(user.id, "phone-1").session_id
+    return service, user.id, session_id
+
+
+@pytest.mark.max_regression(50)
+def bench_session_initialize(benchmark, session_setup):
+    service, user_id, _ = session_setup
+    benchmark(service.initialize_user_session, user_id, "phone-1")
+
+
+@pytest.mark.max_regression(50)
+def bench_session_heartbeat(benchmark, session_setup):
+    service, _, session_id = session_setup
+    benchmark(service.send_user_heartbeat, session_id)
+
+
+@pytest.mark.max_regression(50)
+def bench_session_validate(benchmark, session_setup):
+    service, _, session_id = session_setup
+    benchmark(service.validate_user_session, session_id)
+
+
+@pytest.mark.max_regression(50)
+def bench_session_validate_token(benchmark, db_session):
+    from app.core.config import get_settings
+    from app.core.session_tokens import RevocationList
+    from app.utils.pubsub import LocalBroker
+
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    settings = get_settings().model_copy(update={"session_token_mode": True})
+    service = SessionService(db_session, settings, revocations=RevocationList(LocalBroker()))
+    token = service.initialize_user_session(user.id, "phone-1").session_id
+    benchmark(service.validate_user_session, token)
+
+
+@pytest.mark.max_regression(50)
+def bench_session_active_list(benchmark, session_setup):
+    service, user_id, _ = session_setup
+    benchmark(service.get_user_active_sessions, user_id)
+
+
+@pytest.mark.max_regression(50)
+def bench_route_optimize_30_steps(benchmark, db_session, rng):
+    route = Route(name="bench")
+    db_session.add(route)
+    db_session.commit()
+    for order in range(1, 31):
+        db_session.add(RouteStep(
+            id=order, route_id=route.id, step_order=order,
+            pickup_latitude=31.2 + rng.uniform(-0.05, 0.05), pickup_longitude=121.4 + rng.uniform(-0.05, 0.05)
+        ))
+    db_session.commit()
+    benchmark(RouteService(db_session).optimize_route, route.id)
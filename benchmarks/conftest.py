@@ -0,0 +1,174 @@
+# 微基准测试公共配置
+# benchmark夹具：自动确定每轮循环次数，多轮取最小单次耗时，与baselines.json中的基线比较
+# 每个基准测试前后同时测量一段固定的参考负载，用两者之比做比较，抵消机器整体变快/变慢（CPU降频、虚拟机配额）的影响
+# 相对耗时超过基线的(1 + 阈值%)时测试失败
+#   --benchmark-save                 用本次结果更新基线（更换机器后需先在该机器上保存一次）
+#   --benchmark-max-regression=N     允许的最大退化百分比，默认取BENCHMARK_MAX_REGRESSION环境变量或25
+#   @pytest.mark.max_regression(N)   单个基准测试的阈值（访问数据库的基准测试波动较大），取与全局阈值中较大者
+import gc
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+
+import pytest
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# 每轮最短耗时（秒），耗时过短的函数会在一轮内循环多次；轮次短而多，取最小值可过滤偶发干扰
+MIN_ROUND_SECONDS = 0.01
+ROUNDS = 40
+
+_results: dict = {}
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-save", action="store_true", help="用本次结果更新基线文件")
+    group.addoption(
+        "--benchmark-max-regression", type=float,
+        default=float(os.getenv("BENCHMARK_MAX_REGRESSION", "25")),
+        help="允许的最大退化百分比"
+    )
+
+def _load_baselines() -> dict:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def _reference_workload():
+    """固定的纯Python参考负载"""
+    return sorted(str(i * 7919 % 10007) for i in range(2000))
+
+def _calibrate(func, args, kwargs) -> int:
+    """预热并确定每轮循环次数"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_SECONDS or loops >= 1 << 20:
+            return loops
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(MIN_ROUND_SECONDS / elapsed) + 1))
+
+def _round(func, args, kwargs, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / loops
+
+def _measure_relative(func, args, kwargs) -> dict:
+    """
+    测量函数单次耗时及其相对参考负载的倍数
+
+    被测函数和参考负载逐轮交替执行，两者的最小值取自同一时间段
+    """
+    loops = _calibrate(func, args, kwargs)
+    reference_loops = _calibrate(_reference_workload, (), {})
+    timings, reference_timings = [], []
+    # 与timeit一致，测量期间关闭垃圾回收以减少抖动
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(ROUNDS):
+            timings.append(_round(func, args, kwargs, loops))
+            reference_timings.append(_round(_reference_workload, (), {}, reference_loops))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    # 相对耗时取逐轮比值的中位数：相邻执行的两者受同一时段的系统负载影响，中位数不受个别受干扰轮次左右
+    ratios = sorted(timing / reference for timing, reference in zip(timings, reference_timings))
+    timings.sort()
+    return {
+        "min": timings[0],
+        "median": timings[len(timings) // 2],
+        "relative": ratios[len(ratios) // 2],
+    }
+
+@pytest.fixture
+def benchmark(request):
+    """
+    测量函数的单次耗时并与基线比较
+
+    用法:
+        def bench_xxx(benchmark):
+            benchmark(func, *args, **kwargs)
+    """
+    name = request.node.name
+    config = request.config
+
+    def run(func, *args, **kwargs):
+        result = func(*args, **kwargs)
+        stats = _measure_relative(func, args, kwargs)
+        _results[name] = stats
+
+        baseline = _load_baselines().get(name)
+        if baseline and not config.getoption("--benchmark-save"):
+            max_regression = config.getoption("--benchmark-max-regression")
+            marker = request.node.get_closest_marker("max_regression")
+            if marker is not None:
+                max_regression = max(max_regression, marker.args[0])
+            change = (stats["relative"] / baseline["relative"] - 1) * 100
+            if change > max_regression:
+                # 超出阈值时重测一次，排除测量期间的瞬时系统负载
+                retry = _measure_relative(func, args, kwargs)
+                if retry["relative"] < stats["relative"]:
+                    stats = _results[name] = retry
+                    change = (stats["relative"] / baseline["relative"] - 1) * 100
+            stats["change_percent"] = change
+            if change > max_regression:
+                pytest.fail(
+                    f"{name} 退化{change:.1f}%（阈值{max_regression:.0f}%）："
+                    f"相对耗时{stats['relative']:.3f}，基线{baseline['relative']:.3f}"
+                    f"（本次{stats['min'] * 1e6:.1f}us）"
+                )
+        return result
+
+    return run
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    terminalreporter.section("benchmark")
+    terminalreporter.write_line(f"{'name':40s} {'min(us)':>10s} {'median(us)':>11s} {'relative':>9s} {'change':>8s}")
+    for name, stats in sorted(_results.items()):
+        change = stats.get("change_percent")
+        change_text = f"{change:+.1f}%" if change is not None else "-"
+        terminalreporter.write_line(
+            f"{name:40s} {stats['min'] * 1e6:10.1f} {stats['median'] * 1e6:11.1f} {stats['relative']:9.3f} {change_text:>8s}"
+        )
+
+    if config.getoption("--benchmark-save"):
+        baselines = _load_baselines()
+        for name, stats in _results.items():
+            baselines[name] = {"relative": stats["relative"], "min": stats["min"], "median": stats["median"]}
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+        terminalreporter.write_line(f"基线已保存到 {BASELINE_PATH}")
+
+@pytest.fixture
+def rng():
+    """固定种子的随机数生成器，保证每次运行的输入数据一致"""
+    import random
+    return random.Random(20240101)
+
+@pytest.fixture
+def db_session():
+    """内存SQLite数据库会话"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    import app.models as models
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
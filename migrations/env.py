@@ -0,0 +1,58 @@
+# Alembic迁移环境：表结构以app.models为准，数据库连接取自应用配置
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+import app.models as models
+from app.core.config import get_settings
+
+config = context.config
+
+# 保留应用已创建的日志器（在应用进程或测试中执行迁移时）
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# 未显式指定sqlalchemy.url时（如测试中指定临时库）使用DATABASE_URL
+if not config.get_main_option("sqlalchemy.url"):
+    database_url = get_settings().database_url
+    if not database_url:
+        raise RuntimeError("未配置DATABASE_URL")
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+
+target_metadata = models.Base.metadata
+
+def run_migrations_offline():
+    """生成SQL脚本而不连接数据库（alembic upgrade head --sql）"""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    """连接数据库执行迁移"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite不支持大部分ALTER TABLE，以重建表的方式修改
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,165 @@
+"""基线：引入迁移前由create_all创建的表结构
+
+已有数据库（引入迁移前部署）由scripts/migrate.py标记为此版本后再升级。
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _base_columns():
+    """BaseModel的通用字段"""
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+    ]
+
+user_role = sa.Enum('admin', 'customer', 'others', name='userrole')
+task_status = sa.Enum('pending', 'running', 'completed', 'cancelled', name='taskstatus')
+express_status = sa.Enum('unassigned', 'delivering', 'completed', 'others', name='expressstatus')
+car_task_status = sa.Enum('idle', 'delivering', 'maintenance', 'offline', 'others', name='cartaskstatus')
+appointment_status = sa.Enum('scheduled', 'delivered', 'cancelled', name='appointmentstatus')
+
+def upgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    op.create_table(
+        'users',
+        *_base_columns(),
+        sa.Column('username', sa.String(50), nullable=False, comment='用户名'),
+        sa.Column('email', sa.String(100), nullable=True, comment='邮箱'),
+        sa.Column('hashed_password', sa.String(255), nullable=False, comment='加密密码'),
+        sa.Column('name', sa.String(100), nullable=False, comment='姓名'),
+        sa.Column('phone', sa.String(20), nullable=False, comment='电话'),
+        sa.Column('address', sa.JSON(), nullable=True, comment='地址'),
+        sa.Column('role', user_role, nullable=True, comment='用户类别'),
+        sa.Column('is_active', sa.Boolean(), nullable=True, comment='是否激活'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'routes',
+        *_base_columns(),
+        sa.Column('name', sa.String(200), nullable=True, comment='路线名称'),
+        sa.Column('description', sa.Text(), nullable=True, comment='路线描述'),
+        sa.Column('total_distance', sa.Float(), nullable=True, comment='总距离(km)'),
+        sa.Column('estimated_duration', sa.Integer(), nullable=True, comment='预计耗时(分钟)'),
+    )
+    op.create_index('ix_routes_id', 'routes', ['id'])
+
+    # cars与tasks互相引用：cars.current_task_id的外键在tasks建好后补上
+    # （SQLite不支持ALTER添加约束，但允许建表时引用尚不存在的表）
+    op.create_table(
+        'cars',
+        *_base_columns(),
+        sa.Column('car_number', sa.String(50), nullable=False, unique=True, comment='小车编号'),
+        sa.Column('task_status', car_task_status, nullable=True, comment='任务状态'),
+        sa.Column('current_task_id', sa.Integer(), nullable=True, comment='当前任务ID'),
+        sa.Column('current_speed', sa.Float(), nullable=True, comment='当前速度(km/h)'),
+        sa.Column('current_latitude', sa.Float(), nullable=True, comment='当前纬度'),
+        sa.Column('current_longitude', sa.Float(), nullable=True, comment='当前经度'),
+        sa.Column('battery_level', sa.Float(), nullable=True, comment='电量百分比'),
+        sa.Column('running_time', sa.Integer(), nullable=True, comment='已经运行时间(分钟)'),
+        sa.Column('is_active', sa.Boolean(), nullable=True, comment='是否激活'),
+        *([sa.ForeignKeyConstraint(['current_task_id'], ['tasks.id'])] if sqlite else []),
+    )
+    op.create_index('ix_cars_id', 'cars', ['id'])
+
+    op.create_table(
+        'tasks',
+        *_base_columns(),
+        sa.Column('status', task_status, nullable=True, comment='任务状态'),
+        sa.Column('assigned_car_number', sa.String(50), sa.ForeignKey('cars.car_number'), nullable=True, comment='分配的小车编号'),
+        sa.Column('expected_completion_time', sa.DateTime(timezone=True), nullable=True, comment='任务预计完成时间'),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True, comment='任务完成时间'),
+        sa.Column('route_id', sa.Integer(), sa.ForeignKey('routes.id'), nullable=True, comment='路线ID'),
+    )
+    op.create_index('ix_tasks_id', 'tasks', ['id'])
+    if not sqlite:
+        op.create_foreign_key('cars_current_task_id_fkey', 'cars', 'tasks', ['current_task_id'], ['id'])
+
+    op.create_table(
+        'express',
+        *_base_columns(),
+        sa.Column('recipient_name', sa.String(100), nullable=False, comment='收件人姓名'),
+        sa.Column('recipient_phone', sa.String(20), nullable=False, comment='收件人电话'),
+        sa.Column('recipient_address', sa.JSON(), nullable=False, comment='收件人地址'),
+        sa.Column('tracking_number', sa.String(100), nullable=False, unique=True, comment='快递单号'),
+        sa.Column('pickup_code', sa.String(20), nullable=True, comment='取件码'),
+        sa.Column('recipient_user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, comment='收件人用户ID'),
+        sa.Column('status', express_status, nullable=True, comment='快递状态'),
+        sa.Column('station_name', sa.String(200), nullable=True, comment='所属驿站名称'),
+        sa.Column('station_address', sa.String(500), nullable=True, comment='驿站地址'),
+        sa.Column('task_id', sa.Integer(), sa.ForeignKey('tasks.id'), nullable=True, comment='对应配送任务ID'),
+    )
+    op.create_index('ix_express_id', 'express', ['id'])
+
+    op.create_table(
+        'appointments',
+        *_base_columns(),
+        sa.Column('customer_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, comment='客户ID'),
+        sa.Column('express_tracking_number', sa.String(100), sa.ForeignKey('express.tracking_number'), nullable=False, comment='对应快递单号'),
+        sa.Column('appointment_time', sa.DateTime(), nullable=False, comment='预约时间'),
+        sa.Column('status', appointment_status, nullable=True, comment='预约状态'),
+        sa.Column('notes', sa.String(500), nullable=True, comment='预约备注'),
+    )
+    op.create_index('ix_appointments_id', 'appointments', ['id'])
+
+    op.create_table(
+        'route_steps',
+        sa.Column('id', sa.Integer(), primary_key=True, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+        sa.Column('route_id', sa.Integer(), sa.ForeignKey('routes.id'), primary_key=True, comment='路线ID'),
+        sa.Column('step_order', sa.Integer(), primary_key=True, comment='步骤顺序'),
+        sa.Column('pickup_latitude', sa.Float(), nullable=True, comment='预约取件位置纬度'),
+        sa.Column('pickup_longitude', sa.Float(), nullable=True, comment='预约取件位置经度'),
+        sa.Column('appointment_id', sa.Integer(), sa.ForeignKey('appointments.id'), nullable=True, comment='预约信息ID'),
+        sa.Column('express_tracking_number', sa.String(100), sa.ForeignKey('express.tracking_number'), nullable=True, comment='对应快递单号'),
+        sa.Column('location_description', sa.String(500), nullable=True, comment='位置描述（如街道号等）'),
+        sa.Column('estimated_arrival_time', sa.DateTime(timezone=True), nullable=True, comment='预计到达时间'),
+    )
+    op.create_index('ix_route_steps_id', 'route_steps', ['id'])
+
+    op.create_table(
+        'car_logs',
+        *_base_columns(),
+        sa.Column('car_id', sa.Integer(), sa.ForeignKey('cars.id'), nullable=False, comment='小车编号'),
+        sa.Column('logged_at', sa.DateTime(), nullable=True, comment='记录时间'),
+        sa.Column('task_status', car_task_status, nullable=False, comment='任务状态'),
+        sa.Column('current_speed', sa.Float(), nullable=True, comment='当前速度(km/h)'),
+        sa.Column('current_latitude', sa.Float(), nullable=True, comment='当前纬度'),
+        sa.Column('current_longitude', sa.Float(), nullable=True, comment='当前经度'),
+        sa.Column('battery_level', sa.Float(), nullable=False, comment='电量百分比'),
+        sa.Column('running_time', sa.Integer(), nullable=True, comment='已运行时间(分钟)'),
+        sa.Column('current_task_id', sa.Integer(), sa.ForeignKey('tasks.id'), nullable=True, comment='当前任务ID'),
+        sa.Column('log_type', sa.String(50), nullable=True, comment='日志类型（如：状态变更、位置更新、电量警告等）'),
+        sa.Column('description', sa.Text(), nullable=True, comment='日志描述'),
+        sa.Column('extra_data', sa.Text(), nullable=True, comment='额外数据（JSON格式）'),
+    )
+    op.create_index('ix_car_logs_id', 'car_logs', ['id'])
+
+def downgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table in ('car_logs', 'route_steps', 'appointments', 'express'):
+        op.drop_table(table)
+    if not sqlite:
+        op.drop_constraint('cars_current_task_id_fkey', 'cars', type_='foreignkey')
+    op.drop_table('tasks')
+    op.drop_table('cars')
+    op.drop_table('routes')
+    op.drop_table('users')
+    if not sqlite:
+        bind = op.get_bind()
+        for enum in (user_role, task_status, express_status, car_task_status, appointment_status):
+            enum.drop(bind, checkfirst=True)
@@ -0,0 +1,43 @@
+"""地理编码：收件地址坐标、地址哈希和地理编码缓存表（user-026）
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('express', sa.Column('recipient_latitude', sa.Float(), nullable=True, comment='收件地址纬度'))
+    op.add_column('express', sa.Column('recipient_longitude', sa.Float(), nullable=True, comment='收件地址经度'))
+    op.add_column('express', sa.Column('address_hash', sa.String(64), nullable=True, comment='规范化收件地址哈希'))
+    op.add_column('express', sa.Column('geocoded_at', sa.DateTime(), nullable=True, comment='最近一次地理编码时间（无法解析时同样记录）'))
+    op.create_index('ix_express_address_hash', 'express', ['address_hash'])
+
+    op.create_table(
+        'geocode_cache',
+        sa.Column('id', sa.Integer(), primary_key=True, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+        sa.Column('address_hash', sa.String(64), nullable=False, comment='规范化地址哈希'),
+        sa.Column('normalized_address', sa.String(500), nullable=False, comment='规范化地址'),
+        sa.Column('latitude', sa.Float(), nullable=False, comment='纬度'),
+        sa.Column('longitude', sa.Float(), nullable=False, comment='经度'),
+        sa.Column('provider', sa.String(50), nullable=True, comment='地理编码服务提供方'),
+    )
+    op.create_index('ix_geocode_cache_id', 'geocode_cache', ['id'])
+    op.create_index('ix_geocode_cache_address_hash', 'geocode_cache', ['address_hash'], unique=True)
+
+def downgrade():
+    op.drop_table('geocode_cache')
+    op.drop_index('ix_express_address_hash', table_name='express')
+    with op.batch_alter_table('express') as batch_op:
+        batch_op.drop_column('geocoded_at')
+        batch_op.drop_column('address_hash')
+        batch_op.drop_column('recipient_longitude')
+        batch_op.drop_column('recipient_latitude')
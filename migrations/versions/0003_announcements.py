@@ -0,0 +1,30 @@
+"""公告表（user-030，公告模型此前未注册到元数据，create_all不会创建）
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'announcements',
+        sa.Column('id', sa.Integer(), primary_key=True, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+        sa.Column('title', sa.String(200), nullable=False, comment='公告标题'),
+        sa.Column('content', sa.String(2000), nullable=False, comment='公告内容'),
+        sa.Column('date', sa.String(50), nullable=False, comment='公告日期'),
+        sa.Column('is_active', sa.Boolean(), nullable=True, comment='是否有效'),
+        sa.Column('icon', sa.String(200), nullable=True, comment='公告图标'),
+    )
+    op.create_index('ix_announcements_id', 'announcements', ['id'])
+
+def downgrade():
+    op.drop_table('announcements')
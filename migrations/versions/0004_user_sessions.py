@@ -0,0 +1,33 @@
+"""用户会话表（user-031，会话模型此前使用独立的declarative_base，create_all不会创建）
+
+会话接口此前已在使用该表，手工建过表的数据库跳过创建。
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 生成SQL（--sql）时无法检查表是否存在，按需要建表输出
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table('user_sessions'):
+        return
+    op.create_table(
+        'user_sessions',
+        sa.Column('session_id', sa.String(255), primary_key=True, comment='会话ID'),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, comment='用户ID'),
+        sa.Column('device_id', sa.String(255), nullable=False, comment='设备id'),
+        sa.Column('start_time', sa.DateTime(), nullable=False, comment='会话开始时间'),
+        sa.Column('last_active_time', sa.DateTime(), nullable=False, comment='会话最后活跃时间'),
+        sa.Column('is_active', sa.Boolean(), nullable=True, comment='是否活跃'),
+        sa.Column('expires_at', sa.DateTime(), nullable=False, comment='会话过期时间'),
+    )
+
+def downgrade():
+    op.drop_table('user_sessions')
@@ -0,0 +1,18 @@
+"""小车日志按小车和时间查询的索引（user-038）
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_car_logs_car_id_logged_at', 'car_logs', ['car_id', 'logged_at'])
+
+def downgrade():
+    op.drop_index('ix_car_logs_car_id_logged_at', table_name='car_logs')
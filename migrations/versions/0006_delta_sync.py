@@ -0,0 +1,42 @@
+"""增量同步：updated_at索引和删除墓碑表（user-039）
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# 继承BaseModel的表，同步按(updated_at, id)游标读取变更
+TABLES = (
+    'users', 'cars', 'tasks', 'express', 'routes', 'route_steps',
+    'appointments', 'car_logs', 'geocode_cache', 'announcements',
+)
+
+def upgrade():
+    for table in TABLES:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), primary_key=True, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+        sa.Column('entity', sa.String(50), nullable=False, comment='实体类型（同步接口中的集合名）'),
+        sa.Column('entity_id', sa.Integer(), nullable=False, comment='被删除记录的ID'),
+        sa.Column('owner_user_id', sa.Integer(), nullable=True, comment='记录所属用户ID（按用户过滤同步数据）'),
+        sa.Column('owner_only', sa.Boolean(), nullable=False, comment='仅通知原所属用户：记录转给了其他用户，并未删除'),
+    )
+    op.create_index('ix_sync_tombstones_id', 'sync_tombstones', ['id'])
+    op.create_index('ix_sync_tombstones_updated_at', 'sync_tombstones', ['updated_at'])
+    op.create_index('ix_sync_tombstones_owner_user_id', 'sync_tombstones', ['owner_user_id'])
+
+def downgrade():
+    op.drop_table('sync_tombstones')
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
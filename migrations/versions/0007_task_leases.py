@@ -0,0 +1,22 @@
+"""任务队列领取租约（user-047）
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('tasks', sa.Column('lease_expires_at', sa.DateTime(), nullable=True, comment='领取租约到期时间，到期未续约的任务可被重新领取'))
+    op.create_index('ix_tasks_status_lease', 'tasks', ['status', 'lease_expires_at'])
+
+def downgrade():
+    op.drop_index('ix_tasks_status_lease', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('lease_expires_at')
@@ -0,0 +1,32 @@
+"""运营看板计数表（user-050）
+
+计数从空表开始，部署后执行一次对账任务（analytics.reconcile_dashboard_counters）按现有数据校正。
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'dashboard_counters',
+        sa.Column('id', sa.Integer(), primary_key=True, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+        sa.Column('metric', sa.String(50), nullable=False, comment='指标（tasks/express/cars/sessions）'),
+        sa.Column('bucket', sa.String(50), nullable=False, comment='分组（状态值）'),
+        sa.Column('value', sa.Integer(), nullable=False, comment='计数'),
+        sa.UniqueConstraint('metric', 'bucket', name='uq_dashboard_counters_metric_bucket'),
+    )
+    op.create_index('ix_dashboard_counters_id', 'dashboard_counters', ['id'])
+    op.create_index('ix_dashboard_counters_updated_at', 'dashboard_counters', ['updated_at'])
+
+def downgrade():
+    op.drop_table('dashboard_counters')
@@ -0,0 +1,64 @@
+# 响应序列化基准测试
+# 对比列表响应在三种路径下每1000条的序列化耗时：
+#   stdlib:  FastAPI默认路径（按response_model重新校验 + jsonable_encoder等价转换 + json.dumps）
+#   orjson:  同样重新校验，但用orjson编码（ORJSONResponse）
+#   trusted: 跳过重新校验，由预构建的TypeAdapter直接输出JSON字节（trusted_response）
+# 用法: python scripts/bench_serialization.py [条目数] [重复次数]
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+
+from app.schemas.adapters import SessionListAdapter
+from app.schemas.session import SessionResponse
+
+def build_items(count: int) -> list:
+    now = int(time.time() * 1000)
+    return [
+        SessionResponse(
+            session_id=f"00000000-0000-0000-0000-{i:012d}",
+            user_id=i,
+            device_id=f"device-{i}",
+            start_time=now,
+            last_active_time=now,
+            is_active=True,
+        )
+        for i in range(count)
+    ]
+
+def stdlib_path(items: list) -> bytes:
+    validated = SessionListAdapter.validate_python([item.model_dump() for item in items])
+    return json.dumps(SessionListAdapter.dump_python(validated, mode="json")).encode("utf-8")
+
+def orjson_path(items: list) -> bytes:
+    validated = SessionListAdapter.validate_python([item.model_dump() for item in items])
+    return orjson.dumps(SessionListAdapter.dump_python(validated, mode="json"))
+
+def trusted_path(items: list) -> bytes:
+    return SessionListAdapter.dump_json(items)
+
+def measure(func, items: list, repeat: int) -> float:
+    """返回每1000条的平均耗时（毫秒）"""
+    func(items)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(items)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat / len(items) * 1000 * 1000
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    items = build_items(count)
+    assert json.loads(stdlib_path(items)) == json.loads(trusted_path(items))
+
+    print(f"items={count} repeat={repeat}")
+    for name, func in (("stdlib", stdlib_path), ("orjson", orjson_path), ("trusted", trusted_path)):
+        print(f"{name:8s} {measure(func, items, repeat):8.3f} ms / 1k items")
+
+if __name__ == "__main__":
+    main()
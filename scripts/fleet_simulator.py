@@ -0,0 +1,381 @@
+# 车队模拟器
+# 生成N辆虚拟小车，每辆车分配一条随机生成的路线（任务 + 每个步骤一件快递），按模拟时钟沿路线行驶：
+#   - 按--telemetry-interval通过遥测接口上报完整状态，按--location-interval通过位置接口上报高频位置
+#   - 出发时任务变为running、快递变为delivering，到达步骤时该步骤的快递变为completed，走完路线后任务变为completed
+#     （任务和快递没有状态更新接口，直接写数据库）
+#   - 同一--seed产生完全相同的路线、行驶轨迹和请求序列，结果文件中的digest可用于比较两次运行
+# 回放模式（--replay-from）：从另一个数据库读取小车日志，按记录时间间隔（除以--speedup）重新通过遥测接口上报
+# 默认使用临时SQLite文件并在进程内驱动应用；--base-url可访问已运行的服务（此时--database-url和SECRET_KEY需与该服务一致，用于写入种子数据和签发小车令牌）
+# 用法:
+#   python scripts/fleet_simulator.py --cars 200 --duration 600 --output sim.json
+#   python scripts/fleet_simulator.py --replay-from postgresql://.../prod_copy --speedup 20
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 路线生成的中心点（上海）
+CENTER = (31.23, 121.47)
+# 每公里耗电百分比
+BATTERY_PER_KM = 0.8
+# 到达步骤的判定距离(km)
+ARRIVAL_KM = 0.005
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="车队模拟器")
+    parser.add_argument("--output", default="fleet-simulation.json", help="结果JSON文件路径")
+    parser.add_argument("--database-url", default=None, help="数据库URL，默认使用临时SQLite文件")
+    parser.add_argument("--base-url", default=None, help="已运行服务的地址，默认在进程内驱动应用")
+    parser.add_argument("--cars", type=int, default=20, help="虚拟小车数")
+    parser.add_argument("--steps-per-route", type=int, default=5, help="每条路线的步骤数")
+    parser.add_argument("--duration", type=int, default=600, help="模拟时长(秒，模拟时间)")
+    parser.add_argument("--tick", type=float, default=1.0, help="模拟时钟步长(秒)")
+    parser.add_argument("--telemetry-interval", type=int, default=10, help="遥测上报间隔(模拟秒)")
+    parser.add_argument("--location-interval", type=int, default=2, help="位置上报间隔(模拟秒)，0表示不上报")
+    parser.add_argument("--speedup", type=float, default=0, help="相对真实时间的加速倍数，0表示不等待、尽快执行")
+    parser.add_argument("--replay-from", default=None, help="回放模式：读取该数据库中的小车日志重新上报")
+    parser.add_argument("--run-tag", default=None, help="小车编号等名称的前缀，默认由种子和当前时间生成")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace) -> str:
+    """在导入应用前设置环境变量，返回实际使用的数据库URL"""
+    database_url = args.database_url
+    if not database_url:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="fleet-sim-"), "fleet.db")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "fleet-sim-secret-key")
+    os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+    # 模拟时间通常快于真实时间，默认关闭按键限流
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return database_url
+
+def make_client(base_url):
+    if base_url:
+        import httpx
+        return httpx.Client(base_url=base_url, timeout=30)
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+@dataclass
+class VirtualCar:
+    """虚拟小车的模拟状态"""
+    index: int
+    car_id: int
+    car_number: str
+    token: str
+    task_id: int
+    # 路线步骤：(纬度, 经度, 快递单号)
+    waypoints: List[Tuple[float, float, str]]
+    latitude: float
+    longitude: float
+    cruise_speed: float
+    speed: float = 0.0
+    battery: float = 100.0
+    next_step: int = 0
+    started: bool = False
+    finished: bool = False
+    odometer_km: float = 0.0
+
+class RequestLog:
+    """记录发出的请求：按接口统计次数和错误，并对请求内容做摘要"""
+
+    def __init__(self):
+        self.counts = defaultdict(lambda: {"requests": 0, "errors": 0})
+        self._digest = hashlib.sha256()
+
+    def send(self, name: str, logical_key: str, payload: dict, request):
+        # 摘要只包含逻辑内容（小车序号、上报数据），不包含数据库ID和名称前缀
+        self._digest.update(json.dumps([name, logical_key, payload], sort_keys=True).encode("utf-8"))
+        self.counts[name]["requests"] += 1
+        try:
+            ok = request().status_code < 400
+        except Exception:
+            ok = False
+        if not ok:
+            self.counts[name]["errors"] += 1
+
+    @property
+    def digest(self) -> str:
+        return self._digest.hexdigest()
+
+def seed_fleet(args: argparse.Namespace, rng: random.Random, run_tag: str) -> List[VirtualCar]:
+    """写入小车、路线及步骤、任务和快递，返回虚拟小车列表"""
+    from sqlalchemy import func
+    import app.models as models
+    from app.core.security import create_car_token
+    from app.db.database import SessionLocal, get_engine
+    from app.models.route import RouteStep
+
+    models.Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        recipient = models.User(
+            username=f"{run_tag}-recipient", email=f"{run_tag}-recipient@example.com",
+            hashed_password="x", name="recipient", phone="13800000000"
+        )
+        db.add(recipient)
+        db.flush()
+
+        # 路线步骤是复合主键，id需要显式分配
+        next_step_id = (db.query(func.max(RouteStep.id)).scalar() or 0) + 1
+        plans = []
+        for index in range(args.cars):
+            start = (CENTER[0] + rng.uniform(-0.03, 0.03), CENTER[1] + rng.uniform(-0.03, 0.03))
+            car = models.Car(car_number=f"{run_tag}-car-{index}", current_latitude=start[0], current_longitude=start[1])
+            route = models.Route(name=f"{run_tag}-route-{index}")
+            db.add_all([car, route])
+            db.flush()
+            task = models.Task(assigned_car_number=car.car_number, route_id=route.id)
+            db.add(task)
+            db.flush()
+
+            waypoints = []
+            latitude, longitude = start
+            for order in range(1, args.steps_per_route + 1):
+                latitude += rng.uniform(-0.004, 0.004)
+                longitude += rng.uniform(-0.004, 0.004)
+                tracking_number = f"{run_tag}-{index}-{order}"
+                db.add(models.Express(
+                    recipient_name="recipient", recipient_phone="13800000000", recipient_address=f"step {order}",
+                    tracking_number=tracking_number, recipient_user_id=recipient.id, task_id=task.id,
+                ))
+                db.add(RouteStep(
+                    id=next_step_id, route_id=route.id, step_order=order,
+                    pickup_latitude=latitude, pickup_longitude=longitude,
+                    express_tracking_number=tracking_number, location_description=f"step {order}",
+                ))
+                next_step_id += 1
+                waypoints.append((latitude, longitude, tracking_number))
+            plans.append(VirtualCar(
+                index=index, car_id=car.id, car_number=car.car_number, token=create_car_token(car.id, car.car_number),
+                task_id=task.id, waypoints=waypoints,
+                latitude=start[0], longitude=start[1], cruise_speed=rng.uniform(10, 25),
+            ))
+        db.commit()
+        return plans
+    finally:
+        db.close()
+
+def _advance(car: VirtualCar, rng: random.Random, seconds: float, events: list):
+    """按当前速度向下一步骤行驶seconds秒，到达步骤时记录状态变化"""
+    from app.utils.geo import haversine_km
+
+    car.speed = max(0.0, car.cruise_speed + rng.gauss(0, 1.5))
+    budget_km = car.speed * seconds / 3600
+    while budget_km > 0 and car.next_step < len(car.waypoints):
+        target_latitude, target_longitude, tracking_number = car.waypoints[car.next_step]
+        remaining_km = haversine_km(car.latitude, car.longitude, target_latitude, target_longitude)
+        if remaining_km <= max(budget_km, ARRIVAL_KM):
+            car.latitude, car.longitude = target_latitude, target_longitude
+            moved_km = remaining_km
+            car.next_step += 1
+            events.append(("express_completed", tracking_number))
+        else:
+            fraction = budget_km / remaining_km
+            car.latitude += (target_latitude - car.latitude) * fraction
+            car.longitude += (target_longitude - car.longitude) * fraction
+            moved_km = budget_km
+        budget_km -= moved_km
+        car.odometer_km += moved_km
+        car.battery = max(0.0, car.battery - moved_km * BATTERY_PER_KM)
+    if car.next_step >= len(car.waypoints):
+        car.finished = True
+        car.speed = 0.0
+        events.append(("task_completed", car.task_id))
+
+def _apply_status_events(events: list):
+    """将本时钟步内的任务/快递状态变化写入数据库（一个事务）"""
+    if not events:
+        return
+    from datetime import datetime
+    from app.db.database import SessionLocal
+    from app.models.enums import ExpressStatus, TaskStatus
+    from app.models.express import Express
+    from app.models.task import Task
+
+    db = SessionLocal()
+    try:
+        for kind, key in events:
+            if kind == "task_started":
+                db.query(Task).filter(Task.id == key).update({Task.status: TaskStatus.running}, synchronize_session=False)
+                db.query(Express).filter(Express.task_id == key).update({Express.status: ExpressStatus.delivering}, synchronize_session=False)
+            elif kind == "express_completed":
+                db.query(Express).filter(Express.tracking_number == key).update({Express.status: ExpressStatus.completed}, synchronize_session=False)
+            elif kind == "task_completed":
+                db.query(Task).filter(Task.id == key).update(
+                    {Task.status: TaskStatus.completed, Task.completed_at: datetime.now()}, synchronize_session=False
+                )
+        db.commit()
+    finally:
+        db.close()
+
+def _pace(started: float, simulated_seconds: float, speedup: float):
+    """按加速倍数等待，使模拟时间与真实时间保持比例"""
+    if speedup > 0:
+        delay = started + simulated_seconds / speedup - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+def simulate(args: argparse.Namespace, client, cars: List[VirtualCar], log: RequestLog):
+    """按模拟时钟推进所有小车；每个时钟步内按小车序号顺序发送请求，保证请求序列可复现"""
+    rngs = [random.Random(f"{args.seed}-car-{car.index}") for car in cars]
+    ticks = int(args.duration / args.tick)
+    started = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        now = tick * args.tick
+        events = []
+        for car, rng in zip(cars, rngs):
+            if car.finished:
+                continue
+            task_status = None
+            if not car.started:
+                car.started = True
+                task_status = "delivering"
+                events.append(("task_started", car.task_id))
+            _advance(car, rng, args.tick, events)
+            if car.finished:
+                task_status = "idle"
+
+            headers = {"Authorization": f"Bearer {car.token}"}
+            position = {"current_latitude": round(car.latitude, 6), "current_longitude": round(car.longitude, 6)}
+            if task_status is not None or int(now) % args.telemetry_interval == 0:
+                payload = {**position, "current_speed": round(car.speed, 2), "battery_level": round(car.battery, 2)}
+                if task_status is not None:
+                    payload["task_status"] = task_status
+                log.send("car.telemetry", str(car.index), payload,
+                         lambda: client.post(f"/cars/{car.car_id}/telemetry", json=payload, headers=headers))
+            elif args.location_interval and int(now) % args.location_interval == 0:
+                payload = {**position, "current_speed": round(car.speed, 2)}
+                log.send("car.location", str(car.index), payload,
+                         lambda: client.put(f"/cars/{car.car_number}/location", json=payload, headers=headers))
+        _apply_status_events(events)
+        _pace(started, now, args.speedup)
+
+def replay(args: argparse.Namespace, client, log: RequestLog) -> int:
+    """
+    回放另一个数据库中的小车日志（告警日志除外），返回回放的条数
+
+    按小车编号对应目标库中的小车，目标库中不存在的小车自动创建
+    """
+    from sqlalchemy import create_engine, select
+    from app.core.security import create_car_token
+    from app.db.database import SessionLocal, get_engine
+    import app.models as models
+    from app.models.car import Car
+    from app.models.car_log import CarLog
+    from app.services.anomaly_service import ALERT_LOG_TYPE
+
+    models.Base.metadata.create_all(bind=get_engine())
+    source = create_engine(args.replay_from)
+    target_ids = {}
+    replayed = 0
+    started = time.perf_counter()
+    first_logged_at = None
+    db = SessionLocal()
+    try:
+        with source.connect() as connection:
+            rows = connection.execution_options(yield_per=1000).execute(
+                select(
+                    Car.car_number, CarLog.logged_at, CarLog.task_status, CarLog.current_latitude,
+                    CarLog.current_longitude, CarLog.current_speed, CarLog.battery_level,
+                ).join(Car, Car.id == CarLog.car_id)
+                .where((CarLog.log_type.is_(None)) | (CarLog.log_type != ALERT_LOG_TYPE))
+                .order_by(CarLog.logged_at, CarLog.id)
+            )
+            for row in rows:
+                if row.current_latitude is None or row.current_longitude is None:
+                    continue
+                if row.car_number not in target_ids:
+                    car = db.query(Car).filter(Car.car_number == row.car_number).first()
+                    if car is None:
+                        car = Car(car_number=row.car_number)
+                        db.add(car)
+                        db.commit()
+                    target_ids[row.car_number] = (car.id, {"Authorization": f"Bearer {create_car_token(car.id, car.car_number)}"})
+                if first_logged_at is None:
+                    first_logged_at = row.logged_at
+                _pace(started, (row.logged_at - first_logged_at).total_seconds(), args.speedup)
+                payload = {
+                    "current_latitude": row.current_latitude, "current_longitude": row.current_longitude,
+                    "current_speed": row.current_speed or 0.0, "battery_level": row.battery_level,
+                    "task_status": getattr(row.task_status, "value", row.task_status),
+                }
+                car_id, headers = target_ids[row.car_number]
+                log.send("car.telemetry", row.car_number, payload,
+                         lambda: client.post(f"/cars/{car_id}/telemetry", json=payload, headers=headers))
+                replayed += 1
+    finally:
+        db.close()
+        source.dispose()
+    return replayed
+
+def summarize_fleet(cars: List[VirtualCar]) -> dict:
+    return {
+        "cars": len(cars),
+        "finished": sum(1 for car in cars if car.finished),
+        "steps_reached": sum(car.next_step for car in cars),
+        "distance_km": round(sum(car.odometer_km for car in cars), 3),
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    database_url = configure_environment(args)
+    run_tag = args.run_tag or f"sim{args.seed}-{int(time.time())}"
+    log = RequestLog()
+    client = make_client(args.base_url)
+    start = time.perf_counter()
+    try:
+        if args.replay_from:
+            result = {"mode": "replay", "replayed": replay(args, client, log)}
+        else:
+            cars = seed_fleet(args, random.Random(args.seed), run_tag)
+            simulate(args, client, cars, log)
+            result = {"mode": "simulate", "fleet": summarize_fleet(cars)}
+    finally:
+        client.close()
+        if not args.base_url:
+            # 进程内模式下写回合并器中剩余的小车位置
+            from app.services.car_position_service import get_position_coalescer
+            from app.db.database import SessionLocal
+            db = SessionLocal()
+            try:
+                get_position_coalescer().flush(db)
+            finally:
+                db.close()
+
+    from sqlalchemy.engine import make_url
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "target": args.base_url or "in-process",
+            "database": make_url(database_url).get_backend_name(),
+            "duration": args.duration,
+            "tick": args.tick,
+            "speedup": args.speedup,
+            "wall_seconds": round(time.perf_counter() - start, 3),
+        },
+        **result,
+        "requests": dict(log.counts),
+        "digest": log.digest,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for name, counts in sorted(log.counts.items()):
+        print(f"{name:16s} {counts['requests']:8d} requests {counts['errors']:6d} errors")
+    print(f"digest {log.digest}")
+    print(f"结果已写入 {args.output}")
+
+if __name__ == "__main__":
+    main()
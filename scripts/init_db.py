@@ -1,2 +1,23 @@
 # 数据库初始化脚本
-# 创建数据库表、初始化基础数据等
\ No newline at end of file
+# 创建数据库表、初始化基础数据等
+# 用法: python scripts/init_db.py
+# 新建的数据库直接按模型建表并标记为最新迁移版本，之后的表结构变更由scripts/migrate.py执行
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic import command
+
+import app.models as models
+from app.db.database import get_engine
+from scripts.migrate import get_alembic_config
+
+def main():
+    engine = get_engine()
+    models.Base.metadata.create_all(bind=engine)
+    command.stamp(get_alembic_config(engine.url.render_as_string(hide_password=False)), "head")
+    print(f"已创建 {len(models.Base.metadata.tables)} 张表")
+
+if __name__ == "__main__":
+    main()
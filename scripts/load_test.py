@@ -0,0 +1,307 @@
+# API负载测试
+# 按脚本化的客户端群体并发访问API，输出每个场景的吞吐量、p50/p95/p99延迟和错误率（JSON文件），便于跨提交对比
+#   app_user:   APP用户初始化会话后循环发送心跳、校验会话
+#   car:        小车循环上报遥测（位置随机游走、电量递减）
+#   dispatcher: 调度员循环读取路线及步骤
+# 默认使用临时SQLite文件代替PostgreSQL并在进程内驱动应用；--database-url可指向本地PostgreSQL
+# 指定--base-url时改为访问已运行的服务（此时--database-url和SECRET_KEY需与该服务一致，用于写入种子数据和签发令牌）
+# 相同的--seed产生相同的种子数据和请求序列
+# 用法: python scripts/load_test.py --output load-results.json [--users 20] [--cars 20] [--dispatchers 5] [--iterations 50]
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 种子数据中心点（上海），小车和路线步骤坐标在其附近随机分布
+CENTER = (31.23, 121.47)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="API负载测试")
+    parser.add_argument("--output", default="load-results.json", help="结果JSON文件路径")
+    parser.add_argument("--database-url", default=None, help="数据库URL，默认使用临时SQLite文件")
+    parser.add_argument("--base-url", default=None, help="已运行服务的地址，默认在进程内驱动应用")
+    parser.add_argument("--users", type=int, default=20, help="APP用户数")
+    parser.add_argument("--cars", type=int, default=20, help="小车数")
+    parser.add_argument("--dispatchers", type=int, default=5, help="调度员数")
+    parser.add_argument("--routes", type=int, default=20, help="种子路线数")
+    parser.add_argument("--steps-per-route", type=int, default=10, help="每条路线的步骤数")
+    parser.add_argument("--iterations", type=int, default=50, help="每个客户端的循环次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace) -> str:
+    """在导入应用前设置环境变量，返回实际使用的数据库URL"""
+    database_url = args.database_url
+    if not database_url:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="load-test-"), "load.db")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "load-test-secret-key")
+    os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+    # 负载测试按压缩后的时间线发送请求，默认关闭按键限流以测量服务本身的容量
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return database_url
+
+def seed_data(args: argparse.Namespace, rng: random.Random, run_tag: str) -> dict:
+    """
+    写入种子数据（用户、小车、路线及步骤），返回各场景需要的ID和令牌
+
+    名称带运行标识，可重复写入同一个PostgreSQL库
+    """
+    from sqlalchemy import func
+    import app.models as models
+    from app.core.security import create_access_token, create_car_token
+    from app.db.database import SessionLocal, get_engine
+    from app.models.enums import UserRole
+    from app.models.route import RouteStep
+
+    models.Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        users = [
+            models.User(
+                username=f"{run_tag}-user-{i}", email=f"{run_tag}-user-{i}@example.com",
+                hashed_password="x", name=f"user-{i}", phone="13800000000"
+            )
+            for i in range(args.users)
+        ]
+        dispatchers = [
+            models.User(
+                username=f"{run_tag}-dispatcher-{i}", email=f"{run_tag}-dispatcher-{i}@example.com",
+                hashed_password="x", name=f"dispatcher-{i}", phone="13800000000", role=UserRole.admin
+            )
+            for i in range(args.dispatchers)
+        ]
+        cars = [
+            models.Car(
+                car_number=f"{run_tag}-car-{i}",
+                current_latitude=CENTER[0] + rng.uniform(-0.05, 0.05),
+                current_longitude=CENTER[1] + rng.uniform(-0.05, 0.05),
+            )
+            for i in range(args.cars)
+        ]
+        routes = [models.Route(name=f"{run_tag}-route-{i}") for i in range(args.routes)]
+        db.add_all(users + dispatchers + cars + routes)
+        db.flush()
+
+        # 路线步骤是复合主键，id需要显式分配
+        next_step_id = (db.query(func.max(RouteStep.id)).scalar() or 0) + 1
+        for route in routes:
+            for order in range(1, args.steps_per_route + 1):
+                db.add(RouteStep(
+                    id=next_step_id, route_id=route.id, step_order=order,
+                    pickup_latitude=CENTER[0] + rng.uniform(-0.05, 0.05),
+                    pickup_longitude=CENTER[1] + rng.uniform(-0.05, 0.05),
+                    location_description=f"step {order}",
+                ))
+                next_step_id += 1
+        db.commit()
+
+        return {
+            "user_ids": [user.id for user in users],
+            "dispatcher_tokens": [create_access_token(data={"sub": user.username}) for user in dispatchers],
+            "cars": [(car.id, create_car_token(car.id, car.car_number), car.current_latitude, car.current_longitude) for car in cars],
+            "route_ids": [route.id for route in routes],
+        }
+    finally:
+        db.close()
+
+class Recorder:
+    """线程安全的请求结果收集器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.spans = {}
+
+    def timed(self, scenario: str, operation: str, send):
+        start = time.perf_counter()
+        try:
+            ok = send().status_code < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples[(scenario, operation)].append((elapsed, ok))
+
+    def span(self, scenario: str, start: float, end: float):
+        with self._lock:
+            first, last = self.spans.get(scenario, (start, end))
+            self.spans[scenario] = (min(first, start), max(last, end))
+
+def app_user_scenario(client, rng: random.Random, data: dict, index: int, iterations: int, recorder: Recorder):
+    user_id = data["user_ids"][index % len(data["user_ids"])]
+    session_ids = []
+
+    def initialize():
+        response = client.post("/user-sessions/initialize", json={
+            "userId": user_id, "deviceId": f"load-device-{index}", "timestamp": int(time.time() * 1000)
+        })
+        if response.status_code < 400:
+            session_ids.append(response.json()["session_id"])
+        return response
+
+    recorder.timed("app_user", "session.initialize", initialize)
+    if not session_ids:
+        return
+    session_id = session_ids[0]
+    for _ in range(iterations):
+        recorder.timed("app_user", "session.heartbeat", lambda: client.post(
+            f"/user-sessions/{session_id}/heartbeat", json={"timestamp": int(time.time() * 1000)}
+        ))
+        recorder.timed("app_user", "session.validate", lambda: client.get(f"/user-sessions/{session_id}/validate"))
+
+def car_scenario(client, rng: random.Random, data: dict, index: int, iterations: int, recorder: Recorder):
+    car_id, token, latitude, longitude = data["cars"][index % len(data["cars"])]
+    headers = {"Authorization": f"Bearer {token}"}
+    battery = 100.0
+    for _ in range(iterations):
+        latitude += rng.uniform(-0.0005, 0.0005)
+        longitude += rng.uniform(-0.0005, 0.0005)
+        battery = max(0.0, battery - rng.uniform(0, 0.2))
+        payload = {
+            "current_latitude": latitude, "current_longitude": longitude,
+            "current_speed": rng.uniform(0, 15), "battery_level": battery,
+        }
+        recorder.timed("car", "car.telemetry", lambda: client.post(f"/cars/{car_id}/telemetry", json=payload, headers=headers))
+
+def dispatcher_scenario(client, rng: random.Random, data: dict, index: int, iterations: int, recorder: Recorder):
+    headers = {"Authorization": f"Bearer {data['dispatcher_tokens'][index % len(data['dispatcher_tokens'])]}"}
+    for _ in range(iterations):
+        route_id = rng.choice(data["route_ids"])
+        recorder.timed("dispatcher", "route.get", lambda: client.get(f"/routes/{route_id}", headers=headers))
+
+SCENARIOS = {
+    "app_user": app_user_scenario,
+    "car": car_scenario,
+    "dispatcher": dispatcher_scenario,
+}
+
+def make_client(base_url):
+    if base_url:
+        import httpx
+        return httpx.Client(base_url=base_url, timeout=30)
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+def run_population(args: argparse.Namespace, data: dict, recorder: Recorder):
+    """每个虚拟客户端一个线程，所有群体同时开始"""
+    populations = {"app_user": args.users, "car": args.cars, "dispatcher": args.dispatchers}
+    jobs = [
+        (scenario, index, random.Random(f"{args.seed}-{scenario}-{index}"))
+        for scenario, count in populations.items()
+        for index in range(count)
+    ]
+    barrier = threading.Barrier(len(jobs) or 1)
+
+    def worker(scenario: str, index: int, rng: random.Random):
+        client = make_client(args.base_url)
+        try:
+            barrier.wait()
+            start = time.perf_counter()
+            SCENARIOS[scenario](client, rng, data, index, args.iterations, recorder)
+            recorder.span(scenario, start, time.perf_counter())
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=job, daemon=True) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(samples: list, seconds: float) -> dict:
+    latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+def build_report(args: argparse.Namespace, database_url: str, recorder: Recorder, total_seconds: float) -> dict:
+    from sqlalchemy.engine import make_url
+
+    scenarios = {}
+    for scenario in SCENARIOS:
+        operations = {op: s for (sc, op), s in sorted(recorder.samples.items()) if sc == scenario}
+        if not operations:
+            continue
+        first, last = recorder.spans.get(scenario, (0.0, total_seconds))
+        seconds = last - first
+        report = summarize([sample for s in operations.values() for sample in s], seconds)
+        report["operations"] = {op: summarize(s, seconds) for op, s in operations.items()}
+        scenarios[scenario] = report
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "meta": {
+            "commit": commit,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "database": make_url(database_url).get_backend_name(),
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "populations": {"app_user": args.users, "car": args.cars, "dispatcher": args.dispatchers},
+            "total_seconds": round(total_seconds, 3),
+        },
+        "scenarios": scenarios,
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.dispatchers and not args.routes:
+        raise SystemExit("--dispatchers需要至少一条种子路线（--routes）")
+    database_url = configure_environment(args)
+    rng = random.Random(args.seed)
+    run_tag = f"lt{args.seed}-{int(time.time())}"
+    data = seed_data(args, rng, run_tag)
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    run_population(args, data, recorder)
+    report = build_report(args, database_url, recorder, time.perf_counter() - start)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{'scenario':12s} {'requests':>9s} {'rps':>9s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'errors':>7s}")
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"]
+        print(f"{name:12s} {result['requests']:9d} {result['throughput_rps']:9.1f} "
+              f"{latency['p50']:8.2f} {latency['p95']:8.2f} {latency['p99']:8.2f} {result['error_rate']:7.2%}")
+    print(f"结果已写入 {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,71 @@
 # 数据库迁移脚本
-# 处理数据库结构变更和数据迁移
\ No newline at end of file
+# 处理数据库结构变更和数据迁移（Alembic，迁移脚本位于migrations/versions）
+# 用法: python scripts/migrate.py [目标版本，默认head]
+#       python scripts/migrate.py --downgrade <目标版本>
+# 引入迁移前由create_all创建的数据库没有版本记录，首次执行时先标记为基线版本再升级
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.db.database import get_engine
+
+BASELINE_REVISION = "0001"
+
+def get_alembic_config(database_url=None) -> Config:
+    """
+    获取Alembic配置
+
+    Args:
+        database_url: 数据库连接URL，为空时使用DATABASE_URL
+
+    Returns:
+        Config: Alembic配置
+    """
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    if database_url:
+        config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    return config
+
+def stamp_legacy_database(config: Config, engine) -> bool:
+    """
+    已有表但没有版本记录的数据库（引入迁移前部署）标记为基线版本
+
+    Args:
+        config: Alembic配置
+        engine: 数据库引擎
+
+    Returns:
+        bool: 是否进行了标记
+    """
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" in tables or "users" not in tables:
+        return False
+    command.stamp(config, BASELINE_REVISION)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="执行数据库迁移")
+    parser.add_argument("revision", nargs="?", default="head", help="目标版本（默认head）")
+    parser.add_argument("--downgrade", action="store_true", help="降级到目标版本")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    config = get_alembic_config(engine.url.render_as_string(hide_password=False))
+    if args.downgrade:
+        command.downgrade(config, args.revision)
+        return
+    if stamp_legacy_database(config, engine):
+        print(f"数据库没有迁移记录，已标记为基线版本 {BASELINE_REVISION}")
+    command.upgrade(config, args.revision)
+    command.current(config)
+
+if __name__ == "__main__":
+    main()
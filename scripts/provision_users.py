@@ -0,0 +1,66 @@
+# 批量创建用户
+# 从CSV（首行为字段名：username,email,name,phone,password,role,address，多个地址用;分隔）或JSON数组读取用户，
+# 调用UserService.bulk_provision写入数据库，输出逐行结果报告（JSON）
+# 用法: python scripts/provision_users.py users.csv --output report.json [--workers 8] [--database-url ...]
+import argparse
+import csv
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="批量创建用户")
+    parser.add_argument("input", help="用户数据文件（.csv或.json）")
+    parser.add_argument("--output", default=None, help="结果报告JSON文件路径，默认输出到标准输出")
+    parser.add_argument("--workers", type=int, default=None, help="计算密码哈希的进程数，默认取PASSWORD_HASH_WORKERS")
+    parser.add_argument("--database-url", default=None, help="数据库URL，默认取DATABASE_URL")
+    return parser.parse_args(argv)
+
+def read_rows(path: str) -> list:
+    """读取用户数据，CSV的空字段视为未填写"""
+    with open(path, encoding="utf-8-sig") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        rows = []
+        for record in csv.DictReader(f):
+            row = {key: value for key, value in record.items() if value not in (None, "")}
+            if "address" in row:
+                row["address"] = [part.strip() for part in row["address"].split(";") if part.strip()]
+            rows.append(row)
+        return rows
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    if args.workers is not None:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+    from app.db.database import SessionLocal
+    from app.services.user_service import UserService
+
+    rows = read_rows(args.input)
+    db = SessionLocal()
+    try:
+        def report_progress(current: int, total: int):
+            print(f"已处理 {current}/{total}", file=sys.stderr)
+
+        result = UserService(db).bulk_provision(rows, progress=report_progress)
+    finally:
+        db.close()
+
+    report = result.model_dump(mode="json")
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        print(content)
+    print(f"新建 {result.created} 个用户，跳过 {result.skipped} 行", file=sys.stderr)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# 任务队列争用测试
+# N个领取者（每个对应一辆小车、一个数据库连接）并发循环“领取-完成”直到队列清空，
+# 输出吞吐量、领取延迟p50/p95/p99、重复领取数和错误数（JSON）
+#   --strategy skip_locked  使用TaskQueueService（UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED)）
+#   --strategy naive        先查询待处理任务再按ID更新，作为对照（并发下会重复领取同一任务）
+# 默认使用临时SQLite文件（写事务串行，只能验证正确性）；争用行为需用--database-url指向PostgreSQL测量
+# 用法: python scripts/task_queue_bench.py --output task-queue-results.json [--claimers 50] [--tasks 2000]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="任务队列争用测试")
+    parser.add_argument("--output", default="task-queue-results.json", help="结果JSON文件路径")
+    parser.add_argument("--database-url", default=None, help="数据库URL，默认使用临时SQLite文件")
+    parser.add_argument("--claimers", type=int, default=50, help="并发领取者数")
+    parser.add_argument("--tasks", type=int, default=2000, help="待处理任务数")
+    parser.add_argument("--strategy", choices=("skip_locked", "naive"), default="skip_locked", help="领取方式")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace) -> str:
+    """在导入应用前设置环境变量，返回实际使用的数据库URL"""
+    database_url = args.database_url
+    if not database_url:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="task-queue-"), "queue.db")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "task-queue-bench-secret-key")
+    os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+    return database_url
+
+def create_engine_for(database_url: str, claimers: int):
+    """每个领取者一个连接，避免连接池本身成为瓶颈"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return create_engine(database_url, pool_size=claimers, max_overflow=0, connect_args={"timeout": 60})
+    return create_engine(database_url, pool_size=claimers, max_overflow=0)
+
+def seed_data(engine, args: argparse.Namespace, run_tag: str) -> list:
+    """写入小车和待处理任务，返回小车编号（带运行标识，可重复写入同一个PostgreSQL库）"""
+    from sqlalchemy import insert
+    import app.models as models
+    from app.models.enums import TaskStatus
+
+    models.Base.metadata.create_all(bind=engine)
+    car_numbers = [f"{run_tag}-car-{i}" for i in range(args.claimers)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Car), [{"car_number": number} for number in car_numbers])
+        conn.execute(insert(models.Task), [{"status": TaskStatus.pending} for _ in range(args.tasks)])
+    return car_numbers
+
+def naive_claim(db, car_number: str):
+    """对照实现：先读后写，两步之间其他领取者可能拿到同一个任务"""
+    from sqlalchemy import select, update
+    from app.models.enums import TaskStatus
+    from app.models.task import Task
+
+    task_id = db.scalar(select(Task.id).where(Task.status == TaskStatus.pending).order_by(Task.id).limit(1))
+    if task_id is None:
+        db.rollback()
+        return None
+    db.execute(update(Task).where(Task.id == task_id).values(status=TaskStatus.running, assigned_car_number=car_number))
+    db.commit()
+    return task_id
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def run(args: argparse.Namespace, engine, car_numbers: list) -> dict:
+    """启动所有领取者，同时开始领取，直到队列清空"""
+    from sqlalchemy.orm import sessionmaker
+    from app.services.task_queue_service import TaskQueueService
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+    claimed, latencies, errors = [], [], Counter()
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(len(car_numbers))
+
+    def claimer(car_number: str):
+        db = Session()
+        service = TaskQueueService(db)
+        mine, timings = [], []
+        try:
+            start_barrier.wait()
+            while True:
+                started = time.perf_counter()
+                try:
+                    if args.strategy == "naive":
+                        task_id = naive_claim(db, car_number)
+                    else:
+                        task = service.claim(car_number)
+                        task_id = task.id if task is not None else None
+                except Exception as exc:
+                    db.rollback()
+                    with lock:
+                        errors[type(exc).__name__] += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+                if task_id is None:
+                    break
+                mine.append(task_id)
+                if args.strategy == "skip_locked":
+                    service.complete(task_id, car_number)
+        finally:
+            db.close()
+            with lock:
+                claimed.extend(mine)
+                latencies.extend(timings)
+
+    threads = [threading.Thread(target=claimer, args=(number,)) for number in car_numbers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "strategy": args.strategy,
+        "database": engine.url.get_backend_name(),
+        "claimers": args.claimers,
+        "tasks": args.tasks,
+        "claimed": len(claimed),
+        "unique_claimed": len(set(claimed)),
+        "duplicate_claims": len(claimed) - len(set(claimed)),
+        "errors": dict(errors),
+        "elapsed_s": round(elapsed, 3),
+        "claims_per_second": round(len(claimed) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+        },
+    }
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    database_url = configure_environment(args)
+    engine = create_engine_for(database_url, args.claimers)
+    try:
+        car_numbers = seed_data(engine, args, f"bench-{int(time.time() * 1000)}")
+        result = run(args, engine, car_numbers)
+    finally:
+        engine.dispose()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# 测试公共配置
+# 使用内存SQLite代替PostgreSQL，无需外部服务即可运行测试
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models as models
+from app.core.query_diagnostics import QueryCounter
+
+@pytest.fixture
+def db_engine():
+    """每个测试独立的内存数据库引擎"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    models.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db_session(db_engine):
+    """绑定到测试引擎的数据库会话"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def query_budget(db_engine):
+    """
+    查询预算：代码块内执行的SQL语句数超过预算时测试失败
+
+    用法:
+        with query_budget(3):
+            client.get(...)
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        with QueryCounter(db_engine) as counter:
+            yield counter
+        if counter.count > max_queries:
+            details = "\n".join(f"  {count}x {shape}" for shape, count in counter.shapes().items())
+            pytest.fail(f"执行了{counter.count}条SQL，超出预算{max_queries}条:\n{details}")
+    return budget
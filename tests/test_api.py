@@ -1,2 +1,627 @@
 # API接口测试
-# 包括各个API端点的单元测试和集成测试
\ No newline at end of file
+# 包括各个API端点的单元测试和集成测试
+import asyncio
+import json
+import os
+from datetime import datetime
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core import admission
+from app.core.config import get_settings
+from app.core.security import create_access_token, create_car_token, decrypt_job_payload
+from app.db.database import get_db
+from app.db.replicas import get_read_db
+from app.main import app
+from app.models.announcement import Announcement
+from app.models.enums import UserRole
+from app.models.user import User
+from app.services.announcement_service import announcement_cache
+from app.services.dashboard_service import dashboard_cache
+from app.services.route_service import route_payload_cache
+from app.utils import idempotency, rate_limit
+
+
+@pytest.fixture
+def client(db_session, monkeypatch):
+    # 各测试使用独立的内存数据库，ID会重复，不能沿用上一个测试的路线缓存、看板快照和限流令牌桶
+    route_payload_cache.clear()
+    dashboard_cache.invalidate()
+    monkeypatch.setattr(rate_limit, "_store", rate_limit.LocalRateLimitStore())
+    monkeypatch.setattr(idempotency, "_store", idempotency.LocalIdempotencyStore())
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("skip_validation", [True, False])
+def test_session_config_serialization_paths_match(client, monkeypatch, skip_validation):
+    monkeypatch.setattr(get_settings(), "skip_trusted_response_validation", skip_validation)
+    response = client.get("/user-sessions/config")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "session_timeout": 30 * 60 * 1000,
+        "heartbeat_interval": 5 * 60 * 1000,
+        "max_concurrent_sessions": 1,
+    }
+
+
+def test_announcements_support_conditional_get(client, db_session, db_engine):
+    announcement_cache.invalidate()
+    db_session.add(Announcement(title="停运通知", content="周日停运", date="2025-10-01"))
+    db_session.commit()
+
+    first = client.get("/announcements")
+    assert first.status_code == 200
+    assert [a["title"] for a in first.json()] == ["停运通知"]
+    etag = first.headers["etag"]
+
+    statements = []
+    event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    cached = client.get("/announcements", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert statements == []
+
+    version = int(first.headers["x-announcements-version"])
+    announcement = db_session.query(Announcement).first()
+    announcement.title = "恢复运营"
+    db_session.commit()
+
+    changed = client.get("/announcements", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert int(changed.headers["x-announcements-version"]) > version
+
+
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.db.database as database
+engine_created_on_import = database._engine is not None
+with TestClient(app.main.app) as client:
+    status_code = client.get("/user-sessions/config").status_code
+print(json.dumps({
+    "import_seconds": imported - start,
+    "total_seconds": time.perf_counter() - start,
+    "status_code": status_code,
+    "engine_created_on_import": engine_created_on_import,
+}))
+"""
+
+
+def test_startup_benchmark_import_and_first_request():
+    # 指向不可达的数据库：导入和无需数据库的首个请求都不应尝试连接
+    env = dict(os.environ, DATABASE_URL="postgresql://nobody@127.0.0.1:1/unreachable", DB_CREATE_TABLES_ON_STARTUP="false")
+    budget = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=root, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+
+    assert result["status_code"] == 200
+    assert result["engine_created_on_import"] is False
+    assert result["total_seconds"] < budget
+
+
+def test_database_endpoints_work_without_session_override(tmp_path, monkeypatch):
+    # 不替换get_db：会话应绑定到按DATABASE_URL延迟创建的引擎
+    import app.models as models
+    from app.db import database
+
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    setup_engine = database.create_db_engine(url)
+    models.Base.metadata.create_all(bind=setup_engine)
+    setup_engine.dispose()
+    monkeypatch.setattr(get_settings(), "database_url", url)
+    database.dispose_engine()
+    announcement_cache.invalidate()
+    try:
+        response = TestClient(app).get("/announcements")
+    finally:
+        database.dispose_engine()
+        announcement_cache.invalidate()
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_load_test_harness_reports_per_scenario_latency(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = tmp_path / "load.json"
+    subprocess.run(
+        [sys.executable, "scripts/load_test.py", "--output", str(output), "--users", "2", "--cars", "2",
+         "--dispatchers", "1", "--routes", "2", "--steps-per-route", "3", "--iterations", "3"],
+        cwd=root, env=dict(os.environ, DATABASE_URL=""), capture_output=True, text=True, check=True
+    )
+    report = json.loads(output.read_text())
+
+    assert report["meta"]["database"] == "sqlite"
+    assert set(report["scenarios"]) == {"app_user", "car", "dispatcher"}
+    assert report["scenarios"]["app_user"]["requests"] == 2 * (1 + 2 * 3)
+    for result in report["scenarios"].values():
+        assert result["error_rate"] == 0
+        assert set(result["latency_ms"]) == {"p50", "p95", "p99", "max"}
+
+
+def test_fleet_simulator_is_reproducible_and_replays_car_logs(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def run(name, *args):
+        output = tmp_path / f"{name}.json"
+        subprocess.run(
+            [sys.executable, "scripts/fleet_simulator.py", "--output", str(output), *args],
+            cwd=root, env=dict(os.environ, DATABASE_URL=""), capture_output=True, text=True, check=True
+        )
+        return json.loads(output.read_text())
+
+    source = f"sqlite:///{tmp_path / 'source.db'}"
+    options = ["--cars", "2", "--steps-per-route", "2", "--duration", "60", "--seed", "7"]
+    first = run("first", *options, "--database-url", source)
+    second = run("second", *options)
+    assert first["digest"] == second["digest"]
+    assert first["fleet"]["steps_reached"] > 0
+    assert all(counts["errors"] == 0 for counts in first["requests"].values())
+
+    replayed = run("replay", "--replay-from", source)
+    assert replayed["replayed"] >= first["requests"]["car.telemetry"]["requests"]
+    assert replayed["requests"]["car.telemetry"]["errors"] == 0
+
+
+def test_task_queue_contention_benchmark_never_double_claims(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = tmp_path / "queue.json"
+    subprocess.run(
+        [sys.executable, "scripts/task_queue_bench.py", "--output", str(output), "--claimers", "10", "--tasks", "50"],
+        cwd=root, env=dict(os.environ, DATABASE_URL=""), capture_output=True, text=True, check=True
+    )
+    report = json.loads(output.read_text())
+
+    assert report["claimed"] == report["unique_claimed"] == 50
+    assert report["duplicate_claims"] == 0
+    assert report["errors"] == {}
+
+
+def test_migrations_upgrade_a_database_created_before_migrations(tmp_path):
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from sqlalchemy import create_engine, inspect, text
+    import app.models as models
+    from scripts.migrate import get_alembic_config
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    database_url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    # 模拟引入迁移前部署的数据库：基线表结构，没有版本记录
+    command.upgrade(get_alembic_config(database_url), "0001")
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+
+    subprocess.run(
+        [sys.executable, "scripts/migrate.py"],
+        cwd=root, env=dict(os.environ, DATABASE_URL=database_url), capture_output=True, text=True, check=True
+    )
+
+    inspector = inspect(engine)
+    express_columns = {column["name"] for column in inspector.get_columns("express")}
+    assert {"recipient_latitude", "recipient_longitude", "address_hash", "geocoded_at"} <= express_columns
+    assert "geocode_cache" in inspector.get_table_names()
+    # 迁移后的表结构与模型一致
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), models.Base.metadata) == []
+    engine.dispose()
+
+
+def test_session_heartbeats_are_rate_limited_before_reaching_the_database(client, db_session, query_budget, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_session_burst", 2)
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    session_id = client.post("/user-sessions/initialize", json={"userId": user.id, "deviceId": "phone-1", "timestamp": 0}).json()["session_id"]
+
+    for _ in range(2):
+        assert client.get(f"/user-sessions/{session_id}/validate").status_code == 200
+    with query_budget(0):
+        limited = client.get(f"/user-sessions/{session_id}/validate")
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    # 限流按会话计数，其他会话不受影响
+    assert client.get("/user-sessions/other-session/validate").status_code == 200
+
+    monkeypatch.setitem(admission._concurrency_limiters, admission.TELEMETRY_GROUP, rate_limit.ConcurrencyLimiter(1))
+    assert admission.get_concurrency_limiter(admission.TELEMETRY_GROUP).try_acquire()
+    car_headers = {"Authorization": f"Bearer {create_car_token(1, 'C1')}"}
+    with query_budget(0):
+        overloaded = client.post("/cars/1/telemetry", json={"current_latitude": 31.2, "current_longitude": 121.4, "battery_level": 80}, headers=car_headers)
+    assert overloaded.status_code == 503
+
+
+def test_dashboard_counters_are_served_from_snapshot_until_counts_change(client, db_session, query_budget):
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    first = client.get("/dashboard/counters")
+    assert first.status_code == 200
+    assert first.json()["active_sessions"] == 0
+
+    with query_budget(0):
+        cached = client.get("/dashboard/counters", headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+
+    # 新会话在同一事务内增加计数，提交后快照失效
+    client.post("/user-sessions/initialize", json={"userId": user.id, "deviceId": "phone-1", "timestamp": 0})
+    refreshed = client.get("/dashboard/counters", headers={"If-None-Match": first.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["active_sessions"] == 1
+
+
+def test_retried_initialize_is_replayed_from_idempotency_cache(client, db_session, query_budget):
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    payload = {"userId": user.id, "deviceId": "phone-1", "timestamp": 0}
+    headers = {"Idempotency-Key": "init-1"}
+
+    first = client.post("/user-sessions/initialize", json=payload, headers=headers)
+    assert first.status_code == 201
+    with query_budget(0):
+        retried = client.post("/user-sessions/initialize", json=payload, headers=headers)
+    assert retried.status_code == 201
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert retried.json() == first.json()
+    assert len(client.get(f"/user-sessions/active/{user.id}").json()) == 1
+
+    # 同一客户端的同一个键用于不同内容的请求被拒绝；其他设备使用相同的键互不影响；不带键的请求照常处理
+    assert client.post("/user-sessions/initialize", json={**payload, "timestamp": 1}, headers=headers).status_code == 422
+    other_device = client.post("/user-sessions/initialize", json={**payload, "deviceId": "phone-2"}, headers=headers)
+    assert other_device.status_code == 201 and "Idempotent-Replayed" not in other_device.headers
+    assert client.post("/user-sessions/initialize", json=payload).json()["session_id"] != first.json()["session_id"]
+
+
+def test_session_lifecycle_uses_shared_metadata(client, db_session):
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+
+    created = client.post("/user-sessions/initialize", json={"userId": user.id, "deviceId": "phone-1", "timestamp": 0})
+    assert created.status_code == 201
+    session_id = created.json()["session_id"]
+    assert client.get(f"/user-sessions/{session_id}/validate").json() == {"valid": True}
+    assert len(client.get(f"/user-sessions/active/{user.id}").json()) == 1
+
+
+def test_metrics_expose_route_latency_and_db_queries(client, db_session):
+    from app.core.instrumentation import DB_QUERIES, HTTP_REQUEST_DURATION
+
+    route = "/user-sessions/active/{user_id}"
+    before_requests = HTTP_REQUEST_DURATION.count(("GET", route))
+    before_queries = DB_QUERIES.value((route,))
+    assert client.get("/user-sessions/active/42").status_code == 200
+
+    assert HTTP_REQUEST_DURATION.count(("GET", route)) == before_requests + 1
+    assert DB_QUERIES.value((route,)) >= before_queries + 2
+
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/user-sessions/active/{user_id}",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/user-sessions/active/{user_id}",le="+Inf"}' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+
+
+def test_active_sessions_stay_within_query_budget(client, db_session, query_budget):
+    user = User(username="bob", email="bob@example.com", hashed_password="x", name="bob", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    for device in ("phone-1", "phone-2"):
+        client.post("/user-sessions/initialize", json={"userId": user.id, "deviceId": device, "timestamp": 0})
+
+    with query_budget(3):
+        assert client.get(f"/user-sessions/active/{user.id}").status_code == 200
+
+
+def test_route_detail_loads_graph_in_constant_queries_and_caches(client, db_session, query_budget):
+    from app.models.appointment import Appointment
+    from app.models.enums import ExpressStatus
+    from app.models.express import Express
+    from app.models.route import Route, RouteStep
+
+    user = User(username="carol", email="carol@example.com", hashed_password="x", name="carol", phone="123", role=UserRole.admin)
+    route = Route(name="morning")
+    db_session.add_all([user, route])
+    db_session.commit()
+    for order in range(1, 6):
+        tracking_number = f"SF{order}"
+        db_session.add(Express(recipient_name="r", recipient_phone="1", recipient_address="addr", tracking_number=tracking_number, recipient_user_id=user.id))
+        db_session.add(Appointment(id=order, customer_id=user.id, express_tracking_number=tracking_number, appointment_time=datetime(2024, 1, 1, 9)))
+        db_session.add(RouteStep(id=order, route_id=route.id, step_order=order, express_tracking_number=tracking_number, appointment_id=order))
+    db_session.commit()
+    route_id = route.id
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'carol'})}"}
+    # 路线详情包含收件人联系方式，普通用户不能访问
+    db_session.add(User(username="frank", email="frank@example.com", hashed_password="x", name="frank", phone="123"))
+    db_session.commit()
+    customer = {"Authorization": f"Bearer {create_access_token(data={'sub': 'frank'})}"}
+    assert client.get(f"/routes/{route_id}", headers=customer).status_code == 403
+
+    # 用户认证1条 + 路线1条 + 步骤（连接快递和预约）1条
+    with query_budget(3):
+        first = client.get(f"/routes/{route_id}", headers=headers)
+    assert first.status_code == 200
+    steps = first.json()["route_steps"]
+    assert [step["express_tracking_number"] for step in steps] == ["SF1", "SF2", "SF3", "SF4", "SF5"]
+    assert all(step["express"]["status"] == "unassigned" for step in steps)
+    assert all(step["appointment"]["status"] == "scheduled" for step in steps)
+
+    with query_budget(1):
+        cached = client.get(f"/routes/{route_id}", headers=headers)
+    assert cached.content == first.content
+    assert client.get(f"/routes/{route_id}", headers=dict(headers, **{"If-None-Match": first.headers["etag"]})).status_code == 304
+
+    # 小车只能获取分配给本车的路线，缓存命中时只查询一次分配关系
+    from app.models.car import Car
+    from app.models.task import Task
+
+    cars = [Car(car_number="C1"), Car(car_number="C2")]
+    db_session.add_all(cars)
+    db_session.commit()
+    db_session.add(Task(route_id=route_id, assigned_car_number="C1"))
+    db_session.commit()
+    own_car, other_car = [{"Authorization": f"Bearer {create_car_token(car.id, car.car_number)}"} for car in cars]
+    with query_budget(1):
+        own = client.get(f"/routes/{route_id}", headers=own_car)
+    assert own.status_code == 200 and own.content == first.content
+    assert client.get(f"/routes/{route_id}", headers=other_car).status_code == 403
+
+    express = db_session.query(Express).filter(Express.tracking_number == "SF3").one()
+    express.status = ExpressStatus.delivering
+    db_session.commit()
+    updated = client.get(f"/routes/{route_id}", headers=headers)
+    assert updated.headers["etag"] != first.headers["etag"]
+    assert updated.json()["route_steps"][2]["express"]["status"] == "delivering"
+
+
+def test_route_and_track_geometry_can_be_polyline_encoded(client, db_session):
+    from app.models.car import Car
+    from app.models.car_log import CarLog
+    from app.models.enums import CarTaskStatus
+    from app.models.route import Route, RouteStep
+    from app.utils.polyline import decode_polyline
+
+    user = User(username="dave", email="dave@example.com", hashed_password="x", name="dave", phone="123", role=UserRole.admin)
+    route = Route(name="evening")
+    car = Car(car_number="C1")
+    db_session.add_all([user, route, car])
+    db_session.commit()
+    coordinates = [(31.2, 121.4), (31.201, 121.402), (31.203, 121.401)]
+    for order, (lat, lon) in enumerate(coordinates, start=1):
+        db_session.add(RouteStep(id=order, route_id=route.id, step_order=order, pickup_latitude=lat, pickup_longitude=lon))
+    db_session.add(RouteStep(id=4, route_id=route.id, step_order=4))
+    for second in range(60):
+        db_session.add(CarLog(car_id=car.id, logged_at=datetime(2024, 1, 1, 8, 0, second), task_status=CarTaskStatus.idle,
+                              battery_level=90, current_latitude=31.2 + second * 0.0001, current_longitude=121.4 + second * 0.0001))
+    db_session.commit()
+    route_id, car_id = route.id, car.id
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'dave'})}"}
+
+    encoded = client.get(f"/routes/{route_id}?geometry=polyline", headers=headers).json()
+    assert decode_polyline(encoded["geometry"]["polyline"]) == coordinates
+    assert encoded["geometry"]["step_orders"] == [1, 2, 3]
+    assert "pickup_latitude" not in encoded["route_steps"][0]
+    by_accept = client.get(f"/routes/{route_id}", headers=dict(headers, Accept="application/vnd.polyline+json"))
+    assert by_accept.json() == encoded
+    plain = client.get(f"/routes/{route_id}", headers=headers).json()
+    assert plain["route_steps"][0]["pickup_latitude"] == 31.2 and "geometry" not in plain
+
+    track_json = client.get(f"/cars/{car_id}/track", headers=headers)
+    track_polyline = client.get(f"/cars/{car_id}/track?geometry=polyline", headers=headers)
+    assert len(track_json.json()["points"]) == 60
+    body = track_polyline.json()
+    assert body["time_offsets"] == list(range(60))
+    assert [(round(lat, 4), round(lon, 4)) for lat, lon in decode_polyline(body["polyline"])] == [
+        (round(p["latitude"], 4), round(p["longitude"], 4)) for p in track_json.json()["points"]
+    ]
+    assert len(track_polyline.content) * 3 < len(track_json.content)
+
+
+def test_car_track_is_limited_to_admins_and_customers_with_parcels_on_board(client, db_session):
+    from app.models.car import Car
+    from app.models.enums import ExpressStatus
+    from app.models.express import Express
+    from app.models.task import Task
+
+    erin = User(username="erin", email="erin@example.com", hashed_password="x", name="erin", phone="123")
+    frank = User(username="frank", email="frank@example.com", hashed_password="x", name="frank", phone="123")
+    car = Car(car_number="C1")
+    task = Task(assigned_car_number="C1")
+    db_session.add_all([erin, frank, car, task])
+    db_session.commit()
+    parcel = Express(recipient_name="erin", recipient_phone="123", recipient_address=["1号楼"], tracking_number="SF1",
+                     recipient_user_id=erin.id, task_id=task.id, status=ExpressStatus.delivering)
+    db_session.add(parcel)
+    db_session.commit()
+    car_id = car.id
+    erin_headers, frank_headers = [{"Authorization": f"Bearer {create_access_token(data={'sub': name})}"} for name in ("erin", "frank")]
+
+    # 只能查看正在配送本人快递的小车
+    assert client.get(f"/cars/{car_id}/track", headers=erin_headers).status_code == 200
+    assert client.get(f"/cars/{car_id}/track", headers=frank_headers).status_code == 403
+    parcel.status = ExpressStatus.completed
+    db_session.commit()
+    assert client.get(f"/cars/{car_id}/track", headers=erin_headers).status_code == 403
+
+
+def _stream_sse(path, headers, emit, expected_events):
+    """直接以ASGI调用SSE接口：订阅建立后调用emit，收到expected_events条事件后断开连接"""
+    path, _, query = path.partition("?")
+
+    async def run():
+        messages = asyncio.Queue()
+        messages.put_nowait({"type": "http.request", "body": b"", "more_body": False})
+        chunks, opened, received = [], asyncio.Event(), asyncio.Event()
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(message["body"].decode())
+                opened.set()
+                if "".join(chunks).count("event: ") >= expected_events:
+                    received.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "client": ("testclient", 50000), "server": ("testserver", 80),
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        }
+        call = asyncio.create_task(app(scope, messages.get, send))
+        await asyncio.wait_for(opened.wait(), timeout=5)
+        emit()
+        await asyncio.wait_for(received.wait(), timeout=5)
+        messages.put_nowait({"type": "http.disconnect"})
+        await asyncio.wait_for(call, timeout=5)
+        return "".join(chunks)
+
+    body = asyncio.run(run())
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def test_event_streams_push_only_the_subscribers_events(client, db_session, monkeypatch):
+    from app.models.car import Car
+    from app.models.enums import ExpressStatus
+    from app.models.express import Express
+    from app.services import event_service
+    from app.services.event_service import EventBus
+    from app.utils.pubsub import LocalBroker
+
+    monkeypatch.setattr(event_service, "_event_bus", EventBus(LocalBroker()))
+    erin = User(username="erin", email="erin@example.com", hashed_password="x", name="erin", phone="123")
+    frank = User(username="frank", email="frank@example.com", hashed_password="x", name="frank", phone="123")
+    db_session.add_all([erin, frank, User(username="root", email="root@example.com", hashed_password="x", name="root", phone="123", role=UserRole.admin)])
+    db_session.commit()
+    parcels = [
+        Express(recipient_name=user.name, recipient_phone="123", recipient_address=["1号楼"], tracking_number=f"SF-{user.username}", recipient_user_id=user.id)
+        for user in (frank, erin)
+    ]
+    cars = [Car(car_number="C1"), Car(car_number="C2")]
+    db_session.add_all(parcels + cars)
+    db_session.commit()
+    customer = {"Authorization": f"Bearer {create_access_token(data={'sub': 'erin'})}"}
+    admin = {"Authorization": f"Bearer {create_access_token(data={'sub': 'root'})}"}
+
+    def deliver_parcels():
+        for parcel in parcels:
+            parcel.status = ExpressStatus.delivering
+            db_session.commit()
+
+    # 用户只收到自己快递的事件
+    events = _stream_sse("/events/express", customer, deliver_parcels, expected_events=1)
+    assert [(e["type"], e["tracking_number"], e["status"]) for e in events] == [("express.status", "SF-erin", "delivering")]
+
+    def move_cars():
+        for car in reversed(cars):
+            car.battery_level = 50.0
+            db_session.commit()
+
+    # 车队事件仅限非客户角色，可按小车编号过滤
+    assert client.get("/events/fleet").status_code == 401
+    assert client.get("/events/fleet", headers=customer).status_code == 403
+    events = _stream_sse("/events/fleet?car_numbers=C1", admin, move_cars, expected_events=1)
+    assert [(e["type"], e["car_number"], e["battery_level"]) for e in events] == [("car.status", "C1", 50.0)]
+
+
+def test_background_jobs_require_admin(client, db_session, monkeypatch):
+    from types import SimpleNamespace
+    from app.api import job_routes
+
+    db_session.add_all([
+        User(username="erin", email="erin@example.com", hashed_password="x", name="erin", phone="123"),
+        User(username="root", email="root@example.com", hashed_password="x", name="root", phone="123", role=UserRole.admin),
+    ])
+    db_session.commit()
+    customer = {"Authorization": f"Bearer {create_access_token(data={'sub': 'erin'})}"}
+    admin = {"Authorization": f"Bearer {create_access_token(data={'sub': 'root'})}"}
+
+    assert client.get("/jobs/some-job").status_code == 401
+    assert client.get("/jobs/some-job", headers=customer).status_code == 403
+    assert client.post("/jobs/express/import", json=[], headers=customer).status_code == 403
+    assert client.post("/jobs/routes/1/optimize", headers=customer).status_code == 403
+    assert client.get("/jobs/some-job", headers=admin).json()["status"] == "PENDING"
+
+    # 批量创建用户：任务消息中的用户数据已加密，由worker解密
+    submitted = []
+    monkeypatch.setattr(job_routes.bulk_provision_users, "delay", lambda payload: submitted.append(payload) or SimpleNamespace(id="job-1", state="PENDING"))
+    new_user = {"username": "gina", "name": "gina", "phone": "123", "password": "secret-pass"}
+    assert client.post("/jobs/users/provision", json=[new_user], headers=admin).status_code == 202
+    [payload] = submitted
+    assert isinstance(payload, str) and "secret-pass" not in payload
+    [row] = decrypt_job_payload(payload)
+    assert (row["username"], row["password"]) == ("gina", "secret-pass")
+
+
+def test_car_reports_require_that_cars_token(client, db_session):
+    from app.models.car import Car
+
+    db_session.add_all([
+        Car(car_number="C1"), Car(car_number="C2"),
+        User(username="root", email="root@example.com", hashed_password="x", name="root", phone="123", role=UserRole.admin),
+    ])
+    db_session.commit()
+    admin = {"Authorization": f"Bearer {create_access_token(data={'sub': 'root'})}"}
+    payload = {"current_latitude": 31.2, "current_longitude": 121.4, "battery_level": 80}
+
+    token = client.post("/cars/1/token", headers=admin).json()["access_token"]
+    assert client.post("/cars/1/token", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.post("/cars/1/telemetry", json=payload).status_code == 401
+    assert client.post("/cars/2/telemetry", json=payload, headers={"Authorization": f"Bearer {token}"}).status_code == 403
+    reported = client.post("/cars/1/telemetry", json=payload, headers={"Authorization": f"Bearer {token}"})
+    assert reported.status_code == 200
+    assert reported.json()["battery_level"] == 80
+
+    location = {"current_latitude": 31.3, "current_longitude": 121.5}
+    assert client.put("/cars/C1/location", json=location).status_code == 401
+    assert client.put("/cars/C2/location", json=location, headers={"Authorization": f"Bearer {token}"}).status_code == 403
+    assert client.put("/cars/C1/location", json=location, headers={"Authorization": f"Bearer {token}"}).status_code == 202
+
+
+def test_task_queue_takes_the_car_from_its_token(client, db_session):
+    from app.models.car import Car
+    from app.models.task import Task
+
+    db_session.add_all([Car(car_number="C1"), Car(car_number="C2"), Task()])
+    db_session.add_all([
+        User(username="erin", email="erin@example.com", hashed_password="x", name="erin", phone="123"),
+        User(username="root", email="root@example.com", hashed_password="x", name="root", phone="123", role=UserRole.admin),
+    ])
+    db_session.commit()
+    c1 = {"Authorization": f"Bearer {create_car_token(1, 'C1')}"}
+    c2 = {"Authorization": f"Bearer {create_car_token(2, 'C2')}"}
+    customer = {"Authorization": f"Bearer {create_access_token(data={'sub': 'erin'})}"}
+    dispatcher = {"Authorization": f"Bearer {create_access_token(data={'sub': 'root'})}"}
+
+    assert client.post("/tasks/claim").status_code == 401
+    assert client.post("/tasks/claim", headers={"Authorization": f"Bearer {create_access_token(data={'sub': 'C1'})}"}).status_code == 401
+    # 客户不能领取任务；小车不能为其他小车领取
+    assert client.post("/tasks/claim", json={"car_number": "C1"}, headers=customer).status_code == 403
+    assert client.post("/tasks/claim", json={"car_number": "C2"}, headers=c1).status_code == 403
+    claimed = client.post("/tasks/claim", headers=c1)
+    assert claimed.json()["assigned_car_number"] == "C1"
+    task_id = claimed.json()["id"]
+    assert client.post("/tasks/claim", headers=c2).status_code == 204
+    # 其他小车不能完成或放弃该任务
+    assert client.post(f"/tasks/{task_id}/complete", headers=c2).status_code == 409
+    assert client.post(f"/tasks/{task_id}/release", headers=c2).status_code == 409
+    assert client.post(f"/tasks/{task_id}/complete", headers=c1).json()["status"] == "completed"
+
+    # 调度员指定小车代为领取，之后由该小车完成
+    db_session.add(Task())
+    db_session.commit()
+    assert client.post("/tasks/claim", headers=dispatcher).status_code == 422
+    dispatched = client.post("/tasks/claim", json={"car_number": "C2"}, headers=dispatcher).json()
+    assert dispatched["assigned_car_number"] == "C2"
+    assert client.post(f"/tasks/{dispatched['id']}/complete", headers=c2).json()["status"] == "completed"
@@ -1,2 +1,699 @@
 # 服务层测试
-# 包括各个业务服务的单元测试
\ No newline at end of file
+# 包括各个业务服务的单元测试
+import asyncio
+import json
+import pytest
+
+from app.core.config import Settings
+from app.models.enums import ExpressStatus
+from app.models.express import Express
+from app.models.geocode_cache import GeocodeCache
+from app.models.route import Route, RouteStep
+from app.models.user import User
+from app.services.event_service import EventBus
+from app.services.geocoding_service import GeocodingService, GazetteerGeocoder, GeocoderBackend
+from app.services.session_service import SessionService
+from app.utils.address import normalize_address, address_hash
+from app.utils.cache import LRUCache
+from app.utils.pubsub import LocalBroker
+from app.worker import celery_app
+
+
+class CountingGeocoder(GeocoderBackend):
+    name = "counting"
+
+    def __init__(self, coordinates=(31.2304, 121.4737)):
+        self.coordinates = coordinates
+        self.calls = 0
+
+    def geocode(self, normalized_address):
+        self.calls += 1
+        return self.coordinates
+
+
+def _create_user(db, username="alice"):
+    user = User(username=username, email=f"{username}@example.com", hashed_password="x", name=username, phone="123")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_normalize_address_is_format_insensitive():
+    assert normalize_address("  上海市，浦东新区  Ａ栋 ") == normalize_address(["上海市", "浦东新区", "a栋"])
+    assert normalize_address({"city": "上海市", "street": "世纪大道"}) == normalize_address({"street": "世纪大道", "city": "上海市"})
+    assert normalize_address(None) == ""
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_gazetteer_matches_longest_prefix(tmp_path):
+    path = tmp_path / "gazetteer.csv"
+    path.write_text("address,latitude,longitude\n上海市 浦东新区 世纪大道100号,31.23,121.50\n", encoding="utf-8")
+    geocoder = GazetteerGeocoder(str(path))
+    assert geocoder.geocode(normalize_address("上海市浦东新区 世纪大道100号 3单元")) is None
+    assert geocoder.geocode(normalize_address(["上海市 浦东新区", "世纪大道100号", "3单元"])) == (31.23, 121.50)
+
+
+def test_geocoding_uses_persistent_cache(db_session):
+    backend = CountingGeocoder()
+    GeocodingService(db_session, backend=backend, cache=LRUCache()).geocode("上海市 世纪大道")
+    db_session.commit()
+    # 新的LRU缓存模拟进程重启，坐标应从数据库缓存表读取
+    assert GeocodingService(db_session, backend=backend, cache=LRUCache()).geocode("上海市，世纪大道") == backend.coordinates
+    assert backend.calls == 1
+    assert db_session.query(GeocodeCache).count() == 1
+
+
+def test_resolve_pending_express_geocodes_each_address_once(db_session):
+    user = _create_user(db_session)
+    for i in range(3):
+        db_session.add(Express(
+            recipient_name="alice", recipient_phone="123", recipient_address=["上海市", "世纪大道"],
+            tracking_number=f"SF{i}", recipient_user_id=user.id
+        ))
+    db_session.commit()
+
+    backend = CountingGeocoder()
+    service = GeocodingService(db_session, backend=backend, cache=LRUCache())
+    assert service.resolve_pending_express() == 3
+    assert backend.calls == 1
+
+    express = db_session.query(Express).first()
+    assert service.resolve_express(express) == backend.coordinates
+    assert backend.calls == 1
+    assert express.address_hash == address_hash(normalize_address(["上海市", "世纪大道"]))
+
+
+def test_resolve_pending_express_skips_unresolvable_addresses(db_session):
+    user = _create_user(db_session)
+    for i in range(3):
+        db_session.add(Express(
+            recipient_name="alice", recipient_phone="123", recipient_address=[f"未知路{i}号"],
+            tracking_number=f"SF{i}", recipient_user_id=user.id
+        ))
+    db_session.commit()
+
+    backend = CountingGeocoder(coordinates=None)
+    service = GeocodingService(db_session, backend=backend, cache=LRUCache())
+    assert service.resolve_pending_express(limit=2) == 0
+    # 无法解析的快递不再占用后续批次，也不会重复请求后端
+    assert service.resolve_pending_express(limit=2) == 0
+    assert service.resolve_pending_express(limit=2) == 0
+    assert backend.calls == 3
+
+
+def test_event_bus_publishes_status_changes_after_commit(db_session, monkeypatch):
+    import app.services.event_service as event_service
+
+    bus = EventBus(LocalBroker())
+    monkeypatch.setattr(event_service, "_event_bus", bus)
+    user = _create_user(db_session)
+    express = Express(
+        recipient_name="alice", recipient_phone="123", recipient_address="上海市",
+        tracking_number="SF1", recipient_user_id=user.id
+    )
+    db_session.add(express)
+    db_session.commit()
+    user_id = user.id
+
+    async def scenario():
+        subscription = bus.subscribe(lambda item: item.get("user_id") == user_id)
+        express.status = ExpressStatus.delivering
+        db_session.flush()
+        await asyncio.sleep(0)
+        assert subscription.queue.empty()
+        db_session.commit()
+        return await asyncio.wait_for(subscription.queue.get(), timeout=1)
+
+    item = asyncio.run(scenario())
+    assert item["type"] == "express.status"
+    assert item["status"] == "delivering"
+    assert item["tracking_number"] == "SF1"
+
+    # 消息代理不可用时只记录日志，已提交的写操作不报错
+    class BrokenBroker(LocalBroker):
+        def publish(self, channel, message):
+            raise ConnectionError("redis unavailable")
+
+    monkeypatch.setattr(event_service, "_event_bus", EventBus(BrokenBroker()))
+    express.status = ExpressStatus.completed
+    db_session.commit()
+    db_session.expire_all()
+    assert db_session.get(Express, express.id).status == ExpressStatus.completed
+
+
+def test_optimize_route_job_reorders_steps_and_reports_result(db_session, db_engine, monkeypatch):
+    import app.worker.tasks as tasks
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setattr(tasks, "SessionLocal", sessionmaker(bind=db_engine))
+    route = Route(name="r1")
+    db_session.add(route)
+    db_session.commit()
+    for step_id, (order, lon) in enumerate([(1, 121.40), (2, 121.60), (3, 121.45)], start=1):
+        db_session.add(RouteStep(id=step_id, route_id=route.id, step_order=order, pickup_latitude=31.2, pickup_longitude=lon))
+    db_session.commit()
+
+    job = tasks.optimize_route.delay(route.id)
+    stored = celery_app.AsyncResult(job.id)
+    assert stored.state == "SUCCESS"
+    assert stored.result["step_ids"] == [1, 3, 2]
+
+    db_session.expire_all()
+    assert [s.pickup_longitude for s in db_session.get(Route, route.id).route_steps] == [121.40, 121.45, 121.60]
+
+
+def test_bulk_import_express_job_skips_duplicates(db_session, db_engine, monkeypatch):
+    import app.worker.tasks as tasks
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setattr(tasks, "SessionLocal", sessionmaker(bind=db_engine))
+    user = _create_user(db_session)
+    item = {"recipient_name": "alice", "recipient_phone": "123", "recipient_address": "上海市", "recipient_user_id": user.id}
+    job = tasks.bulk_import_express.delay([dict(item, tracking_number="SF1"), dict(item, tracking_number="SF1"), dict(item, tracking_number="SF2")])
+    assert job.get() == {"created": 2, "skipped": 1, "skipped_tracking_numbers": ["SF1"]}
+
+
+def test_session_service_reads_timeouts_from_settings(db_session):
+    settings = Settings(secret_key="x", session_timeout_minutes=10, heartbeat_interval_minutes=2)
+    config = SessionService(db_session, settings).get_session_config()
+    assert config.session_timeout == 10 * 60 * 1000
+    assert config.heartbeat_interval == 2 * 60 * 1000
+
+
+def test_normalize_statement_collapses_literals_and_in_lists():
+    from app.utils.sql import normalize_statement
+
+    assert normalize_statement("SELECT * FROM x WHERE id IN (1, 2, 3) AND name = 'a''b'") == "SELECT * FROM x WHERE id IN (?) AND name = ?"
+    assert normalize_statement("SELECT * FROM x\n WHERE id = %(id_1)s") == normalize_statement("SELECT * FROM x WHERE id = ?")
+
+
+def test_query_diagnostics_flags_repeated_statements(db_session, monkeypatch, caplog):
+    from sqlalchemy import select
+    from app.core.config import get_settings
+    from app.core.instrumentation import current_request_stats
+    from app.core.query_diagnostics import REPEATED_STATEMENTS, QueryDiagnosticsMiddleware
+
+    monkeypatch.setattr(get_settings(), "query_diagnostics_enabled", True)
+    monkeypatch.setattr(get_settings(), "n_plus_one_threshold", 3)
+    user_ids = [_create_user(db_session, username=f"user{i}").id for i in range(6)]
+    before = REPEATED_STATEMENTS.value(("unmatched",))
+
+    async def endpoint(scope, receive, send):
+        # 不经过监控中间件，诊断仍按请求统计
+        assert current_request_stats() is None
+        for user_id in user_ids:
+            db_session.execute(select(User).where(User.id == user_id)).scalar_one()
+
+    with caplog.at_level("WARNING", logger="app.core.query_diagnostics"):
+        asyncio.run(QueryDiagnosticsMiddleware(endpoint)({"type": "http", "method": "GET"}, None, None))
+
+    warnings = [r for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert REPEATED_STATEMENTS.value(("unmatched",)) == before + 1
+
+
+def test_query_budget_fails_when_exceeded(db_session, query_budget):
+    from sqlalchemy import select
+
+    with query_budget(1):
+        db_session.execute(select(User)).all()
+    with pytest.raises(pytest.fail.Exception, match="超出预算1条"):
+        with query_budget(1):
+            db_session.execute(select(User)).all()
+            db_session.execute(select(User)).all()
+
+
+def test_polyline_round_trip_matches_reference_encoding():
+    from app.utils.polyline import decode_polyline, encode_polyline
+
+    points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline(encode_polyline(points)) == points
+    assert encode_polyline([]) == ""
+
+
+def test_sync_service_returns_only_changes_since_cursor(db_session):
+    from app.models.enums import UserRole
+    from app.models.task import Task
+    from app.services.sync_service import SyncService
+
+    settings = Settings(secret_key="x", sync_settle_seconds=0)
+    dispatcher = _create_user(db_session, username="dispatcher")
+    dispatcher.role = UserRole.admin
+    customer = _create_user(db_session, username="customer")
+    other = _create_user(db_session, username="other")
+    express = Express(recipient_name="c", recipient_phone="1", recipient_address="a", tracking_number="SF1", recipient_user_id=customer.id)
+    db_session.add_all([express, Express(recipient_name="o", recipient_phone="1", recipient_address="a", tracking_number="SF2", recipient_user_id=other.id)])
+    db_session.add_all([Task(), Task()])
+    db_session.commit()
+    service = SyncService(db_session, settings)
+
+    full = service.get_changes(dispatcher)
+    assert (len(full.tasks), len(full.express), full.deleted, full.has_more) == (2, 2, [], False)
+    assert [e.id for e in service.get_changes(customer).express] == [express.id]
+    assert service.get_changes(customer).tasks == []
+
+    express.status = ExpressStatus.delivering
+    task = db_session.query(Task).first()
+    task_id = task.id
+    db_session.delete(task)
+    db_session.commit()
+    delta = service.get_changes(dispatcher, full.cursor)
+    assert [e.id for e in delta.express] == [express.id]
+    assert delta.tasks == []
+    assert [(d.entity, d.id) for d in delta.deleted] == [("tasks", task_id)]
+
+    caught_up = service.get_changes(dispatcher, delta.cursor)
+    assert (caught_up.express, caught_up.deleted) == ([], [])
+
+    # 快递转给其他用户：原用户收到删除，新用户收到变更，调度员只收到变更
+    customer_cursor = service.get_changes(customer).cursor
+    other_cursor = service.get_changes(other).cursor
+    other_id = other.id
+    # 属性已过期时修改所属用户同样能取得原值
+    db_session.expire_all()
+    express.recipient_user_id = other_id
+    db_session.commit()
+    moved_away = service.get_changes(customer, customer_cursor)
+    assert (moved_away.express, [(d.entity, d.id) for d in moved_away.deleted]) == ([], [("express", express.id)])
+    moved_in = service.get_changes(other, other_cursor)
+    assert ([e.id for e in moved_in.express], moved_in.deleted) == ([express.id], [])
+    reassigned = service.get_changes(dispatcher, caught_up.cursor)
+    assert ([e.id for e in reassigned.express], reassigned.deleted) == ([express.id], [])
+    first_page = service.get_changes(dispatcher, limit=1)
+    assert first_page.has_more and len(first_page.express) == 1
+    assert len(service.get_changes(dispatcher, first_page.cursor, limit=1).express) == 1
+    with pytest.raises(ValueError):
+        service.get_changes(dispatcher, "not-a-cursor")
+
+
+def test_local_rate_limit_store_refills_tokens_over_time(monkeypatch):
+    from app.utils import rate_limit
+
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    store = rate_limit.LocalRateLimitStore()
+
+    assert [store.consume("car_id=1", rate=2, capacity=3)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, wait_seconds = store.consume("car_id=1", rate=2, capacity=3)
+    assert not allowed and wait_seconds == pytest.approx(0.5)
+    assert store.consume("car_id=2", rate=2, capacity=3)[0]
+
+    now[0] += 0.5
+    assert store.consume("car_id=1", rate=2, capacity=3)[0]
+    assert not store.consume("car_id=1", rate=2, capacity=3)[0]
+
+
+def test_session_token_mode_validates_without_database_and_honours_revocation(db_session, db_engine):
+    from app.core.config import get_settings
+    from app.core.session_tokens import RevocationList
+    from app.core.query_diagnostics import QueryCounter
+
+    settings = get_settings().model_copy(update={"session_token_mode": True})
+    broker = LocalBroker()
+    # 另一个工作进程的吊销列表，通过消息代理同步
+    other_worker = RevocationList(broker)
+    service = SessionService(db_session, settings, revocations=RevocationList(broker))
+    user = User(username="alice", email="alice@example.com", hashed_password="x", name="alice", phone="123")
+    db_session.add(user)
+    db_session.commit()
+    user_id = user.id
+
+    first = service.initialize_user_session(user_id, "phone-1").session_id
+    assert service.validate_user_session(first).valid
+    with QueryCounter(db_engine) as counter:
+        assert service.validate_user_session(first).valid
+    assert counter.count == 0
+
+    renewed = service.send_user_heartbeat(first).session_id
+    assert renewed and service.validate_user_session(renewed).valid
+
+    # 另一台设备登录会强制终止第一个会话，两个工作进程都看到吊销
+    second = service.initialize_user_session(user_id, "phone-2").session_id
+    assert not service.validate_user_session(renewed).valid
+    assert other_worker.is_revoked(service.get_session_by_id(first).session_id)
+    assert service.validate_user_session(second).valid
+    assert not service.validate_user_session(second[:-2] + "xx").valid
+
+    # 消息代理不可用时终止会话仍然成功，本进程立即生效
+    class BrokenBroker(LocalBroker):
+        def publish(self, channel, message):
+            raise ConnectionError("redis unavailable")
+
+    service = SessionService(db_session, settings, revocations=RevocationList(BrokenBroker()))
+    third = service.initialize_user_session(user_id, "phone-3").session_id
+    assert not service.validate_user_session(second).valid
+    assert service.validate_user_session(third).valid
+
+
+def test_invalidation_bus_broadcasts_committed_changes_to_other_workers(db_session, monkeypatch):
+    from app.services.invalidation_service import InvalidationBus, invalidation_bus
+    from app.utils.pubsub import FakeBroker
+
+    broker = FakeBroker()
+    monkeypatch.setattr(invalidation_bus, "_broker", broker)
+    other_worker = InvalidationBus(broker)
+    received = []
+    other_worker.register(Route, received.append)
+
+    user = _create_user(db_session)
+    route = Route(name="r1")
+    express = Express(recipient_name="c", recipient_phone="1", recipient_address="a", tracking_number="SF1", recipient_user_id=user.id)
+    db_session.add_all([route, express])
+    db_session.commit()
+    db_session.add(RouteStep(id=1, route_id=route.id, step_order=1, express_tracking_number="SF1"))
+    db_session.commit()
+    route_id = route.id
+    assert received == [{route_id}, {route_id}]
+
+    # 回滚的修改不广播
+    express.status = ExpressStatus.delivering
+    db_session.flush()
+    db_session.rollback()
+    assert len(received) == 2
+
+    # 快递状态变化换算为引用它的路线
+    express.status = ExpressStatus.delivering
+    db_session.commit()
+    assert received[-1] == {route_id}
+    assert all(message["origin"] == invalidation_bus.origin for _, message in broker.published)
+
+
+def test_invalidation_broadcast_failure_does_not_fail_the_commit(db_session, monkeypatch, caplog):
+    from app.services.invalidation_service import invalidation_bus
+    from app.utils.pubsub import FakeBroker
+
+    class BrokenBroker(FakeBroker):
+        def publish(self, channel, message):
+            raise ConnectionError("redis unavailable")
+
+    monkeypatch.setattr(invalidation_bus, "_broker", BrokenBroker())
+    received = []
+    invalidation_bus.register(Route, received.append)
+    try:
+        route = Route(name="r1")
+        db_session.add(route)
+        with caplog.at_level("ERROR", logger="app.services.invalidation_service"):
+            db_session.commit()
+        # 本进程的缓存仍然失效，提交不报错
+        assert received == [{route.id}]
+        assert any("广播缓存失效失败" in r.getMessage() for r in caplog.records)
+    finally:
+        invalidation_bus._callbacks["routes"].remove(received.append)
+
+
+def test_car_position_coalescer_batches_latest_positions_and_samples_logs(db_session, db_engine, monkeypatch):
+    from datetime import datetime, timedelta
+    from types import SimpleNamespace
+    from sqlalchemy.orm import sessionmaker
+    from app.core.config import get_settings
+    from app.core.query_diagnostics import QueryCounter
+    from app.models.car import Car
+    from app.models.car_log import CarLog
+    from app.schemas.car import CarLocationUpdate
+    from app.services import car_position_service
+    from app.services.car_position_service import CarPositionCoalescer, POSITION_LOG_TYPE
+
+    settings = get_settings().model_copy(update={
+        "car_position_log_every": 3, "car_position_log_min_distance_m": 1000, "car_position_flush_interval_ms": 60000,
+    })
+    db_session.add_all([Car(car_number="C1"), Car(car_number="C2")])
+    db_session.commit()
+    coalescer = CarPositionCoalescer(settings)
+
+    for step in range(7):
+        coalescer.submit("C1", CarLocationUpdate(current_latitude=31.2 + step * 0.0001, current_longitude=121.4, current_speed=10))
+    coalescer.submit("C2", CarLocationUpdate(current_latitude=30.0, current_longitude=120.0))
+    coalescer.submit("UNKNOWN", CarLocationUpdate(current_latitude=30.0, current_longitude=120.0))
+    assert coalescer.pending == 3
+
+    with QueryCounter(db_engine) as counter:
+        coalescer.flush(db_session)
+    assert counter.count == 3
+    assert coalescer.pending == 0
+    assert set(coalescer._log_states) == {"C1", "C2"}
+
+    db_session.expire_all()
+    c1 = db_session.query(Car).filter_by(car_number="C1").one()
+    assert (c1.current_latitude, c1.current_speed) == (pytest.approx(31.2006), 10)
+    # 首次上报采样一次，之后每3次采样一次；C2首次上报也采样
+    logs = db_session.query(CarLog).filter_by(log_type=POSITION_LOG_TYPE).all()
+    assert sorted((log.car_id, round(log.current_latitude, 4)) for log in logs) == sorted(
+        [(c1.id, 31.2), (c1.id, 31.2003), (c1.id, 31.2006), (db_session.query(Car).filter_by(car_number="C2").one().id, 30.0)]
+    )
+
+    # 其他工作进程已写入更新的位置时，较旧的上报被拒绝，也不发布事件
+    published = []
+    monkeypatch.setattr(car_position_service, "get_event_bus", lambda: SimpleNamespace(publish=published.append))
+    db_session.query(Car).filter_by(car_number="C2").update({"updated_at": datetime.now() + timedelta(hours=1)})
+    db_session.commit()
+    coalescer.submit("C1", CarLocationUpdate(current_latitude=31.3, current_longitude=121.4))
+    coalescer.submit("C2", CarLocationUpdate(current_latitude=31.3, current_longitude=121.4))
+    assert coalescer.flush(db_session) == 1
+    assert [item["car_number"] for item in published] == ["C1"]
+
+    # 提交后发布失败不放回数据，下次写回不会重复插入采样日志
+    def broken_publish(item):
+        raise ConnectionError("bus unavailable")
+
+    monkeypatch.setattr(car_position_service, "get_event_bus", lambda: SimpleNamespace(publish=broken_publish))
+    coalescer.submit("C1", CarLocationUpdate(current_latitude=32.0, current_longitude=121.4))
+    logged = db_session.query(CarLog).count()
+    with pytest.raises(ConnectionError):
+        coalescer.flush(db_session)
+    assert coalescer.pending == 0
+    assert coalescer.flush(db_session) == 0
+    assert db_session.query(CarLog).count() == logged + 1
+
+    # 关闭时写回剩余数据
+    monkeypatch.setattr(car_position_service, "get_event_bus", lambda: SimpleNamespace(publish=published.append))
+    coalescer.start(sessionmaker(bind=db_engine))
+    coalescer.submit("C1", CarLocationUpdate(current_latitude=30.5, current_longitude=120.5))
+    coalescer.stop()
+    db_session.expire_all()
+    assert db_session.query(Car).filter_by(car_number="C1").one().current_latitude == 30.5
+
+
+def test_anomaly_detector_flags_stalls_battery_drops_and_route_drift():
+    from app.core.config import get_settings
+    from app.services.anomaly_service import BATTERY_DROP, OFF_ROUTE, STALLED, TelemetryAnomalyDetector
+
+    detector = TelemetryAnomalyDetector(get_settings().model_copy(update={"anomaly_stall_seconds": 60}))
+    # 路线步骤：正北约1.1km处
+    route = [(31.21, 121.4)]
+
+    def observe(at, latitude, speed=0.0, battery=90.0):
+        return [alert.kind for alert in detector.observe(
+            1, at, latitude, 121.4, speed, battery=battery, delivering=True, route_id=7, route_points=route
+        )]
+
+    assert observe(0, 31.2) == []
+    assert observe(30, 31.2) == []
+    assert observe(90, 31.2) == [STALLED]
+    # 持续停滞不重复告警，开始移动后恢复
+    assert observe(120, 31.2) == []
+    assert observe(150, 31.203, speed=30) == []
+    assert observe(160, 31.205, speed=30, battery=75) == [BATTERY_DROP]
+    # 掉头远离下一步骤
+    assert observe(200, 31.200, speed=30, battery=75) == [OFF_ROUTE]
+    assert observe(210, 31.199, speed=30, battery=75) == []
+    assert len(detector.state(1).raised) == 1
+
+
+def test_record_telemetry_writes_alert_logs_and_events(db_session, monkeypatch):
+    from app.models.car import Car
+    from app.models.car_log import CarLog
+    from app.schemas.car import CarTelemetry
+    from app.services import event_service
+    from app.services.anomaly_service import ALERT_LOG_TYPE, TelemetryAnomalyDetector
+    from app.services.car_service import CarService
+
+    bus = EventBus(LocalBroker())
+    monkeypatch.setattr(event_service, "_event_bus", bus)
+    published = []
+    monkeypatch.setattr(bus, "publish", published.append)
+    car = Car(car_number="C1")
+    db_session.add(car)
+    db_session.commit()
+    service = CarService(db_session, detector=TelemetryAnomalyDetector())
+
+    service.record_telemetry(car.id, CarTelemetry(current_latitude=31.2, current_longitude=121.4, battery_level=80))
+    service.record_telemetry(car.id, CarTelemetry(current_latitude=31.2, current_longitude=121.4, battery_level=55))
+
+    alert = db_session.query(CarLog).filter_by(log_type=ALERT_LOG_TYPE).one()
+    assert json.loads(alert.extra_data)["kind"] == "battery_drop"
+    assert [item["kind"] for item in published if item["type"] == "car.alert"] == ["battery_drop"]
+
+
+def test_task_queue_claims_each_task_once_and_recovers_expired_leases(db_session, monkeypatch):
+    from datetime import datetime, timedelta
+    from app.models.car import Car
+    from app.models.enums import TaskStatus
+    from app.models.task import Task
+    from app.services import event_service
+    from app.services.task_queue_service import TaskQueueService
+
+    bus = EventBus(LocalBroker())
+    monkeypatch.setattr(event_service, "_event_bus", bus)
+    published = []
+    monkeypatch.setattr(bus, "publish", published.append)
+    db_session.add_all([Car(car_number="C1"), Car(car_number="C2")])
+    db_session.add_all([Task(assigned_car_number="C2"), Task(), Task()])
+    db_session.commit()
+    service = TaskQueueService(db_session)
+
+    # 预先分配给C2的任务不会被C1领取
+    first = service.claim("C1")
+    assert (first.id, first.status, first.assigned_car_number) == (2, TaskStatus.running, "C1")
+    assert first.lease_expires_at > datetime.now()
+    assert service.claim("C2").id == 1
+    assert service.claim("C1").id == 3
+    assert service.claim("C2") is None
+    assert [item["task_id"] for item in published if item["type"] == "task.status"] == [2, 1, 3]
+
+    assert service.complete(2, "C2") is None
+    assert service.complete(2, "C1").status == TaskStatus.completed
+
+    # C1放弃续约后，到期任务由定时任务退回（领取时不退回），C2领取后C1无法再续约或完成
+    db_session.query(Task).filter_by(id=3).update({"lease_expires_at": datetime.now() - timedelta(seconds=1)})
+    db_session.commit()
+    assert service.claim("C2") is None
+    assert service.requeue_expired() == 1
+    assert service.claim("C2").id == 3
+    assert service.renew_lease(3, "C1") is None
+    assert service.renew_lease(3, "C2") is not None
+
+    db_session.query(Task).filter_by(id=1).update({"lease_expires_at": datetime.now() - timedelta(seconds=1)})
+    db_session.commit()
+    assert service.requeue_expired() == 1
+    db_session.expire_all()
+    requeued = db_session.get(Task, 1)
+    assert (requeued.status, requeued.assigned_car_number, requeued.lease_expires_at) == (TaskStatus.pending, None, None)
+
+
+def test_dashboard_counters_follow_status_transitions_and_reconcile(db_session):
+    from datetime import datetime, timedelta
+    from app.models.car import Car
+    from app.models.dashboard_counter import DashboardCounter
+    from app.models.enums import TaskStatus
+    from app.models.session import UserSession
+    from app.models.task import Task
+    from app.services.dashboard_service import DashboardCache, DashboardService
+    from app.services.task_queue_service import TaskQueueService
+
+    user = _create_user(db_session)
+    db_session.add_all([Car(car_number="C1"), Task(), Task()])
+    db_session.commit()
+    service = DashboardService(db_session)
+    # 首次读取时计数行缺失，对账后补齐
+    counters = service.read_counters()
+    assert counters.tasks["pending"] == 2 and counters.cars["idle"] == 1 and counters.active_sessions == 0
+
+    now = datetime.now()
+    db_session.add(UserSession(
+        session_id="s1", user_id=user.id, device_id="d1", start_time=now, last_active_time=now,
+        expires_at=now + timedelta(hours=1),
+    ))
+    parcel = Express(
+        recipient_name="alice", recipient_phone="123", recipient_address=["1号楼"], tracking_number="T1",
+        recipient_user_id=user.id, status=ExpressStatus.unassigned,
+    )
+    db_session.add(parcel)
+    db_session.commit()
+    # 提交后属性已过期，直接赋值同样能算出增量
+    parcel.status = ExpressStatus.delivering
+    db_session.commit()
+    queue = TaskQueueService(db_session)
+    assert queue.claim("C1").id == 1
+    queue.complete(1, "C1")
+    queue.claim("C1")
+    db_session.query(Task).filter_by(id=2).update({"lease_expires_at": now - timedelta(seconds=1)})
+    db_session.commit()
+    assert queue.requeue_expired() == 1
+    db_session.get(UserSession, "s1").is_active = False
+    db_session.commit()
+
+    cache = DashboardCache()
+    counters = cache.get(db_session).counters
+    assert (counters.tasks["pending"], counters.tasks["running"], counters.tasks["completed"]) == (1, 0, 1)
+    assert (counters.express["unassigned"], counters.express["delivering"]) == (0, 1) and counters.active_sessions == 0
+    assert cache.get(db_session) is cache.get(db_session)
+    assert service.reconcile() == {}
+
+    # 计数偏差由对账校正
+    db_session.query(DashboardCounter).filter_by(metric="tasks", bucket="pending").update({"value": 7})
+    db_session.commit()
+    assert service.reconcile() == {"tasks": {"pending": -6}}
+    assert service.read_counters().tasks[TaskStatus.pending.value] == 1
+
+
+def test_replica_router_honours_read_your_writes_and_lag(monkeypatch):
+    import math
+    from sqlalchemy import create_engine
+    from app.db.replicas import LocalRecentWrites, ReplicaRouter, client_keys
+
+    settings = Settings(secret_key="x", read_your_writes_seconds=5, replica_max_lag_seconds=5)
+    replicas = [create_engine("sqlite://"), create_engine("sqlite://")]
+    router = ReplicaRouter(replicas, settings, LocalRecentWrites())
+    alice = client_keys("Bearer alice", "10.0.0.1")
+    bob = client_keys(None, "10.0.0.2")
+
+    # 副本轮流使用
+    assert [router.choose(alice) for _ in range(3)] == [replicas[0], replicas[1], replicas[0]]
+
+    # 写请求后同一客户端读主库，其他客户端不受影响
+    router.mark_write(alice)
+    assert router.choose(alice) is None
+    assert router.choose(bob) is not None
+
+    # 未认证的写请求（如注册）按来源IP记录，之后同一IP带令牌的读请求同样走主库
+    carol_ip = "10.0.0.3"
+    router.mark_write(client_keys(None, carol_ip))
+    assert router.choose(client_keys("Bearer carol", carol_ip)) is None
+
+    # 一个副本延迟过大时跳过，全部延迟过大时回退到主库
+    monkeypatch.setattr(router.monitors[0], "_measure", lambda: math.inf)
+    router.monitors[0]._checked_at = -math.inf
+    assert {router.choose(bob) for _ in range(4)} == {replicas[1]}
+    monkeypatch.setattr(router.monitors[1], "_measure", lambda: 30.0)
+    router.monitors[1]._checked_at = -math.inf
+    assert router.choose(bob) is None
+    assert ReplicaRouter([], settings).choose(bob) is None
+
+
+def _fake_password_hash(password):
+    return "hashed:" + password
+
+
+def test_bulk_provision_users_checks_uniqueness_per_chunk_and_reports_rows(db_session, query_budget):
+    from app.services.user_service import UserService
+
+    _create_user(db_session, "alice")
+    rows = [
+        {"username": f"resident-{i}", "email": f"resident-{i}@example.com", "name": f"住户{i}", "phone": "138", "password": "secret1"}
+        for i in range(10)
+    ]
+    rows += [
+        {"username": "alice", "name": "重名", "phone": "138", "password": "secret1"},
+        {"username": "bob", "email": "resident-0@example.com", "name": "重复邮箱", "phone": "138", "password": "secret1"},
+        {"username": "carol", "name": "密码太短", "phone": "138", "password": "x"},
+    ]
+    settings = Settings(secret_key="x", password_hash_workers=2)
+    service = UserService(db_session, settings, hasher=_fake_password_hash)
+
+    with query_budget(2):
+        result = service.bulk_provision(rows)
+
+    assert (result.created, result.skipped) == (10, 3)
+    assert [row.status for row in result.rows[10:]] == ["duplicate_username", "duplicate_email", "invalid"]
+    assert "password" in result.rows[12].detail
+    created = db_session.get(User, result.rows[3].user_id)
+    assert (created.username, created.hashed_password) == ("resident-3", "hashed:secret1")